@@ -0,0 +1,193 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+
+from botocore.exceptions import ClientError
+
+from db.dynamo import DDB_MAX_POOL_CONNECTIONS, THROTTLE_CODES
+
+# Control de admisión para las llamadas async a DynamoDB (ver async_repo)
+DDB_ADMISSION_CONCURRENCY = int(os.getenv("DDB_ADMISSION_CONCURRENCY", str(DDB_MAX_POOL_CONNECTIONS)))
+DDB_RATE_LIMIT = float(os.getenv("DDB_RATE_LIMIT", "0"))          # llamadas/s, 0 = sin límite
+DDB_RATE_BURST = int(os.getenv("DDB_RATE_BURST", "50"))
+DDB_ADMISSION_QUEUE = int(os.getenv("DDB_ADMISSION_QUEUE", "256"))
+DDB_ADMISSION_MAX_WAIT_S = float(os.getenv("DDB_ADMISSION_MAX_WAIT_S", "2.0"))
+# Única capa de reintentos por throttling para estas llamadas: async_repo las
+# corre con db.dynamo.throttle_retries_owned_by_caller(), botocore no las repite.
+DDB_THROTTLE_RETRIES = int(os.getenv("DDB_THROTTLE_RETRIES", "4"))
+_BACKOFF_BASE_S = 0.05
+_BACKOFF_CAP_S = 1.0
+_WAIT_SAMPLES = 1024
+
+
+def is_throttle(error: BaseException) -> bool:
+    return isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") in THROTTLE_CODES
+
+
+def is_transaction_conflict(error: BaseException) -> bool:
+    """Transacción cancelada porque otra escribía los mismos items (reintentable)."""
+    if not isinstance(error, ClientError) or error.response.get("Error", {}).get("Code") != "TransactionCanceledException":
+        return False
+    reasons = [r.get("Code") for r in error.response.get("CancellationReasons", [])]
+    return "TransactionConflict" in reasons and "ConditionalCheckFailed" not in reasons
+
+
+class AdmissionRejected(Exception):
+    """La cola está llena o se agotó el tiempo de espera: responder 503."""
+
+    def __init__(self, reason: str, retry_after_s: float = 1.0):
+        super().__init__(reason)
+        self.retry_after_s = retry_after_s
+
+
+class TokenBucket:
+    """Token bucket con tasa ajustable (AIMD ante throttling)."""
+
+    def __init__(self, rate: float, burst: int):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+
+    def reserve(self) -> float:
+        """Toma un token si hay; si no, regresa cuántos segundos faltan."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def on_throttle(self) -> None:
+        if self.max_rate > 0:
+            self.rate = max(self.max_rate * 0.1, self.rate * 0.7)
+
+    def on_success(self) -> None:
+        if self.max_rate > 0 and self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.01)
+
+
+class AdmissionController:
+    """
+    Puerta única delante del repositorio: a lo más `concurrency` llamadas
+    en vuelo, a lo más `rate` por segundo, y las que sobran esperan en una
+    cola acotada (hasta `max_wait_s`) en vez de fallar. El throttling de
+    DynamoDB se reintenta con backoff exponencial con jitter que crece
+    mientras el throttling persiste.
+    Pensado para un solo event loop (un worker de uvicorn / una Lambda).
+    """
+
+    def __init__(self, concurrency: int = DDB_ADMISSION_CONCURRENCY, rate: float = DDB_RATE_LIMIT,
+                 burst: int = DDB_RATE_BURST, max_queue: int = DDB_ADMISSION_QUEUE,
+                 max_wait_s: float = DDB_ADMISSION_MAX_WAIT_S, throttle_retries: int = DDB_THROTTLE_RETRIES):
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_s = max_wait_s
+        self.throttle_retries = max(0, throttle_retries)
+        self.bucket = TokenBucket(rate, burst)
+        self._sem = asyncio.Semaphore(self.concurrency)
+        # Nivel de throttling compartido: sube con cada throttle, baja con éxitos
+        self._pressure = 0
+
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.retries = 0
+        self._waits: deque[float] = deque(maxlen=_WAIT_SAMPLES)
+
+    async def _admit(self) -> None:
+        start = time.monotonic()
+        deadline = start + self.max_wait_s
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            if not self._sem.locked():
+                await self._sem.acquire()   # hay lugar: no cede el loop
+            elif self.queued > self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected("cola de DynamoDB llena")
+            else:
+                try:
+                    await asyncio.wait_for(self._sem.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    self.rejected += 1
+                    raise AdmissionRejected("tiempo de espera agotado para DynamoDB")
+            while True:
+                wait = self.bucket.reserve()
+                if wait <= 0:
+                    break
+                if time.monotonic() + wait > deadline:
+                    self._sem.release()
+                    self.rejected += 1
+                    raise AdmissionRejected("límite de tasa de DynamoDB", retry_after_s=max(wait, 1.0))
+                await asyncio.sleep(wait)
+        finally:
+            self.queued -= 1
+        self._waits.append(time.monotonic() - start)
+        self.admitted += 1
+
+    def _backoff_s(self, attempt: int) -> float:
+        # Full jitter; la presión compartida alarga la espera de todos
+        ceiling = min(_BACKOFF_CAP_S, _BACKOFF_BASE_S * (2 ** (attempt + min(self._pressure, 4))))
+        return random.uniform(0, ceiling)
+
+    async def run(self, fn):
+        """Ejecuta `fn` (corutina sin argumentos) con admisión y reintentos."""
+        await self._admit()
+        self.in_flight += 1
+        try:
+            for attempt in range(self.throttle_retries + 1):
+                try:
+                    result = await fn()
+                except ClientError as e:
+                    if not is_throttle(e):
+                        raise
+                    self.throttled += 1
+                    self._pressure += 1
+                    self.bucket.on_throttle()
+                    if attempt == self.throttle_retries:
+                        raise
+                    self.retries += 1
+                    await asyncio.sleep(self._backoff_s(attempt))
+                    continue
+                self._pressure = max(0, self._pressure - 1)
+                self.bucket.on_success()
+                return result
+        finally:
+            self.in_flight -= 1
+            self._sem.release()
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+
+        def _pct(p: float) -> float | None:
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 2) if waits else None
+
+        return {
+            "concurrency": self.concurrency,
+            "inFlight": self.in_flight,
+            "queueDepth": self.queued,
+            "maxQueueDepth": self.max_queued,
+            "maxQueue": self.max_queue,
+            "rateLimit": self.bucket.max_rate or None,
+            "currentRate": round(self.bucket.rate, 2) if self.bucket.max_rate else None,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "waitMsP50": _pct(0.50),
+            "waitMsP99": _pct(0.99),
+            "waitMsMax": round(waits[-1] * 1000, 2) if waits else None,
+        }
+
+
+admission = AdmissionController()
@@ -0,0 +1,51 @@
+from functools import lru_cache
+
+
+@lru_cache
+def _types():
+    # Importar boto3 arrastra s3transfer (~100 ms de cold start): solo si hace falta
+    from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+    return TypeSerializer(), TypeDeserializer()
+
+
+def _serialize(value) -> dict:
+    # Tipos de los items de EventUsers sin pasar por el TypeSerializer
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, int):
+        return {"N": str(value)}
+    return _types()[0].serialize(value)
+
+
+def serialize_item(item: dict) -> dict:
+    """dict de Python → AttributeValues del cliente low-level."""
+    return {k: _serialize(v) for k, v in item.items()}
+
+
+def deserialize_item(item: dict) -> dict:
+    """AttributeValues del cliente low-level → dict de Python."""
+    deserializer = _types()[1]
+    return {k: deserializer.deserialize(v) for k, v in item.items()}
+
+
+def decode_item(item: dict) -> dict:
+    """
+    Decodificador ligero para los atributos proyectados (S / BOOL / NULL).
+
+    Evita el TypeDeserializer completo (Decimal, sets, validaciones) en la
+    ruta caliente; cualquier otro tipo se delega a deserialize.
+    """
+    out = {}
+    for k, v in item.items():
+        (tag, value), = v.items()
+        if tag == "S" or tag == "BOOL":
+            out[k] = value
+        elif tag == "NULL":
+            out[k] = None
+        else:
+            out[k] = _types()[1].deserialize(v)
+    return out
@@ -1,7 +1,12 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from functools import lru_cache
 
-import boto3
+from botocore.config import Config
+from botocore.session import get_session
+from botocore.exceptions import BotoCoreError, ClientError
 from dotenv import load_dotenv
 
 load_dotenv()  # lee .env (local)
@@ -9,7 +14,145 @@ load_dotenv()  # lee .env (local)
 TABLE_NAME = os.getenv("TABLE_NAME", "EventUsers")
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 
+# Pool de conexiones HTTP: un hilo del executor por conexión, así las
+# llamadas concurrentes nunca hacen fila esperando un socket libre.
+DDB_MAX_POOL_CONNECTIONS = int(os.getenv("DDB_MAX_POOL_CONNECTIONS", "64"))
+DDB_CONNECT_TIMEOUT_S = float(os.getenv("DDB_CONNECT_TIMEOUT_S", "2"))
+DDB_READ_TIMEOUT_S = float(os.getenv("DDB_READ_TIMEOUT_S", "5"))
+# Reintentos de botocore por llamada (botocore hace 1 + DDB_MAX_ATTEMPTS
+# peticiones). En las llamadas que pasan por db.admission solo cubren red y
+# 5xx: el throttling lo reintenta admission (DDB_THROTTLE_RETRIES), así una
+# llamada con throttling hace como máximo 1 + DDB_THROTTLE_RETRIES peticiones
+# y no (1 + DDB_MAX_ATTEMPTS) × (1 + DDB_THROTTLE_RETRIES).
+DDB_MAX_ATTEMPTS = int(os.getenv("DDB_MAX_ATTEMPTS", "3"))
+DDB_PREWARM_CONNECTIONS = int(os.getenv("DDB_PREWARM_CONNECTIONS", "8"))
+# "dynamodb" (boto3) o "memory" (db.memory_backend, para benchmarks y pruebas de carga)
+DDB_BACKEND = os.getenv("DDB_BACKEND", "dynamodb").lower()
+# En Lambda el cliente se crea durante el init (CPU completo) y no en el primer request
+ON_LAMBDA = bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+DDB_PREINIT = os.getenv("DDB_PREINIT", "true" if ON_LAMBDA else "false").lower() in ("1", "true", "yes")
+
+CLIENT_CONFIG = Config(
+    region_name=AWS_REGION,
+    max_pool_connections=DDB_MAX_POOL_CONNECTIONS,
+    tcp_keepalive=True,
+    connect_timeout=DDB_CONNECT_TIMEOUT_S,
+    read_timeout=DDB_READ_TIMEOUT_S,
+    retries={"mode": "standard", "max_attempts": DDB_MAX_ATTEMPTS},
+)
+
+THROTTLE_CODES = frozenset({
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+})
+
+# ── Una sola capa de reintentos por throttling ─────────────────────────
+_retry_scope = threading.local()
+
+@contextmanager
+def throttle_retries_owned_by_caller():
+    """
+    Dentro del bloque botocore no reintenta el throttling en este hilo: el
+    llamador (db.admission) lo reintenta con su backoff y ajusta la tasa.
+    Fuera del bloque (CLIs, escaneos síncronos) botocore lo sigue reintentando.
+    """
+    previous = getattr(_retry_scope, "caller_retries", False)
+    _retry_scope.caller_retries = True
+    try:
+        yield
+    finally:
+        _retry_scope.caller_retries = previous
+
+def _retry_conditions(max_attempts: int):
+    from botocore.retries.standard import StandardRetryConditions
+
+    class _Conditions(StandardRetryConditions):
+        def is_retryable(self, context):
+            if getattr(_retry_scope, "caller_retries", False) and context.get_error_code() in THROTTLE_CODES:
+                return False
+            return super().is_retryable(context)
+
+    return _Conditions(max_attempts=max_attempts)
+
+def _install_retry_handler(client) -> None:
+    """Cambia el handler estándar de botocore por uno que respeta throttle_retries_owned_by_caller()."""
+    from botocore.retries import quota, standard
+
+    service_id = client.meta.service_model.service_id.hyphenize()
+    client.meta.events.unregister(f"needs-retry.{service_id}", unique_id=f"retry-config-{service_id}")
+    quota_checker = standard.RetryQuotaChecker(quota.RetryQuota())
+    handler = standard.RetryHandler(
+        retry_policy=standard.RetryPolicy(
+            retry_checker=_retry_conditions(client.meta.config.retries["total_max_attempts"]),
+            retry_backoff=standard.ExponentialBackoff(),
+        ),
+        retry_event_adapter=standard.RetryEventAdapter(),
+        retry_quota=quota_checker,
+    )
+    client.meta.events.register(f"needs-retry.{service_id}", handler.needs_retry,
+                                unique_id=f"retry-config-{service_id}")
+    client.meta.events.register(f"after-call.{service_id}", quota_checker.release_retry_quota)
+
 @lru_cache
 def get_table():
-    ddb = boto3.resource("dynamodb", region_name=AWS_REGION)
-    return ddb.Table(TABLE_NAME)
\ No newline at end of file
+    import boto3  # la app usa get_client(); boto3 solo si alguien pide el resource
+    ddb = boto3.resource("dynamodb", region_name=AWS_REGION, config=CLIENT_CONFIG)
+    _install_retry_handler(ddb.meta.client)
+    return ddb.Table(TABLE_NAME)
+
+_client_override = None
+
+def get_client():
+    """Cliente low-level (thread-safe, a diferencia del resource Table)."""
+    if _client_override is not None:
+        return _client_override
+    return _default_client()
+
+@lru_cache
+def _default_client():
+    if DDB_BACKEND == "memory":
+        from db.memory_backend import create_memory_client
+        return create_memory_client(TABLE_NAME)
+    # botocore directo: boto3 solo agrega los resources (y ~100 ms de imports)
+    client = get_session().create_client("dynamodb", config=CLIENT_CONFIG)
+    _install_retry_handler(client)
+    return client
+
+def use_client(client) -> None:
+    """Reemplaza el cliente de todos los repositorios (None regresa al de DDB_BACKEND)."""
+    global _client_override
+    _client_override = client
+
+def backend_stats() -> dict | None:
+    """Métricas del backend en memoria; None con DynamoDB real."""
+    client = get_client()
+    return client.stats() if hasattr(client, "stats") else None
+
+@lru_cache
+def get_executor() -> ThreadPoolExecutor:
+    """Hilos dedicados a DynamoDB, del mismo tamaño que el pool de conexiones."""
+    return ThreadPoolExecutor(max_workers=DDB_MAX_POOL_CONNECTIONS, thread_name_prefix="ddb")
+
+def prewarm(connections: int = DDB_PREWARM_CONNECTIONS) -> int:
+    """
+    Abre `connections` conexiones (TLS incluido) en paralelo para que los
+    primeros escaneos no paguen el handshake. Regresa cuántas respondieron.
+    Cualquier respuesta de DynamoDB (incluso AccessDenied) deja el socket
+    abierto en el pool.
+    """
+    client = get_client()
+
+    def _touch(_):
+        try:
+            client.describe_table(TableName=TABLE_NAME)
+        except ClientError:
+            pass
+        except BotoCoreError:
+            return False
+        return True
+
+    connections = max(0, min(connections, DDB_MAX_POOL_CONNECTIONS))
+    futures = [get_executor().submit(_touch, i) for i in range(connections)]
+    wait(futures)
+    return sum(1 for f in futures if f.result())
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import time
+from collections import deque
+
+# Lecturas "hedged": si la primera no responde a tiempo se lanza una segunda
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+HEDGE_BUDGET = float(os.getenv("HEDGE_BUDGET", "0.05"))            # lecturas extra / lecturas
+HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", "5"))
+HEDGE_INITIAL_DELAY_MS = float(os.getenv("HEDGE_INITIAL_DELAY_MS", "50"))
+
+_SAMPLES = 512
+_MIN_SAMPLES = 50
+_BUDGET_BURST = 10.0
+
+
+class HedgedReader:
+    """
+    Hedging de lecturas idempotentes. Espera a la primera lectura hasta el
+    percentil `percentile` de las latencias recientes; si no ha llegado y
+    hay presupuesto, lanza una segunda idéntica y se queda con la que
+    responda primero. El presupuesto acumula `budget` lecturas extra por
+    cada lectura (con un tope), así el costo extra queda acotado.
+    Pensado para un solo event loop.
+    """
+
+    def __init__(self, percentile: float = HEDGE_PERCENTILE, budget: float = HEDGE_BUDGET,
+                 min_delay_ms: float = HEDGE_MIN_DELAY_MS, initial_delay_ms: float = HEDGE_INITIAL_DELAY_MS):
+        self.percentile = min(max(percentile, 0.5), 0.999)
+        self.budget = max(0.0, budget)
+        self.min_delay_s = min_delay_ms / 1000
+        self.initial_delay_s = initial_delay_ms / 1000
+        self._latencies: deque[float] = deque(maxlen=_SAMPLES)
+        self._sorted: list[float] | None = None
+        self._tokens = _BUDGET_BURST
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedges_won = 0
+        self.budget_exhausted = 0
+
+    def _record(self, seconds: float) -> None:
+        self._latencies.append(seconds)
+        self._sorted = None
+
+    def threshold_s(self) -> float:
+        """Demora antes de lanzar la segunda lectura (percentil adaptativo)."""
+        if len(self._latencies) < _MIN_SAMPLES:
+            return self.initial_delay_s
+        if self._sorted is None:
+            self._sorted = sorted(self._latencies)
+        value = self._sorted[min(len(self._sorted) - 1, int(self.percentile * len(self._sorted)))]
+        return max(self.min_delay_s, value)
+
+    def _take_budget(self) -> bool:
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        self.budget_exhausted += 1
+        return False
+
+    def _timed(self, factory) -> asyncio.Future:
+        """
+        Lanza la lectura principal y registra su latencia. Si se cancela
+        porque ganó la segunda, registra lo que llevaba (al menos tardó eso);
+        las segundas lecturas no se registran para no sesgar el umbral.
+        """
+        start = time.monotonic()
+        task = asyncio.ensure_future(factory())
+
+        def _done(t: asyncio.Future) -> None:
+            if t.cancelled() or t.exception() is None:
+                self._record(time.monotonic() - start)
+
+        task.add_done_callback(_done)
+        return task
+
+    async def read(self, factory):
+        """`factory` crea la corutina de lectura; se llama una o dos veces."""
+        self.requests += 1
+        self._tokens = min(_BUDGET_BURST, self._tokens + self.budget)
+
+        primary = self._timed(factory)
+        try:
+            return await asyncio.wait_for(asyncio.shield(primary), self.threshold_s())
+        except asyncio.TimeoutError:
+            pass
+        if not self._take_budget():
+            return await primary
+
+        self.hedged += 1
+        hedge = asyncio.ensure_future(factory())
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedges_won += 1
+                        return task.result()
+                # La que terminó falló: esperar a la otra; si ambas fallan, error de la primera
+                if not pending:
+                    return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "percentile": self.percentile,
+            "budget": self.budget,
+            "thresholdMs": round(self.threshold_s() * 1000, 2),
+            "samples": len(self._latencies),
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedgesWon": self.hedges_won,
+            "hedgeRate": round(self.hedged / self.requests, 4) if self.requests else None,
+            "budgetExhausted": self.budget_exhausted,
+        }
+
+
+hedged_reader = HedgedReader() if HEDGE_ENABLED else None
@@ -0,0 +1,652 @@
+"""
+Backend en memoria con la misma interfaz que el cliente low-level de
+DynamoDB (DDB_BACKEND=memory). Los repositorios no cambian: get_client()
+regresa este cliente en vez del de boto3.
+
+Implementa lo que usan los repositorios con su semántica: GetItem,
+PutItem, UpdateItem y TransactWriteItems con ConditionExpression, Query
+sobre los GSI (TicketIdIndex, CheckedInIndex disperso), Scan segmentado
+con FilterExpression, BatchGet/BatchWrite. Los errores son los mismos
+ClientError (ConditionalCheckFailedException, TransactionCanceledException,
+ProvisionedThroughputExceededException).
+
+Inyección de latencia y fallas por variable de entorno, para medir el
+overhead propio y hacer pruebas de capacidad sin AWS:
+
+    DDB_BACKEND=memory DDB_MEMORY_SEED_ATTENDEES=50000 DDB_MEMORY_LATENCY_MS=4 \\
+        DDB_MEMORY_JITTER_MS=2 DDB_MEMORY_THROTTLE_RATE=0.01 uvicorn main:app
+
+Benchmark rápido de los repositorios (desde backend/):
+    python -m db.memory_backend --attendees 50000 --requests 20000 --workers 32
+"""
+
+import argparse
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+DDB_MEMORY_LATENCY_MS = float(os.getenv("DDB_MEMORY_LATENCY_MS", "0"))
+DDB_MEMORY_JITTER_MS = float(os.getenv("DDB_MEMORY_JITTER_MS", "0"))
+DDB_MEMORY_SLOW_RATE = float(os.getenv("DDB_MEMORY_SLOW_RATE", "0"))        # fracción de llamadas lentas
+DDB_MEMORY_SLOW_MS = float(os.getenv("DDB_MEMORY_SLOW_MS", "200"))
+DDB_MEMORY_THROTTLE_RATE = float(os.getenv("DDB_MEMORY_THROTTLE_RATE", "0"))
+DDB_MEMORY_SEED_ATTENDEES = int(os.getenv("DDB_MEMORY_SEED_ATTENDEES", "0"))
+DDB_MEMORY_SEED_FILE = os.getenv("DDB_MEMORY_SEED_FILE", "")
+
+_SCAN_PAGE_ITEMS = 1000
+
+
+# ── Errores (mismas clases/códigos que botocore) ──────────────────
+
+class ConditionalCheckFailedException(ClientError):
+    pass
+
+
+class TransactionCanceledException(ClientError):
+    pass
+
+
+class ProvisionedThroughputExceededException(ClientError):
+    pass
+
+
+class ResourceNotFoundException(ClientError):
+    pass
+
+
+class ValidationException(ClientError):
+    pass
+
+
+def _error(cls, operation: str, message: str, **extra):
+    return cls({"Error": {"Code": cls.__name__, "Message": message}, **extra}, operation)
+
+
+# ── Valores ───────────────────────────────────────────────────────
+
+def _plain(value: dict):
+    """AttributeValue → valor comparable (N como Decimal)."""
+    (tag, raw), = value.items()
+    if tag == "N":
+        return Decimal(raw)
+    return raw
+
+
+def _sort_value(value: dict | None):
+    return (0, "") if value is None else (1, _plain(value))
+
+
+# ── Expresiones ───────────────────────────────────────────────────
+
+_TOKEN = re.compile(r"\s*(<>|<=|>=|[=<>(),+-]|[#:]?[A-Za-z_][A-Za-z0-9_]*)")
+_COMPARATORS = {
+    "=": lambda a, b: a == b,
+    "<>": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def _tokenize(expression: str) -> list[str]:
+    tokens, pos = [], 0
+    expression = expression.strip()
+    while pos < len(expression):
+        match = _TOKEN.match(expression, pos)
+        if not match:
+            raise _error(ValidationException, "Expression", f"token inválido en: {expression[pos:]!r}")
+        tokens.append(match.group(1))
+        pos = match.end()
+    return tokens
+
+
+class _Condition:
+    """
+    Parser de ConditionExpression / FilterExpression / KeyConditionExpression
+    (AND/OR/NOT, paréntesis, comparadores, attribute_exists,
+    attribute_not_exists, begins_with). Atributos solo de primer nivel.
+    """
+
+    def __init__(self, expression: str, names: dict | None, values: dict | None):
+        self.names = names or {}
+        self.values = values or {}
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+        self.fn = self._or()
+        if self.pos != len(self.tokens):
+            raise _error(ValidationException, "Expression", f"expresión inválida: {expression!r}")
+
+    def __call__(self, item: dict | None) -> bool:
+        return self.fn(item or {})
+
+    def _peek(self) -> str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _take(self, expected: str | None = None) -> str:
+        token = self._peek()
+        if token is None or (expected and token.upper() != expected):
+            raise _error(ValidationException, "Expression", f"se esperaba {expected or 'algo'}")
+        self.pos += 1
+        return token
+
+    def _name(self, token: str) -> str:
+        return self.names[token] if token.startswith("#") else token
+
+    def _operand(self):
+        token = self._take()
+        if token.startswith(":"):
+            value = self.values[token]
+            return lambda item: value
+        name = self._name(token)
+        return lambda item: item.get(name)
+
+    def _or(self):
+        left = self._and()
+        while (self._peek() or "").upper() == "OR":
+            self._take()
+            right, prev = self._and(), left
+            left = lambda item, a=prev, b=right: a(item) or b(item)
+        return left
+
+    def _and(self):
+        left = self._not()
+        while (self._peek() or "").upper() == "AND":
+            self._take()
+            right, prev = self._not(), left
+            left = lambda item, a=prev, b=right: a(item) and b(item)
+        return left
+
+    def _not(self):
+        if (self._peek() or "").upper() == "NOT":
+            self._take()
+            inner = self._not()
+            return lambda item: not inner(item)
+        return self._primary()
+
+    def _primary(self):
+        token = self._peek()
+        if token == "(":
+            self._take()
+            inner = self._or()
+            self._take(")")
+            return inner
+        if token in ("attribute_exists", "attribute_not_exists", "begins_with"):
+            self._take()
+            self._take("(")
+            name = self._name(self._take())
+            if token == "begins_with":
+                self._take(",")
+                prefix = self._operand()
+                self._take(")")
+
+                def _begins(item):
+                    value, p = item.get(name), prefix(item)
+                    return value is not None and "S" in value and "S" in p and value["S"].startswith(p["S"])
+                return _begins
+            self._take(")")
+            if token == "attribute_exists":
+                return lambda item: name in item
+            return lambda item: name not in item
+        left = self._operand()
+        op = self._take()
+        if op not in _COMPARATORS:
+            raise _error(ValidationException, "Expression", f"comparador no soportado: {op}")
+        right = self._operand()
+        compare = _COMPARATORS[op]
+
+        def _compare(item):
+            a, b = left(item), right(item)
+            if a is None or b is None or next(iter(a)) != next(iter(b)):
+                return op == "<>" and a != b
+            return compare(_plain(a), _plain(b))
+        return _compare
+
+
+def _apply_update(item: dict, expression: str, names: dict | None, values: dict | None) -> None:
+    """UpdateExpression con SET (valor, a + :v, a - :v), ADD y REMOVE."""
+    names, values = names or {}, values or {}
+
+    def _name(token: str) -> str:
+        return names[token] if token.startswith("#") else token
+
+    def _value(token: str):
+        return values[token] if token.startswith(":") else item.get(_name(token))
+
+    for action, body in re.findall(r"(SET|ADD|REMOVE|DELETE)\s+(.*?)(?=\s+(?:SET|ADD|REMOVE|DELETE)\s|$)",
+                                   expression.strip(), flags=re.IGNORECASE | re.DOTALL):
+        action = action.upper()
+        for clause in (c.strip() for c in body.split(",")):
+            if action == "SET":
+                target, _, rhs = (p.strip() for p in clause.partition("="))
+                parts = re.split(r"\s*([+-])\s*", rhs)
+                result = _value(parts[0])
+                if len(parts) == 3:
+                    a, b = Decimal(result["N"]) if result else Decimal(0), Decimal(_value(parts[2])["N"])
+                    result = {"N": str(a + b if parts[1] == "+" else a - b)}
+                item[_name(target)] = result
+            elif action == "ADD":
+                target, token = clause.split()
+                current = item.get(_name(target))
+                delta = values[token]
+                if "N" in delta:
+                    base = Decimal(current["N"]) if current else Decimal(0)
+                    item[_name(target)] = {"N": str(base + Decimal(delta["N"]))}
+                else:   # sets
+                    (tag, members), = delta.items()
+                    existing = current[tag] if current else []
+                    item[_name(target)] = {tag: list(dict.fromkeys(existing + members))}
+            elif action == "REMOVE":
+                item.pop(_name(clause), None)
+            else:
+                raise _error(ValidationException, "UpdateItem", "DELETE no soportado")
+
+
+def _partition_value(expression: str, hash_key: str, names: dict | None, values: dict | None):
+    """Valor de la llave de partición en una KeyConditionExpression ("#k = :v AND ...")."""
+    names = names or {}
+    for name, placeholder in re.findall(r"([#\w]+)\s*=\s*(:\w+)", expression):
+        if names.get(name, name) == hash_key:
+            return _plain(values[placeholder])
+    raise _error(ValidationException, "Query", "falta la condición sobre la llave de partición")
+
+
+def _project(item: dict, projection: str | None, names: dict | None) -> dict:
+    if not projection:
+        return dict(item)
+    names = names or {}
+    attrs = [names.get(p.strip(), p.strip()) for p in projection.split(",")]
+    return {a: item[a] for a in attrs if a in item}
+
+
+# ── Cliente ───────────────────────────────────────────────────────
+
+class _Index:
+    """GSI: llave de partición (y de orden opcional); disperso como en DynamoDB."""
+
+    def __init__(self, hash_key: str, range_key: str | None = None):
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.partitions: dict = {}
+
+    def add(self, pk, item: dict) -> None:
+        value = item.get(self.hash_key)
+        if value is not None:
+            self.partitions.setdefault(_plain(value), set()).add(pk)
+
+    def discard(self, pk, item: dict) -> None:
+        value = item.get(self.hash_key)
+        if value is not None:
+            members = self.partitions.get(_plain(value))
+            if members is not None:
+                members.discard(pk)
+                if not members:
+                    del self.partitions[_plain(value)]
+
+
+class _Table:
+    def __init__(self, key: str, indexes: dict[str, _Index] | None = None):
+        self.key = key
+        self.items: dict = {}
+        self.indexes = indexes or {}
+
+    def pk(self, key: dict):
+        if set(key) != {self.key}:
+            raise _error(ValidationException, "GetItem", "la llave no coincide con el esquema")
+        return _plain(key[self.key])
+
+    def put(self, item: dict) -> dict | None:
+        pk = _plain(item[self.key])
+        old = self.items.get(pk)
+        if old is not None:
+            for index in self.indexes.values():
+                index.discard(pk, old)
+        self.items[pk] = item
+        for index in self.indexes.values():
+            index.add(pk, item)
+        return old
+
+    def delete(self, pk) -> None:
+        old = self.items.pop(pk, None)
+        if old is not None:
+            for index in self.indexes.values():
+                index.discard(pk, old)
+
+
+class MemoryDynamoClient:
+    """Cliente low-level de DynamoDB en memoria (thread-safe)."""
+
+    class exceptions:
+        ConditionalCheckFailedException = ConditionalCheckFailedException
+        TransactionCanceledException = TransactionCanceledException
+        ProvisionedThroughputExceededException = ProvisionedThroughputExceededException
+        ResourceNotFoundException = ResourceNotFoundException
+        ValidationException = ValidationException
+
+    def __init__(self, tables: dict[str, _Table], latency_ms: float = DDB_MEMORY_LATENCY_MS,
+                 jitter_ms: float = DDB_MEMORY_JITTER_MS, slow_rate: float = DDB_MEMORY_SLOW_RATE,
+                 slow_ms: float = DDB_MEMORY_SLOW_MS, throttle_rate: float = DDB_MEMORY_THROTTLE_RATE,
+                 seed: int | None = None):
+        self.tables = tables
+        self.latency_s = latency_ms / 1000
+        self.jitter_s = jitter_ms / 1000
+        self.slow_rate = slow_rate
+        self.slow_s = slow_ms / 1000
+        self.throttle_rate = throttle_rate
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self.calls: Counter = Counter()
+        self.throttled = 0
+
+    @classmethod
+    def for_event_users(cls, table_name: str, **kwargs) -> "MemoryDynamoClient":
+        """Tablas de la app: EventUsers con sus GSI y, si está configurada, la de idempotencia."""
+        tables = {
+            table_name: _Table("userId", {
+                os.getenv("TICKET_GSI_NAME", "TicketIdIndex"): _Index("ticketId"),
+                os.getenv("CHECKED_IN_GSI_NAME", "CheckedInIndex"): _Index("checkedInKey", "checkedInAt"),
+            }),
+        }
+        idempotency_table = os.getenv("IDEMPOTENCY_TABLE", "")
+        if idempotency_table:
+            tables[idempotency_table] = _Table("idempotencyKey")
+        return cls(tables, **kwargs)
+
+    # ── Inyección de latencia / throttling ────────────────────────
+
+    def _call(self, operation: str) -> None:
+        self.calls[operation] += 1
+        delay = self.latency_s
+        if self.jitter_s:
+            delay += self._random.uniform(0, self.jitter_s)
+        if self.slow_rate and self._random.random() < self.slow_rate:
+            delay += self.slow_s
+        if delay:
+            time.sleep(delay)
+        if self.throttle_rate and self._random.random() < self.throttle_rate:
+            self.throttled += 1
+            raise _error(ProvisionedThroughputExceededException, operation, "throttling simulado")
+
+    def _table(self, name: str, operation: str) -> _Table:
+        table = self.tables.get(name)
+        if table is None:
+            raise _error(ResourceNotFoundException, operation, f"tabla {name} no existe")
+        return table
+
+    # ── Operaciones ───────────────────────────────────────────────
+
+    def describe_table(self, TableName: str) -> dict:
+        self._call("DescribeTable")
+        table = self._table(TableName, "DescribeTable")
+        return {"Table": {"TableName": TableName, "ItemCount": len(table.items), "TableStatus": "ACTIVE"}}
+
+    def get_item(self, TableName: str, Key: dict, ProjectionExpression: str | None = None,
+                 ExpressionAttributeNames: dict | None = None, ConsistentRead: bool = False) -> dict:
+        self._call("GetItem")
+        table = self._table(TableName, "GetItem")
+        with self._lock:
+            item = table.items.get(table.pk(Key))
+            return {"Item": _project(item, ProjectionExpression, ExpressionAttributeNames)} if item else {}
+
+    def put_item(self, TableName: str, Item: dict, ConditionExpression: str | None = None,
+                 ExpressionAttributeNames: dict | None = None, ExpressionAttributeValues: dict | None = None,
+                 ReturnValues: str = "NONE") -> dict:
+        self._call("PutItem")
+        table = self._table(TableName, "PutItem")
+        with self._lock:
+            pk = _plain(Item[table.key])
+            old = table.items.get(pk)
+            if ConditionExpression and not _Condition(ConditionExpression, ExpressionAttributeNames,
+                                                      ExpressionAttributeValues)(old):
+                raise _error(ConditionalCheckFailedException, "PutItem", "The conditional request failed")
+            table.put(dict(Item))
+            return {"Attributes": dict(old)} if ReturnValues == "ALL_OLD" and old else {}
+
+    def update_item(self, TableName: str, Key: dict, UpdateExpression: str,
+                    ConditionExpression: str | None = None, ExpressionAttributeNames: dict | None = None,
+                    ExpressionAttributeValues: dict | None = None, ReturnValues: str = "NONE",
+                    ReturnValuesOnConditionCheckFailure: str = "NONE") -> dict:
+        self._call("UpdateItem")
+        table = self._table(TableName, "UpdateItem")
+        with self._lock:
+            pk = table.pk(Key)
+            old = table.items.get(pk)
+            if ConditionExpression and not _Condition(ConditionExpression, ExpressionAttributeNames,
+                                                      ExpressionAttributeValues)(old):
+                extra = {"Item": dict(old)} if old and ReturnValuesOnConditionCheckFailure == "ALL_OLD" else {}
+                raise _error(ConditionalCheckFailedException, "UpdateItem", "The conditional request failed",
+                             **extra)
+            new = dict(old) if old else dict(Key)
+            _apply_update(new, UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+            table.put(new)
+            if ReturnValues == "ALL_NEW":
+                return {"Attributes": dict(new)}
+            if ReturnValues == "ALL_OLD":
+                return {"Attributes": dict(old)} if old else {}
+            return {}
+
+    def transact_write_items(self, TransactItems: list[dict], **kwargs) -> dict:
+        self._call("TransactWriteItems")
+        with self._lock:
+            # Primero todas las condiciones; si una falla no se aplica nada
+            reasons, failed = [], False
+            for op in TransactItems:
+                (kind, req), = op.items()
+                table = self._table(req["TableName"], "TransactWriteItems")
+                pk = _plain(req["Item"][table.key]) if kind == "Put" else table.pk(req["Key"])
+                condition = req.get("ConditionExpression")
+                old = table.items.get(pk)
+                ok = not condition or _Condition(condition, req.get("ExpressionAttributeNames"),
+                                                 req.get("ExpressionAttributeValues"))(old)
+                reason = {"Code": "None" if ok else "ConditionalCheckFailed"}
+                if not ok and old and req.get("ReturnValuesOnConditionCheckFailure") == "ALL_OLD":
+                    reason["Item"] = dict(old)
+                reasons.append(reason)
+                failed = failed or not ok
+            if failed:
+                raise _error(TransactionCanceledException, "TransactWriteItems",
+                             "Transaction cancelled", CancellationReasons=reasons)
+            for op in TransactItems:
+                (kind, req), = op.items()
+                table = self.tables[req["TableName"]]
+                if kind == "Put":
+                    table.put(dict(req["Item"]))
+                elif kind == "Update":
+                    pk = table.pk(req["Key"])
+                    new = dict(table.items.get(pk) or req["Key"])
+                    _apply_update(new, req["UpdateExpression"], req.get("ExpressionAttributeNames"),
+                                  req.get("ExpressionAttributeValues"))
+                    table.put(new)
+                elif kind == "Delete":
+                    table.delete(table.pk(req["Key"]))
+        return {}
+
+    def batch_get_item(self, RequestItems: dict) -> dict:
+        self._call("BatchGetItem")
+        responses = {}
+        with self._lock:
+            for name, request in RequestItems.items():
+                table = self._table(name, "BatchGetItem")
+                found = (table.items.get(table.pk(k)) for k in request["Keys"])
+                responses[name] = [
+                    _project(item, request.get("ProjectionExpression"), request.get("ExpressionAttributeNames"))
+                    for item in found if item
+                ]
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+    def batch_write_item(self, RequestItems: dict) -> dict:
+        self._call("BatchWriteItem")
+        with self._lock:
+            for name, requests in RequestItems.items():
+                table = self._table(name, "BatchWriteItem")
+                for request in requests:
+                    if "PutRequest" in request:
+                        table.put(dict(request["PutRequest"]["Item"]))
+                    else:
+                        table.delete(table.pk(request["DeleteRequest"]["Key"]))
+        return {"UnprocessedItems": {}}
+
+    def query(self, TableName: str, KeyConditionExpression: str, IndexName: str | None = None,
+              FilterExpression: str | None = None, ProjectionExpression: str | None = None,
+              ExpressionAttributeNames: dict | None = None, ExpressionAttributeValues: dict | None = None,
+              ScanIndexForward: bool = True, Limit: int | None = None, ExclusiveStartKey: dict | None = None,
+              ConsistentRead: bool = False) -> dict:
+        self._call("Query")
+        table = self._table(TableName, "Query")
+        key_condition = _Condition(KeyConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+        with self._lock:
+            if IndexName:
+                index = table.indexes.get(IndexName)
+                if index is None:
+                    raise _error(ValidationException, "Query", f"índice {IndexName} no existe")
+                pks = index.partitions.get(
+                    _partition_value(KeyConditionExpression, index.hash_key,
+                                     ExpressionAttributeNames, ExpressionAttributeValues), ())
+                range_key = index.range_key
+                key_attrs = [table.key, index.hash_key] + ([range_key] if range_key else [])
+            else:
+                pks, range_key, key_attrs = list(table.items), None, [table.key]
+            candidates = [table.items[pk] for pk in pks if key_condition(table.items[pk])]
+
+        def _order(item: dict) -> tuple:
+            return (_sort_value(item.get(range_key)) if range_key else (0, ""), _plain(item[table.key]))
+
+        candidates.sort(key=_order, reverse=not ScanIndexForward)
+        if ExclusiveStartKey:
+            start = _order(ExclusiveStartKey)
+            candidates = [i for i in candidates if (_order(i) > start if ScanIndexForward else _order(i) < start)]
+        return self._page(candidates, Limit, key_attrs, FilterExpression, ProjectionExpression,
+                          ExpressionAttributeNames, ExpressionAttributeValues)
+
+    def scan(self, TableName: str, Segment: int = 0, TotalSegments: int = 1, FilterExpression: str | None = None,
+             ProjectionExpression: str | None = None, ExpressionAttributeNames: dict | None = None,
+             ExpressionAttributeValues: dict | None = None, Limit: int | None = None,
+             ExclusiveStartKey: dict | None = None, ConsistentRead: bool = False) -> dict:
+        self._call("Scan")
+        table = self._table(TableName, "Scan")
+        with self._lock:
+            pks = sorted(pk for pk in table.items if zlib.crc32(str(pk).encode()) % TotalSegments == Segment)
+            if ExclusiveStartKey:
+                after = _plain(ExclusiveStartKey[table.key])
+                pks = [pk for pk in pks if pk > after]
+            candidates = [table.items[pk] for pk in pks]
+        return self._page(candidates, Limit or _SCAN_PAGE_ITEMS, [table.key], FilterExpression,
+                          ProjectionExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+
+    @staticmethod
+    def _page(candidates: list[dict], limit: int | None, key_attrs: list[str], filter_expression: str | None,
+              projection: str | None, names: dict | None, values: dict | None) -> dict:
+        # Como en DynamoDB: Limit cuenta items leídos, el filtro va después
+        page = candidates[:limit] if limit else candidates
+        keep = _Condition(filter_expression, names, values) if filter_expression else None
+        resp = {
+            "Items": [_project(i, projection, names) for i in page if keep is None or keep(i)],
+            "ScannedCount": len(page),
+        }
+        resp["Count"] = len(resp["Items"])
+        if limit and len(candidates) > limit:
+            resp["LastEvaluatedKey"] = {a: page[-1][a] for a in key_attrs if a in page[-1]}
+        return resp
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "items": {name: len(t.items) for name, t in self.tables.items()},
+            "calls": dict(self.calls),
+            "throttled": self.throttled,
+            "latencyMs": self.latency_s * 1000,
+            "jitterMs": self.jitter_s * 1000,
+            "slowRate": self.slow_rate,
+            "throttleRate": self.throttle_rate,
+        }
+
+
+# ── Datos iniciales ───────────────────────────────────────────────
+
+def seed_attendees(client: MemoryDynamoClient, table_name: str, count: int = 0, path: str = "") -> int:
+    """Carga un roster sintético de `count` asistentes y/o un CSV/NDJSON de import (con punteros)."""
+    # Import tardío: repositories depende de db
+    from db.codec import serialize_item
+    from repositories.event_users_repo import pointer_item
+    from repositories.import_attendees import RowError, read_rows, validate_row
+
+    professions = ("Estudiante", "Cloud Engineer", "Developer", "Data Scientist", "DevOps")
+    items = [
+        {"userId": f"usr-{i:06d}", "ticketId": f"TKT-2026-{i:08X}-{zlib.crc32(str(i).encode()):08X}",
+         "name": f"Asistente {i}", "profession": professions[i % len(professions)], "checkedIn": False}
+        for i in range(count)
+    ]
+    if path:
+        for _, row in read_rows(path):
+            try:
+                items.append(validate_row(row))
+            except RowError:
+                continue
+    table = client.tables[table_name]
+    with client._lock:
+        for item in items:
+            table.put(serialize_item(item))
+            table.put(serialize_item(pointer_item(item)))
+    return len(items)
+
+
+def create_memory_client(table_name: str) -> MemoryDynamoClient:
+    client = MemoryDynamoClient.for_event_users(table_name)
+    if DDB_MEMORY_SEED_ATTENDEES or DDB_MEMORY_SEED_FILE:
+        loaded = seed_attendees(client, table_name, DDB_MEMORY_SEED_ATTENDEES, DDB_MEMORY_SEED_FILE)
+        print(f"[ddb-memory] {loaded} asistentes cargados en {table_name}")
+    return client
+
+
+# ── Benchmark ─────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de los repositorios contra el backend en memoria")
+    parser.add_argument("--attendees", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import datetime, timezone
+
+    from db import dynamo
+    from repositories.event_users_repo import EventUsersRepo
+
+    client = MemoryDynamoClient.for_event_users(dynamo.TABLE_NAME, latency_ms=args.latency_ms,
+                                                jitter_ms=args.jitter_ms, slow_rate=0, throttle_rate=0)
+    seed_attendees(client, dynamo.TABLE_NAME, args.attendees)
+    dynamo.use_client(client)
+    tickets = [t["ticketId"]["S"] for t in client.tables[dynamo.TABLE_NAME].items.values() if "ticketId" in t]
+
+    def _one(i: int) -> tuple[float, float]:
+        ticket_id = tickets[i % len(tickets)]
+        start = time.perf_counter()
+        item = EventUsersRepo.get_by_ticket_id(ticket_id)
+        looked_up = time.perf_counter()
+        EventUsersRepo.mark_checkin(item["userId"], datetime.now(timezone.utc).isoformat(), ticket_id=ticket_id)
+        return looked_up - start, time.perf_counter() - looked_up
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        timings = list(pool.map(_one, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    for label, values in (("lookup", sorted(t[0] for t in timings)), ("checkin", sorted(t[1] for t in timings))):
+        print(f"[bench] {label}: p50={values[len(values) // 2] * 1000:.3f}ms "
+              f"p99={values[int(len(values) * 0.99)] * 1000:.3f}ms")
+    print(f"[bench] {args.requests} lookup+checkin en {elapsed:.2f}s → {args.requests / elapsed:.0f}/s "
+          f"({args.workers} workers, {args.attendees} asistentes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
+import asyncio
+import base64
+import json
 import os
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from mangum import Mangum
@@ -10,14 +17,74 @@ from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 load_dotenv()
 
-from repositories.event_users_repo import EventUsersRepo
-from utils.pdf_badge import build_badge_pdf
-from db.dynamo import TABLE_NAME, AWS_REGION
-from printer import printer_router, rt420me_router
+from repositories.event_users_repo import TICKET_LOOKUP_MODE, AttendeeNotFound
+from repositories.async_repo import AsyncAttendanceRepo, AsyncEventUsersRepo
+from repositories.attendance_repo import ATTENDANCE_TRACKING_ENABLED
+from repositories.attendee import AttendeeRecord
+from repositories.ticket_index import TicketIndex, load_ticket_index
+from repositories.ticket_filter import TicketFilter, load_ticket_filter
+from repositories.name_search import NameSearchIndex, load_name_search
+from repositories.roster_snapshot import SharedRoster, load_roster_snapshot, scan_records
+from repositories.export_roster import EXPORT_FORMATS, iter_export
+from repositories.checkin_journal import CheckinJournal, load_checkin_journal
+from utils.badge_cache import badge_cache
+from utils.render_pool import RenderPool, load_render_pool
+from utils.badge_http import BADGE_HEADERS, badge_etag, badge_headers, etag_matches, wants_pdf
+from utils.singleflight import SingleFlight
+from utils.idempotency import IdempotencyStore
+from utils.signed_ticket import InvalidTicketSignature, SignedTicket, is_signed_ticket, sign_ticket, signing_enabled, verify_ticket
+from db.admission import AdmissionRejected, admission, is_throttle, is_transaction_conflict
+from db.hedging import hedged_reader
+from db.dynamo import TABLE_NAME, AWS_REGION, DDB_PREINIT, DDB_PREWARM_CONNECTIONS, ON_LAMBDA, backend_stats, get_client
 
 TICKET_GSI = os.getenv("TICKET_GSI_NAME", "TicketIdIndex")
+BATCH_CHECKIN_MAX = int(os.getenv("BATCH_CHECKIN_MAX", "100"))
+BADGE_SHEET_MAX_TICKETS = int(os.getenv("BADGE_SHEET_MAX_TICKETS", "5000"))
+COALESCE_WINDOW_S = float(os.getenv("COALESCE_WINDOW_S", "1.0"))
+# El agente de impresión (PIL, pyusb, discovery) no alcanza impresoras desde Lambda
+PRINTER_AGENT_ENABLED = os.getenv("PRINTER_AGENT_ENABLED", "false" if ON_LAMBDA else "true").lower() in ("1", "true", "yes")
 
-app = FastAPI()
+ticket_index: TicketIndex | None = None
+ticket_filter: TicketFilter | None = None
+checkin_journal: CheckinJournal | None = None
+name_search: NameSearchIndex | None = None
+roster_snapshot: SharedRoster | None = None
+render_pool: RenderPool | None = None
+coalescer = SingleFlight(window_s=COALESCE_WINDOW_S)
+idempotency = IdempotencyStore()
+# Idempotency-Keys en vuelo (llave → fingerprint); sin ventana: lo terminado lo sirve el store
+idempotency_flight = SingleFlight(window_s=0)
+_idempotency_in_flight: dict[str, str] = {}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global ticket_index, ticket_filter, checkin_journal, name_search, roster_snapshot, render_pool
+    # Conexiones abiertas antes del primer escaneo
+    if DDB_PREWARM_CONNECTIONS > 0:
+        await AsyncEventUsersRepo.prewarm()
+    ticket_index = await run_in_threadpool(load_ticket_index)
+    roster_snapshot = await run_in_threadpool(load_roster_snapshot)
+    # Con índice completo el filtro se arma desde él, sin otro Scan
+    ticket_filter = await run_in_threadpool(load_ticket_filter, ticket_index.ticket_ids if ticket_index else None)
+    name_search = await run_in_threadpool(load_name_search, ticket_index.records if ticket_index else None)
+    checkin_journal = await run_in_threadpool(load_checkin_journal)
+    # Workers precalentados antes del primer badge
+    render_pool = await run_in_threadpool(load_render_pool)
+    yield
+    if ticket_index:
+        ticket_index.stop()
+    if ticket_filter:
+        ticket_filter.stop()
+    if roster_snapshot:
+        roster_snapshot.stop()
+    if name_search:
+        name_search.stop()
+    if checkin_journal:
+        checkin_journal.stop()
+    if render_pool:
+        render_pool.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,10 +92,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=BADGE_HEADERS,
 )
 
-app.include_router(printer_router)
-app.include_router(rt420me_router)
+if PRINTER_AGENT_ENABLED:
+    from printer import printer_router, rt420me_router
+    app.include_router(printer_router)
+    app.include_router(rt420me_router)
+
+if DDB_PREINIT:
+    # Durante el init de Lambda: el primer request ya no crea el cliente
+    get_client()
+
+def build_badge_pdf(ticket_id: str, name: str, profession: str, checked_in_at: str, cache: bool = True) -> str:
+    """reportlab (~40 ms de import) se carga con el primer badge, no en el cold start."""
+    from utils.pdf_badge import build_badge_pdf as _build
+    return _build(ticket_id, name, profession, checked_in_at, cache=cache)
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request, exc: AdmissionRejected):
+    # Saturación local: el cliente reintenta en vez de recibir un 500
+    return JSONResponse(status_code=503, content={"detail": str(exc)},
+                        headers={"Retry-After": str(max(1, round(exc.retry_after_s)))})
+
+def _ddb_http_error(e: ClientError) -> HTTPException:
+    """ClientError de DynamoDB → HTTPException (403 permisos, 503 throttling/conflicto, 500 el resto)."""
+    code = e.response.get("Error", {}).get("Code", "")
+    msg = e.response.get("Error", {}).get("Message", "DynamoDB ClientError")
+    if code in ("AccessDeniedException", "UnrecognizedClientException"):
+        return HTTPException(status_code=403, detail=msg)
+    if is_throttle(e) or is_transaction_conflict(e):
+        return HTTPException(status_code=503, detail="DynamoDB saturado, reintenta en un momento",
+                             headers={"Retry-After": "1"})
+    return HTTPException(status_code=500, detail=msg)
 
 class PdfReq(BaseModel):
     id: str
@@ -36,40 +132,329 @@ class PdfReq(BaseModel):
 class TicketReq(BaseModel):
     ticketId: str
 
+class WalkinReq(BaseModel):
+    name: str
+    profession: str | None = None
+
+class BatchTicketReq(BaseModel):
+    ticketIds: list[str]
+    includePdf: bool = True
+
+class BadgeSheetReq(BaseModel):
+    ticketIds: list[str] | None = None
+    checkedIn: bool | None = None
+    paper: str = "letter"
+    perSheet: int | None = None
+    cropMarks: bool = True
+
+async def _lookup_ticket(ticket_id: str) -> dict | None:
+    """
+    Busca primero en el índice en memoria; si no está y el filtro dice que el
+    ticket no puede ser nuestro, responde sin ir a DynamoDB.
+    """
+    if ticket_index is not None:
+        rec = ticket_index.get(ticket_id)
+        if rec is not None:
+            return rec.as_item()
+    if roster_snapshot is not None:
+        rec = roster_snapshot.get(ticket_id)
+        if rec is not None:
+            return rec.as_item()
+
+    if ticket_filter is not None and not ticket_filter.might_contain(ticket_id):
+        return None
+
+    item = await AsyncEventUsersRepo.get_by_ticket_id(ticket_id)
+    if item and ticket_index is not None:
+        ticket_index.put(AttendeeRecord.from_item(item))
+    if item and name_search is not None:
+        name_search.put(AttendeeRecord.from_item(item))
+    if not item and ticket_filter is not None:
+        ticket_filter.record_false_positive()
+    return item
+
+def _verify_signed(raw: str) -> SignedTicket | None:
+    """QR firmado → datos verificados localmente; None si es un ticketId normal."""
+    if not is_signed_ticket(raw):
+        return None
+    if not signing_enabled():
+        raise HTTPException(status_code=503, detail="tickets firmados deshabilitados (TICKET_SIGNING_KEYS)")
+    try:
+        return verify_ticket(raw)
+    except InvalidTicketSignature as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _signed_item(signed: SignedTicket) -> dict:
+    """El índice en memoria (si lo tiene) trae el estado de check-in; si no, solo el QR."""
+    for source in (ticket_index, roster_snapshot):
+        rec = source.get(signed.ticket_id) if source is not None else None
+        if rec is not None:
+            return rec.as_item()
+    return signed.as_item()
+
 @app.get("/health")
 def health():
-    return {"ok": True, "table": TABLE_NAME, "gsi": TICKET_GSI, "region": AWS_REGION}
+    return {"ok": True, "table": TABLE_NAME, "gsi": TICKET_GSI, "region": AWS_REGION, "lookupMode": TICKET_LOOKUP_MODE}
+
+@app.get("/metrics")
+def metrics():
+    return {
+        "ticketIndex": ticket_index.stats() if ticket_index else None,
+        "ticketFilter": ticket_filter.stats() if ticket_filter else None,
+        "coalescing": coalescer.stats(),
+        "idempotency": idempotency.stats(),
+        "checkinJournal": checkin_journal.stats() if checkin_journal else None,
+        "nameSearch": name_search.stats() if name_search else None,
+        "rosterSnapshot": roster_snapshot.stats() if roster_snapshot else None,
+        "admission": admission.stats(),
+        "hedging": hedged_reader.stats() if hedged_reader else None,
+        "badgeCache": badge_cache.stats() if badge_cache else None,
+        "renderPool": render_pool.stats() if render_pool else None,
+        "ddbBackend": backend_stats(),
+    }
+
+def _require_attendance_tracking() -> None:
+    if not ATTENDANCE_TRACKING_ENABLED:
+        raise HTTPException(status_code=503, detail="conteo de asistencia deshabilitado (ATTENDANCE_TRACKING_ENABLED)")
+
+@app.get("/stats")
+async def attendance_stats():
+    """Asistencia en vivo desde los shards de contadores (un BatchGetItem, sin Scan)."""
+    _require_attendance_tracking()
+    try:
+        stats = await AsyncAttendanceRepo.get_stats()
+    except ClientError as e:
+        raise _ddb_http_error(e)
+    return {"ok": True, **stats}
+
+@app.get("/checked-in")
+async def checked_in(limit: int = Query(default=50, ge=1, le=500), cursor: str | None = None):
+    """Asistentes con check-in (más reciente primero), paginado con cursor."""
+    _require_attendance_tracking()
+    try:
+        items, next_cursor = await AsyncAttendanceRepo.list_checked_in(limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code", "")
+        if cursor and code == "ValidationException":
+            raise HTTPException(status_code=400, detail="cursor inválido")
+        raise _ddb_http_error(e)
+    return {"ok": True, "count": len(items), "items": items, "nextCursor": next_cursor}
+
+@app.get("/attendees/search")
+async def search_attendees(q: str = "", limit: int = Query(default=10, ge=1, le=50)):
+    """Búsqueda por nombre (sin acentos, tolerante a typos) para quien perdió su QR."""
+    if name_search is None:
+        raise HTTPException(status_code=503, detail="búsqueda por nombre deshabilitada (NAME_SEARCH_ENABLED)")
+    if len(q.strip()) < 2:
+        raise HTTPException(status_code=400, detail="q requiere al menos 2 caracteres")
+    start = time.perf_counter()
+    results = name_search.search(q, limit)
+    return {
+        "ok": True,
+        "query": q,
+        "count": len(results),
+        "results": results,
+        "tookMs": round((time.perf_counter() - start) * 1000, 3),
+    }
+
+@app.get("/export")
+def export_roster(format: str = "csv", checkedIn: bool = False):
+    """
+    Roster completo (o solo con check-in) en CSV/NDJSON, escrito al cliente
+    página por página desde un Scan paralelo.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format debe ser csv o ndjson")
+    filename = f"asistentes{'-checkin' if checkedIn else ''}.{format}"
+    return StreamingResponse(
+        iter_export(format, checked_in_only=checkedIn),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+async def _records_by_ticket(ticket_ids: list[str]) -> dict[str, AttendeeRecord]:
+    """Índice y snapshot en memoria primero; el resto en una lectura por lote."""
+    found: dict[str, AttendeeRecord] = {}
+    for source in (ticket_index, roster_snapshot):
+        if source is None:
+            continue
+        for ticket_id in ticket_ids:
+            rec = None if ticket_id in found else source.get(ticket_id)
+            if rec is not None:
+                found[ticket_id] = rec
+    missing = [t for t in ticket_ids if t not in found]
+    if missing:
+        try:
+            fetched = await AsyncEventUsersRepo.get_by_ticket_ids(missing)
+        except ClientError as e:
+            raise _ddb_http_error(e)
+        for ticket_id, item in fetched.items():
+            found[ticket_id] = AttendeeRecord.from_item(item)
+    return found
+
+@app.post("/badges/sheet")
+async def badge_sheet(req: BadgeSheetReq):
+    """
+    Badges para imprimir antes del evento en un solo PDF, N por hoja
+    Letter/A4 con marcas de corte: los ticketIds dados (en ese orden) o el
+    roster completo filtrado por checkedIn y ordenado por nombre. El PDF se
+    escribe al cliente hoja por hoja.
+    """
+    from utils.badge_sheet import SheetLayout, iter_sheet_pdf, select_records, sheet_count, sheet_values
+    from utils.badge_template import get_template
+
+    template = await run_in_threadpool(get_template)
+    try:
+        sheet = SheetLayout(template, req.paper, req.perSheet)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if req.ticketIds is not None:
+        ticket_ids = list(dict.fromkeys(t.strip() for t in req.ticketIds if t and t.strip()))
+        if not ticket_ids:
+            raise HTTPException(status_code=400, detail="ticketIds vacío")
+        if len(ticket_ids) > BADGE_SHEET_MAX_TICKETS:
+            raise HTTPException(status_code=400, detail=f"máximo {BADGE_SHEET_MAX_TICKETS} tickets por PDF")
+        found = await _records_by_ticket(ticket_ids)
+        missing = [t for t in ticket_ids if t not in found]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"ticketId no encontrado: {', '.join(missing[:20])}")
+        records = [found[t] for t in ticket_ids]
+    else:
+        try:
+            records = select_records(await run_in_threadpool(scan_records), req.checkedIn)
+        except ClientError as e:
+            raise _ddb_http_error(e)
+        if not records:
+            raise HTTPException(status_code=404, detail="no hay asistentes con ese filtro")
+
+    return StreamingResponse(
+        iter_sheet_pdf(map(sheet_values, records), sheet, template, req.cropMarks),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'attachment; filename="badges-{sheet.paper}.pdf"',
+            "X-Badge-Count": str(len(records)),
+            "X-Sheet-Count": str(sheet_count(len(records), sheet)),
+        },
+    )
+
+def _pdf_response(result: dict, if_none_match: str | None) -> Response:
+    """
+    Badge como application/pdf (datos en headers). Si el cliente ya tiene ese
+    PDF regresa 412: los endpoints son POST y RFC 9110 §13.1.2 reserva el 304
+    para GET/HEAD.
+    """
+    etag = badge_etag(result["ticketId"], result["name"], result["profession"], result["checkedInAt"])
+    headers = badge_headers(result) | {"ETag": etag}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=412, headers=headers)
+    return Response(content=base64.b64decode(result["pdfBase64"]), media_type="application/pdf", headers=headers)
 
 @app.post("/pdf")
-def pdf_dummy(req: PdfReq):
+def pdf_dummy(req: PdfReq, accept: str | None = Header(default=None)):
     now = datetime.now(timezone.utc).isoformat()
-    pdf_b64 = build_badge_pdf(req.id, "DUMMY NAME", "DUMMY PROFESSION", now)
+    # Cada llamada lleva otra hora: en el cache solo serían entradas que nadie vuelve a pedir
+    pdf_b64 = build_badge_pdf(req.id, "DUMMY NAME", "DUMMY PROFESSION", now, cache=False)
+    if wants_pdf(accept):
+        return _pdf_response({"ticketId": req.id, "name": "DUMMY NAME", "profession": "DUMMY PROFESSION",
+                              "checkedInAt": now, "pdfBase64": pdf_b64}, None)
     return {"contentType": "application/pdf", "pdfBase64": pdf_b64}
 
 @app.post("/badge")
-def badge(req: TicketReq):
+async def badge(req: TicketReq, accept: str | None = Header(default=None),
+                if_none_match: str | None = Header(default=None, alias="If-None-Match")):
     ticket_id = (req.ticketId or "").strip()
-    print(f"[DEBUG /badge] raw='{req.ticketId}' | stripped='{ticket_id}' | len={len(ticket_id)} | repr={repr(ticket_id)}")
     if not ticket_id:
         raise HTTPException(status_code=400, detail="ticketId requerido")
 
+    # QR firmado: se verifica y renderiza sin ir a DynamoDB
+    signed = _verify_signed(ticket_id)
+    if signed is not None:
+        ticket_id = signed.ticket_id
+        render = lambda: _render_badge(ticket_id, _signed_item(signed))
+    else:
+        render = lambda: _badge_response(ticket_id)
+
+    # Re-disparos del escáner del mismo QR comparten lookup y PDF
+    if not wants_pdf(accept):
+        return await coalescer.do(("badge", ticket_id), render)
+
+    if if_none_match:
+        # Precondición: con el item basta para el ETag; el PDF solo se dibuja si cambió
+        item = _signed_item(signed) if signed is not None else await _badge_item(ticket_id)
+        fields = _badge_fields(ticket_id, item)
+        if etag_matches(if_none_match, badge_etag(ticket_id, fields["name"], fields["profession"], fields["checkedInAt"])):
+            return _pdf_response(fields, if_none_match)
+        render = lambda: _render_badge(ticket_id, item)
+    return _pdf_response(await coalescer.do(("badge", ticket_id), render), if_none_match)
+
+async def _badge_item(ticket_id: str) -> dict:
     try:
-        item = EventUsersRepo.get_by_ticket_id(ticket_id)
+        item = await _lookup_ticket(ticket_id)
     except ClientError as e:
-        msg = e.response.get("Error", {}).get("Message", "DynamoDB ClientError")
-        raise HTTPException(status_code=500, detail=msg)
-
-    print(f"[DEBUG /badge] DynamoDB item={item}")
+        raise _ddb_http_error(e)
     if not item:
         raise HTTPException(status_code=404, detail="ticketId no encontrado")
+    return item
+
+async def _badge_response(ticket_id: str) -> dict:
+    return await _render_badge(ticket_id, await _badge_item(ticket_id))
+
+def _badge_fields(ticket_id: str, item: dict) -> dict:
+    """Respuesta de /badge sin el PDF."""
+    # Un QR firmado sin índice no trae el estado: checkedIn = null
+    checked_in = (item.get("checkedIn") is True) if "checkedIn" in item else None
+    return {
+        "ok": True,
+        "ticketId": ticket_id,
+        "userId": item.get("userId") or "UNKNOWN",
+        "name": item.get("name") or "UNKNOWN",
+        "profession": item.get("profession") or "N/A",
+        "checkedIn": checked_in,
+        "checkedInAt": item.get("checkedInAt") or "N/A",
+        "contentType": "application/pdf",
+    }
+
+async def _render_badge(ticket_id: str, item: dict) -> dict:
+    result = _badge_fields(ticket_id, item)
+    result["pdfBase64"] = await run_in_threadpool(
+        build_badge_pdf, ticket_id, result["name"], result["profession"], result["checkedInAt"]
+    )
+    return result
+
+async def _mark_checkin(ticket_id: str, item: dict, now: str) -> dict:
+    """Marca el check-in de un item ya resuelto y arma la respuesta (sin PDF)."""
+    user_id = item.get("userId")
+    if not user_id:
+        raise HTTPException(status_code=500, detail="El item no tiene userId")
 
-    user_id = item.get("userId") or "UNKNOWN"
     name = item.get("name") or "UNKNOWN"
     profession = item.get("profession") or "N/A"
-    checked_in = item.get("checkedIn") is True
-    checked_in_at = item.get("checkedInAt") or "N/A"
 
-    pdf_b64 = build_badge_pdf(ticket_id, name, profession, checked_in_at)
+    # marcar checkin (requiere permisos)
+    try:
+        if checkin_journal is not None:
+            checked_in_at, already = await _journal_checkin(ticket_id, user_id, item, now)
+        else:
+            updated, already = await AsyncEventUsersRepo.mark_checkin(
+                user_id, now, ticket_id=ticket_id, profession=item.get("profession")
+            )
+            checked_in_at = (updated.get("checkedInAt") if updated else None) or item.get("checkedInAt") or now
+        if ticket_index is not None:
+            ticket_index.mark_checked_in(ticket_id, checked_in_at)
+        if roster_snapshot is not None:
+            roster_snapshot.mark_checked_in(ticket_id, checked_in_at)
+        if name_search is not None:
+            name_search.mark_checked_in(ticket_id, checked_in_at)
+        # El badge reciente ya no refleja el check-in
+        coalescer.forget(("badge", ticket_id))
+    except AttendeeNotFound:
+        # QR firmado o índice viejo de un asistente ya borrado
+        raise HTTPException(status_code=404, detail="ticketId no encontrado")
+    except ClientError as e:
+        raise _ddb_http_error(e)
 
     return {
         "ok": True,
@@ -77,56 +462,267 @@ def badge(req: TicketReq):
         "userId": user_id,
         "name": name,
         "profession": profession,
-        "checkedIn": checked_in,
+        "checkedIn": True,
         "checkedInAt": checked_in_at,
+        "alreadyCheckedIn": already,
         "contentType": "application/pdf",
-        "pdfBase64": pdf_b64,
     }
 
+async def _journal_checkin(ticket_id: str, user_id: str, item: dict, now: str) -> tuple[str, bool]:
+    """Check-in en el journal local; el syncer lo replica a DynamoDB."""
+    if item.get("checkedIn") is True:
+        return item.get("checkedInAt") or now, True
+    return await run_in_threadpool(checkin_journal.record, ticket_id, user_id, now, item.get("profession"))
+
+async def _idempotent(idempotency_key: str | None, fingerprint: str, fn, respond=None):
+    """
+    Ejecuta `fn` una sola vez por Idempotency-Key: un reintento del cliente
+    recibe la respuesta guardada tal cual, y uno que llega mientras la
+    primera sigue en vuelo espera ese mismo resultado; la misma llave con
+    otra petición (fingerprint distinto) es un 422. Se guarda siempre el
+    JSON; `respond` (p. ej. la respuesta binaria) lo convierte al formato pedido.
+    """
+    idempotency_key = (idempotency_key or "").strip()
+    if not idempotency_key:
+        result = await fn()
+        return respond(result) if respond else result
+
+    async def _run() -> tuple[str, bytes, bool]:
+        stored = await idempotency.get(idempotency_key)
+        if stored is not None:
+            return stored.fingerprint, stored.body, True
+        body = JSONResponse(content=await fn()).body
+        await idempotency.put(idempotency_key, fingerprint, body)
+        return fingerprint, body, False
+
+    # La llave queda reservada mientras corre: un reintento por timeout no repite fn
+    running = _idempotency_in_flight.get(idempotency_key)
+    if running is not None and running != fingerprint:
+        idempotency.record_mismatch()
+        raise HTTPException(status_code=422, detail="Idempotency-Key ya usada con otra petición")
+    if running is None:
+        _idempotency_in_flight[idempotency_key] = fingerprint
+    try:
+        stored_fingerprint, body, replayed = await idempotency_flight.do(idempotency_key, _run)
+    finally:
+        if running is None:
+            _idempotency_in_flight.pop(idempotency_key, None)
+
+    if stored_fingerprint != fingerprint:
+        idempotency.record_mismatch()
+        raise HTTPException(status_code=422, detail="Idempotency-Key ya usada con otra petición")
+    if not (replayed or running is not None):
+        return respond(json.loads(body)) if respond else Response(content=body, media_type="application/json")
+    idempotency.record_replay()
+    if respond:
+        response = respond(json.loads(body))
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+    return Response(content=body, media_type="application/json", headers={"Idempotent-Replayed": "true"})
+
 @app.post("/checkin")
-def checkin(req: TicketReq):
+async def checkin(req: TicketReq, idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+                  accept: str | None = Header(default=None),
+                  if_none_match: str | None = Header(default=None, alias="If-None-Match")):
     ticket_id = (req.ticketId or "").strip()
     if not ticket_id:
         raise HTTPException(status_code=400, detail="ticketId requerido")
 
+    signed = _verify_signed(ticket_id)
+    if signed is not None:
+        ticket_id = signed.ticket_id
+
+    return await _idempotent(
+        idempotency_key, ticket_id,
+        lambda: _coalesced_checkin(ticket_id, signed),
+        (lambda result: _pdf_response(result, if_none_match)) if wants_pdf(accept) else None,
+    )
+
+async def _coalesced_checkin(ticket_id: str, signed: SignedTicket | None) -> dict:
+    """
+    Dobles taps de confirmar comparten lookup, update y PDF. Solo el tap que
+    hizo el check-in lo ve como nuevo: a los demás les llega ya hecho.
+    """
+    leader = False
+
+    async def run() -> dict:
+        nonlocal leader
+        leader = True
+        return await _checkin_response(ticket_id, signed)
+
+    result = await coalescer.do(("checkin", ticket_id), run)
+    if leader or result["alreadyCheckedIn"]:
+        return result
+    return {**result, "alreadyCheckedIn": True}
+
+async def _checkin_response(ticket_id: str, signed: SignedTicket | None = None) -> dict:
     now = datetime.now(timezone.utc).isoformat()
 
-    # 1) buscar por ticket
-    item = EventUsersRepo.get_by_ticket_id(ticket_id)
+    # 1) buscar por ticket (un QR firmado ya trae los datos)
+    if signed is not None:
+        item = _signed_item(signed)
+    else:
+        try:
+            item = await _lookup_ticket(ticket_id)
+        except ClientError as e:
+            raise _ddb_http_error(e)
     if not item:
         raise HTTPException(status_code=404, detail="ticketId no encontrado")
 
-    user_id = item.get("userId")
-    if not user_id:
-        raise HTTPException(status_code=500, detail="El item no tiene userId")
+    # 2) marcar checkin
+    result = await _mark_checkin(ticket_id, item, now)
+    if result["alreadyCheckedIn"] and "checkedIn" not in item and checkin_journal is None:
+        # El QR no trae la hora del primer check-in: se lee solo en duplicados
+        try:
+            current = await AsyncEventUsersRepo.get_by_ticket_id(ticket_id)
+        except ClientError as e:
+            raise _ddb_http_error(e)
+        if current and current.get("checkedInAt"):
+            result["checkedInAt"] = current["checkedInAt"]
 
-    name = item.get("name") or "UNKNOWN"
-    profession = item.get("profession") or "N/A"
+    result["pdfBase64"] = await run_in_threadpool(
+        build_badge_pdf, ticket_id, result["name"], result["profession"], result["checkedInAt"]
+    )
+    return result
 
-    # 2) marcar checkin (requiere permisos)
+@app.post("/walkin")
+async def walkin(req: WalkinReq, idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+                 accept: str | None = Header(default=None)):
+    """
+    Registro de un walk-in: crea el asistente con ticketId nuevo y check-in
+    en una transacción, y regresa el badge.
+    """
+    name = " ".join((req.name or "").split())
+    profession = " ".join((req.profession or "").split()) or None
+    if not name:
+        raise HTTPException(status_code=400, detail="name requerido")
+    if len(name) > 256 or (profession and len(profession) > 256):
+        raise HTTPException(status_code=400, detail="name/profession exceden 256 caracteres")
+
+    # Sin Idempotency-Key un reintento crea otro asistente
+    return await _idempotent(idempotency_key, f"walkin|{name}|{profession or ''}",
+                             lambda: _walkin_response(name, profession),
+                             (lambda result: _pdf_response(result, None)) if wants_pdf(accept) else None)
+
+async def _walkin_response(name: str, profession: str | None) -> dict:
+    now = datetime.now(timezone.utc).isoformat()
     try:
-        updated, already = EventUsersRepo.mark_checkin(user_id, now)
-        checked_in_at = (updated.get("checkedInAt") if updated else None) or item.get("checkedInAt") or now
+        item = await AsyncEventUsersRepo.create_walkin(name, profession, now)
     except ClientError as e:
-        code = e.response.get("Error", {}).get("Code", "")
-        msg = e.response.get("Error", {}).get("Message", "DynamoDB ClientError")
-        if code in ("AccessDeniedException", "UnrecognizedClientException"):
-            raise HTTPException(status_code=403, detail=msg)
-        raise HTTPException(status_code=500, detail=msg)
+        raise _ddb_http_error(e)
 
-    pdf_b64 = build_badge_pdf(ticket_id, name, profession, checked_in_at)
+    ticket_id = item["ticketId"]
+    record = AttendeeRecord.from_item(item)
+    if ticket_index is not None:
+        ticket_index.put(record)
+    if ticket_filter is not None:
+        ticket_filter.add(ticket_id)
+    if name_search is not None:
+        name_search.put(AttendeeRecord.from_item(item))
 
+    pdf_b64 = await run_in_threadpool(build_badge_pdf, ticket_id, name, profession or "N/A", now)
     return {
         "ok": True,
         "ticketId": ticket_id,
-        "userId": user_id,
+        "userId": item["userId"],
         "name": name,
-        "profession": profession,
+        "profession": profession or "N/A",
         "checkedIn": True,
-        "checkedInAt": checked_in_at,
-        "alreadyCheckedIn": already,
+        "checkedInAt": now,
+        "alreadyCheckedIn": False,
+        "signedTicket": sign_ticket(ticket_id, item["userId"], name, profession) if signing_enabled() else None,
         "contentType": "application/pdf",
         "pdfBase64": pdf_b64,
     }
 
+def _batch_error(ticket_id: str, status: int, detail: str) -> dict:
+    return {"ok": False, "ticketId": ticket_id, "status": status, "detail": detail}
+
+@app.post("/checkin/batch")
+async def checkin_batch(req: BatchTicketReq):
+    """
+    Check-in de varios tickets (grupos, escaneos encolados sin red).
+    Lecturas en lote, updates condicionales y PDFs en paralelo; cada ticket
+    trae su propio resultado con la misma semántica de alreadyCheckedIn.
+    """
+    raw_ids = list(dict.fromkeys(t.strip() for t in req.ticketIds if t and t.strip()))
+    if not raw_ids:
+        raise HTTPException(status_code=400, detail="ticketIds requerido")
+    if len(raw_ids) > BATCH_CHECKIN_MAX:
+        raise HTTPException(status_code=400, detail=f"máximo {BATCH_CHECKIN_MAX} tickets por lote")
+
+    now = datetime.now(timezone.utc).isoformat()
+
+    # 1) resolver: QR firmados y el índice en memoria primero, el resto en una lectura por lote
+    items: dict[str, dict] = {}
+    invalid: dict[str, dict] = {}
+    ticket_ids: list[str] = []
+    for raw in raw_ids:
+        try:
+            signed = _verify_signed(raw)
+        except HTTPException as e:
+            invalid[raw] = _batch_error(raw, e.status_code, e.detail)
+            signed = None
+        if signed is not None:
+            items[signed.ticket_id] = _signed_item(signed)
+        ticket_ids.append(signed.ticket_id if signed is not None else raw)
+    ticket_ids = list(dict.fromkeys(ticket_ids))
+
+    for source in (ticket_index, roster_snapshot):
+        if source is None:
+            continue
+        for ticket_id in ticket_ids:
+            rec = None if ticket_id in items or ticket_id in invalid else source.get(ticket_id)
+            if rec is not None:
+                items[ticket_id] = rec.as_item()
+    missing = [t for t in ticket_ids if t not in items and t not in invalid]
+    if ticket_filter is not None:
+        missing = [t for t in missing if ticket_filter.might_contain(t)]
+    if missing:
+        try:
+            fetched = await AsyncEventUsersRepo.get_by_ticket_ids(missing)
+        except ClientError as e:
+            raise _ddb_http_error(e)
+        for ticket_id, item in fetched.items():
+            items[ticket_id] = item
+            if ticket_index is not None:
+                ticket_index.put(AttendeeRecord.from_item(item))
+            if name_search is not None:
+                name_search.put(AttendeeRecord.from_item(item))
+
+    # 2) updates condicionales concurrentes
+    async def _checkin_one(ticket_id: str) -> dict:
+        if ticket_id in invalid:
+            return invalid[ticket_id]
+        item = items.get(ticket_id)
+        if not item:
+            return _batch_error(ticket_id, 404, "ticketId no encontrado")
+        try:
+            return await _mark_checkin(ticket_id, item, now)
+        except HTTPException as e:
+            return _batch_error(ticket_id, e.status_code, e.detail)
+        except AdmissionRejected as e:
+            return _batch_error(ticket_id, 503, str(e))
+
+    results = await asyncio.gather(*(_checkin_one(t) for t in ticket_ids))
+
+    # 3) PDFs en paralelo solo para los exitosos
+    if req.includePdf:
+        ok = [r for r in results if r["ok"]]
+        pdfs = await asyncio.gather(*(
+            run_in_threadpool(build_badge_pdf, r["ticketId"], r["name"], r["profession"], r["checkedInAt"])
+            for r in ok
+        ))
+        for r, pdf_b64 in zip(ok, pdfs):
+            r["pdfBase64"] = pdf_b64
+
+    return {
+        "ok": True,
+        "total": len(results),
+        "checkedIn": sum(1 for r in results if r["ok"] and not r["alreadyCheckedIn"]),
+        "alreadyCheckedIn": sum(1 for r in results if r["ok"] and r["alreadyCheckedIn"]),
+        "failed": sum(1 for r in results if not r["ok"]),
+        "results": results,
+    }
+
 handler = Mangum(app)
@@ -21,6 +21,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
+from utils.render_pool import render_label
+
 from .config import (
     ConnectionType,
     ErrorClass,
@@ -37,7 +39,7 @@ from .models import (
     PrintResult,
     PrintStrategy,
 )
-from .renderer import generate_preview_base64, generate_raster_payload, render_label
+from .renderer import generate_preview_base64, generate_raster_payload
 from .logger import log_job
 
 
@@ -8,6 +8,7 @@ from __future__ import annotations
 import base64
 import io
 import math
+import threading
 from typing import Optional
 
 from PIL import Image, ImageDraw, ImageFont
@@ -70,7 +71,24 @@ def _render_barcode(data: str, width_px: int, height_px: int) -> Image.Image:
 # ── Font helper ───────────────────────────────────────────────────
 
 
+_fonts = threading.local()
+
+
 def _get_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    """
+    Cached per thread: the fit loop asks for every size down to the minimum,
+    and loading a TrueType file each time dominated label rendering.
+    """
+    cache = getattr(_fonts, "cache", None)
+    if cache is None:
+        cache = _fonts.cache = {}
+    font = cache.get((size, bold))
+    if font is None:
+        font = cache[(size, bold)] = _load_font(size, bold)
+    return font
+
+
+def _load_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
     """Try to load a TrueType font; fall back to default."""
     font_names = (
         ["arialbd.ttf", "Arial Bold.ttf"] if bold
@@ -20,6 +20,8 @@ from typing import Optional
 from fastapi import APIRouter
 from pydantic import BaseModel, Field
 
+from utils.render_pool import render_label
+
 from .config import ConnectionType, PrintMode, TCP_DEFAULT_PORT, TCP_TIMEOUT_S
 from .discovery import discover_all, discover_tcp_printer
 from .executor import execute_print
@@ -34,7 +36,7 @@ from .models import (
     PrintResult,
     PrintStrategy,
 )
-from .renderer import generate_preview_base64, render_label
+from .renderer import generate_preview_base64
 
 router = APIRouter(prefix="/printer", tags=["printer"])
 
@@ -0,0 +1,69 @@
+import asyncio
+
+from db.admission import admission
+from db.dynamo import get_executor, prewarm, throttle_retries_owned_by_caller
+from db.hedging import hedged_reader
+from repositories.attendance_repo import AttendanceRepo
+from repositories.event_users_repo import EventUsersRepo
+
+
+async def _run(fn, *args, **kwargs):
+    """
+    Corre una llamada bloqueante de DynamoDB en el executor dedicado,
+    pasando por el control de admisión (cola, tasa, reintentos por throttling).
+    botocore no reintenta el throttling de estas llamadas: lo hace admission.
+    """
+    loop = asyncio.get_running_loop()
+
+    def call():
+        with throttle_retries_owned_by_caller():
+            return fn(*args, **kwargs)
+
+    return await admission.run(lambda: loop.run_in_executor(get_executor(), call))
+
+
+class AsyncEventUsersRepo:
+    """
+    Versión async de EventUsersRepo para los handlers de FastAPI.
+
+    Las llamadas van al executor de db.dynamo (un hilo por conexión del
+    pool) en vez del threadpool de Starlette, así una ráfaga de escaneos no
+    deja sin hilos al resto de la app.
+    """
+
+    @staticmethod
+    async def get_by_ticket_id(ticket_id: str) -> dict | None:
+        if hedged_reader is not None:
+            # Lectura idempotente: si tarda más del umbral se lanza otra igual
+            return await hedged_reader.read(lambda: _run(EventUsersRepo.get_by_ticket_id, ticket_id))
+        return await _run(EventUsersRepo.get_by_ticket_id, ticket_id)
+
+    @staticmethod
+    async def get_by_ticket_ids(ticket_ids: list[str]) -> dict[str, dict]:
+        return await _run(EventUsersRepo.get_by_ticket_ids, ticket_ids)
+
+    @staticmethod
+    async def mark_checkin(user_id: str, now_iso: str, ticket_id: str | None = None,
+                           profession: str | None = None) -> tuple[dict, bool]:
+        return await _run(EventUsersRepo.mark_checkin, user_id, now_iso, ticket_id=ticket_id, profession=profession)
+
+    @staticmethod
+    async def create_walkin(name: str, profession: str | None, now_iso: str) -> dict:
+        return await _run(EventUsersRepo.create_walkin, name, profession, now_iso)
+
+    @staticmethod
+    async def prewarm() -> int:
+        # prewarm() ya reparte el trabajo en el executor; no ocupar uno de sus hilos esperando
+        return await asyncio.to_thread(prewarm)
+
+
+class AsyncAttendanceRepo:
+    """Versión async de AttendanceRepo (mismo executor)."""
+
+    @staticmethod
+    async def get_stats() -> dict:
+        return await _run(AttendanceRepo.get_stats)
+
+    @staticmethod
+    async def list_checked_in(limit: int = 50, cursor: str | None = None) -> tuple[list[dict], str | None]:
+        return await _run(AttendanceRepo.list_checked_in, limit, cursor)
@@ -0,0 +1,152 @@
+import base64
+import json
+import os
+import random
+import time
+
+from db.codec import decode_item
+from db.dynamo import TABLE_NAME, get_client
+
+# Contadores + índice disperso de asistentes con check-in (ver mark_checkin)
+ATTENDANCE_TRACKING_ENABLED = os.getenv("ATTENDANCE_TRACKING_ENABLED", "false").lower() in ("1", "true", "yes")
+CHECKED_IN_GSI = os.getenv("CHECKED_IN_GSI_NAME", "CheckedInIndex")
+CHECKED_IN_PAGE_MAX = int(os.getenv("CHECKED_IN_PAGE_MAX", "500"))
+# Cada check-in suma en un shard al azar: las mesas no se pelean por un solo item
+ATTENDANCE_COUNTER_SHARDS = max(1, min(100, int(os.getenv("ATTENDANCE_COUNTER_SHARDS", "8"))))
+
+# Solo los usuarios con check-in llevan este atributo: el GSI queda disperso
+CHECKED_IN_KEY_ATTR = "checkedInKey"
+CHECKED_IN_KEY = "CHECKEDIN"
+
+# Items de contadores dentro de EventUsers (excluidos de los Scan)
+STATS_PREFIX = "STATS#"
+_PROFESSION_PREFIX = "profession#"
+_HOUR_PREFIX = "hour#"
+
+
+def profession_label(profession: str | None) -> str:
+    return (profession or "").strip() or "N/A"
+
+
+def hour_bucket(now_iso: str) -> str:
+    """'2026-03-15T09:30:00+00:00' → '2026-03-15T09' (hora UTC)."""
+    return now_iso[:13]
+
+
+def stats_key(shard: int) -> dict:
+    """Llave del shard `shard` de los contadores (STATS#attendance#<n>)."""
+    return {"userId": {"S": f"{STATS_PREFIX}attendance#{shard}"}}
+
+
+def counter_update(profession: str | None, now_iso: str) -> dict:
+    """
+    Update (para TransactWriteItems) que suma 1 al total, a la profesión y
+    a la hora del check-in en un shard al azar. ADD crea los atributos si no
+    existen.
+    """
+    return {
+        "Update": {
+            "TableName": TABLE_NAME,
+            "Key": stats_key(random.randrange(ATTENDANCE_COUNTER_SHARDS)),
+            "UpdateExpression": "ADD #total :one, #prof :one, #hour :one",
+            "ExpressionAttributeNames": {
+                "#total": "total",
+                "#prof": _PROFESSION_PREFIX + profession_label(profession),
+                "#hour": _HOUR_PREFIX + hour_bucket(now_iso),
+            },
+            "ExpressionAttributeValues": {":one": {"N": "1"}},
+        }
+    }
+
+
+def parse_counters(items: list[dict]) -> dict:
+    """Shards de contadores (ya decodificados) → respuesta de /stats."""
+    total = 0
+    by_profession: dict[str, int] = {}
+    by_hour: dict[str, int] = {}
+    for item in items:
+        total += int(item.get("total", 0))
+        for name, value in item.items():
+            if name.startswith(_PROFESSION_PREFIX):
+                key = name[len(_PROFESSION_PREFIX):]
+                by_profession[key] = by_profession.get(key, 0) + int(value)
+            elif name.startswith(_HOUR_PREFIX):
+                key = name[len(_HOUR_PREFIX):]
+                by_hour[key] = by_hour.get(key, 0) + int(value)
+    return {
+        "checkedIn": total,
+        "byProfession": dict(sorted(by_profession.items(), key=lambda kv: -kv[1])),
+        "byHour": dict(sorted(by_hour.items())),
+    }
+
+
+def encode_cursor(last_key: dict | None) -> str | None:
+    if not last_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_key, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Lanza ValueError si el cursor no es válido."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception as e:
+        raise ValueError("cursor inválido") from e
+    if not isinstance(key, dict):
+        raise ValueError("cursor inválido")
+    return key
+
+
+class AttendanceRepo:
+
+    @staticmethod
+    def get_stats() -> dict:
+        """
+        Suma los shards de contadores: un BatchGetItem sin importar el tamaño
+        del roster.
+        Requiere dynamodb:BatchGetItem
+        """
+        client = get_client()
+        request = {TABLE_NAME: {"Keys": [stats_key(n) for n in range(ATTENDANCE_COUNTER_SHARDS)],
+                                "ConsistentRead": True}}
+        items = []
+        for attempt in range(6):
+            resp = client.batch_get_item(RequestItems=request)
+            items += [decode_item(raw) for raw in resp.get("Responses", {}).get(TABLE_NAME, [])]
+            request = resp.get("UnprocessedKeys") or {}
+            if not request:
+                break
+            time.sleep(min(0.05 * (2 ** attempt), 1.0))
+        else:
+            raise RuntimeError("BatchGetItem: quedaron contadores sin leer")
+        return parse_counters(items)
+
+    @staticmethod
+    def list_checked_in(limit: int = 50, cursor: str | None = None) -> tuple[list[dict], str | None]:
+        """
+        Página del índice disperso CheckedInIndex, del check-in más reciente
+        al más antiguo. Regresa (items, next_cursor).
+        Requiere dynamodb:Query sobre el GSI
+        """
+        client = get_client()
+        kwargs = {
+            "TableName": TABLE_NAME,
+            "IndexName": CHECKED_IN_GSI,
+            "KeyConditionExpression": "#ck = :ck",
+            "ProjectionExpression": "#uid, #tid, #name, #prof, checkedInAt",
+            "ExpressionAttributeNames": {
+                "#ck": CHECKED_IN_KEY_ATTR,
+                "#uid": "userId",
+                "#tid": "ticketId",
+                "#name": "name",
+                "#prof": "profession",
+            },
+            "ExpressionAttributeValues": {":ck": {"S": CHECKED_IN_KEY}},
+            "ScanIndexForward": False,
+            "Limit": max(1, min(limit, CHECKED_IN_PAGE_MAX)),
+        }
+        if cursor:
+            kwargs["ExclusiveStartKey"] = decode_cursor(cursor)
+        resp = client.query(**kwargs)
+        items = [decode_item(raw) for raw in resp.get("Items", [])]
+        return items, encode_cursor(resp.get("LastEvaluatedKey"))
@@ -0,0 +1,70 @@
+import sys
+
+
+class AttendeeRecord:
+    """
+    Registro compacto de un asistente (solo los campos proyectados).
+
+    Usa __slots__ y strings internados para que un roster de miles de
+    asistentes ocupe poca memoria en los índices en proceso.
+    """
+
+    __slots__ = ("user_id", "ticket_id", "name", "profession", "checked_in", "checked_in_at")
+
+    def __init__(self, user_id: str | None, ticket_id: str, name: str | None,
+                 profession: str | None, checked_in: bool = False, checked_in_at: str | None = None):
+        self.user_id = user_id
+        self.ticket_id = ticket_id
+        self.name = name
+        # Las profesiones se repiten mucho: una sola copia por valor
+        self.profession = sys.intern(profession) if profession else profession
+        self.checked_in = checked_in
+        self.checked_in_at = checked_in_at
+
+    @classmethod
+    def from_item(cls, item: dict) -> "AttendeeRecord":
+        """Construye el registro a partir de un item de DynamoDB."""
+        return cls(
+            user_id=item.get("userId"),
+            ticket_id=item.get("ticketId"),
+            name=item.get("name"),
+            profession=item.get("profession"),
+            checked_in=item.get("checkedIn") is True,
+            checked_in_at=item.get("checkedInAt"),
+        )
+
+    @classmethod
+    def from_ddb(cls, raw: dict) -> "AttendeeRecord":
+        """
+        Construye el registro directo de los AttributeValues del cliente
+        low-level, sin pasar por un dict intermedio.
+        """
+        def _s(attr: str) -> str | None:
+            value = raw.get(attr)
+            return value.get("S") if value else None
+
+        checked_in = raw.get("checkedIn")
+        return cls(
+            user_id=_s("userId"),
+            ticket_id=_s("ticketId"),
+            name=_s("name"),
+            profession=_s("profession"),
+            checked_in=bool(checked_in) and checked_in.get("BOOL") is True,
+            checked_in_at=_s("checkedInAt"),
+        )
+
+    def as_item(self) -> dict:
+        """Regresa el registro con la misma forma que un item de DynamoDB."""
+        item = {
+            "userId": self.user_id,
+            "ticketId": self.ticket_id,
+            "name": self.name,
+            "profession": self.profession,
+            "checkedIn": self.checked_in,
+        }
+        if self.checked_in_at:
+            item["checkedInAt"] = self.checked_in_at
+        return item
+
+    def __repr__(self) -> str:
+        return f"AttendeeRecord(ticket_id={self.ticket_id!r}, user_id={self.user_id!r}, checked_in={self.checked_in})"
@@ -0,0 +1,63 @@
+"""
+Crea los items puntero TICKET#<ticketId> para una tabla EventUsers existente.
+
+Necesario antes de activar TICKET_LOOKUP_MODE=pointer. Es idempotente: se
+puede volver a correr para cubrir registros nuevos. Conviene correrlo antes
+de abrir puertas, porque sobreescribe el estado de check-in del puntero con
+el que lee del usuario.
+
+Uso (desde backend/):
+    python -m repositories.backfill_ticket_pointers --segments 8
+    python -m repositories.backfill_ticket_pointers --dry-run
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from db.dynamo import TABLE_NAME
+from repositories.event_users_repo import EventUsersRepo
+
+_PAGE = 500
+
+
+def _backfill_segment(segment: int, total_segments: int, dry_run: bool) -> tuple[int, int]:
+    seen = written = 0
+    pending: list[dict] = []
+    for item in EventUsersRepo.scan_segment(segment, total_segments):
+        seen += 1
+        if not item.get("ticketId"):
+            continue
+        pending.append(item)
+        if len(pending) >= _PAGE:
+            written += len(pending) if dry_run else EventUsersRepo.put_ticket_pointers(pending)
+            pending = []
+    if pending:
+        written += len(pending) if dry_run else EventUsersRepo.put_ticket_pointers(pending)
+    return seen, written
+
+
+def backfill(segments: int = 4, dry_run: bool = False) -> dict:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        results = list(pool.map(lambda s: _backfill_segment(s, segments, dry_run), range(segments)))
+    return {
+        "table": TABLE_NAME,
+        "scanned": sum(r[0] for r in results),
+        "pointers": sum(r[1] for r in results),
+        "dryRun": dry_run,
+        "elapsedS": round(time.perf_counter() - start, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill de punteros TICKET#<ticketId> en EventUsers")
+    parser.add_argument("--segments", type=int, default=4, help="segmentos del Scan paralelo")
+    parser.add_argument("--dry-run", action="store_true", help="solo cuenta, no escribe")
+    args = parser.parse_args()
+
+    print(backfill(segments=max(1, args.segments), dry_run=args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
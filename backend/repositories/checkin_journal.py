@@ -0,0 +1,237 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from db.admission import AdmissionRejected, is_throttle, is_transaction_conflict
+from repositories import ticket_index
+from repositories.event_users_repo import AttendeeNotFound, EventUsersRepo
+
+CHECKIN_JOURNAL_ENABLED = os.getenv("CHECKIN_JOURNAL_ENABLED", "false").lower() in ("1", "true", "yes")
+CHECKIN_JOURNAL_PATH = os.getenv("CHECKIN_JOURNAL_PATH", "checkin_journal.db")
+CHECKIN_SYNC_INTERVAL_S = float(os.getenv("CHECKIN_SYNC_INTERVAL_S", "2"))
+CHECKIN_SYNC_BATCH = int(os.getenv("CHECKIN_SYNC_BATCH", "25"))
+CHECKIN_SYNC_WORKERS = int(os.getenv("CHECKIN_SYNC_WORKERS", "8"))
+# Intentos con error no reintentable antes de mandar la fila a 'failed'
+CHECKIN_SYNC_MAX_ATTEMPTS = int(os.getenv("CHECKIN_SYNC_MAX_ATTEMPTS", "3"))
+
+# Estados de una fila del journal
+PENDING = "pending"
+SYNCED = "synced"
+CONFLICT = "conflict"   # DynamoDB ya lo tenía marcado (otra mesa llegó primero)
+NOT_FOUND = "not_found" # el usuario ya no existe (QR firmado de un asistente borrado)
+FAILED = "failed"       # error no reintentable CHECKIN_SYNC_MAX_ATTEMPTS veces; queda para revisión
+
+# Errores de DynamoDB pasajeros además del throttling
+_TRANSIENT_CODES = ("InternalServerError", "ServiceUnavailable", "TransactionConflictException")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkins (
+    ticket_id      TEXT PRIMARY KEY,
+    user_id        TEXT NOT NULL,
+    checked_in_at  TEXT NOT NULL,
+    profession     TEXT,
+    status         TEXT NOT NULL DEFAULT 'pending',
+    attempts       INTEGER NOT NULL DEFAULT 0,
+    created_at     REAL NOT NULL,
+    synced_at      REAL,
+    last_error     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_checkins_status ON checkins (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_checkins_pending ON checkins (status, attempts, created_at);
+"""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Throttling, red o falla pasajera de DynamoDB: la fila sigue pendiente."""
+    if isinstance(error, (AdmissionRejected, BotoCoreError, ConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, ClientError):
+        return (is_throttle(error) or is_transaction_conflict(error)
+                or error.response.get("Error", {}).get("Code") in _TRANSIENT_CODES)
+    return False
+
+
+class CheckinJournal:
+    """
+    Journal local (SQLite en modo WAL) de check-ins.
+
+    record() acepta el check-in en disco local sin tocar la red; un hilo de
+    fondo lo replica a DynamoDB por lotes con el mismo UpdateItem
+    condicional. Si DynamoDB ya lo tenía marcado la fila queda como
+    'conflict' (se respeta el estado remoto); si el usuario ya no existe,
+    como 'not_found'. Los errores reintentables dejan la fila pendiente; los
+    demás la mandan a 'failed' tras max_attempts intentos.
+    """
+
+    def __init__(self, path: str = CHECKIN_JOURNAL_PATH, interval_s: float = CHECKIN_SYNC_INTERVAL_S,
+                 batch_size: int = CHECKIN_SYNC_BATCH, workers: int = CHECKIN_SYNC_WORKERS,
+                 max_attempts: int = CHECKIN_SYNC_MAX_ATTEMPTS):
+        self.path = path
+        self.interval_s = interval_s
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.last_sync_at: float | None = None
+        self.last_error: str | None = None
+
+    # ── Escritura local ───────────────────────────────────────────
+
+    def record(self, ticket_id: str, user_id: str, checked_in_at: str,
+               profession: str | None = None) -> tuple[str, bool]:
+        """
+        Registra el check-in. Regresa (checked_in_at, already_checked_in);
+        si el ticket ya estaba en el journal conserva la hora original.
+        """
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO checkins (ticket_id, user_id, checked_in_at, profession, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (ticket_id, user_id, checked_in_at, profession, time.time()),
+            )
+            if cur.rowcount == 1:
+                self._wake.set()
+                return checked_in_at, False
+            row = self._conn.execute(
+                "SELECT checked_in_at FROM checkins WHERE ticket_id = ?", (ticket_id,)
+            ).fetchone()
+        return row[0], True
+
+    def get(self, ticket_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ticket_id, user_id, checked_in_at, status, attempts FROM checkins WHERE ticket_id = ?",
+                (ticket_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("ticketId", "userId", "checkedInAt", "status", "attempts"), row))
+
+    # ── Sincronización ────────────────────────────────────────────
+
+    def _pending(self, limit: int) -> list[tuple[str, str, str, str | None]]:
+        # Menos intentos primero: las filas que siguen fallando no tapan a las nuevas
+        with self._lock:
+            return self._conn.execute(
+                "SELECT ticket_id, user_id, checked_in_at, profession FROM checkins WHERE status = ? "
+                "ORDER BY attempts, created_at LIMIT ?",
+                (PENDING, limit),
+            ).fetchall()
+
+    def _sync_one(self, row: tuple[str, str, str, str | None]) -> tuple[str, str, str | None, bool]:
+        ticket_id, user_id, checked_in_at, profession = row
+        try:
+            _, already = EventUsersRepo.mark_checkin(user_id, checked_in_at, ticket_id=ticket_id,
+                                                     profession=profession)
+            return ticket_id, CONFLICT if already else SYNCED, None, False
+        except AttendeeNotFound:
+            return ticket_id, NOT_FOUND, None, False
+        except Exception as e:
+            return ticket_id, PENDING, str(e), is_retryable(e)
+
+    def sync_once(self) -> int:
+        """Replica un lote de pendientes. Regresa cuántas filas salieron de pending."""
+        rows = self._pending(self.batch_size)
+        if not rows:
+            return 0
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(rows)), thread_name_prefix="journal-sync") as pool:
+            results = list(pool.map(self._sync_one, rows))
+
+        now = time.time()
+        done = 0
+        errors = []
+        with self._lock:
+            for ticket_id, status, error, retryable in results:
+                if status == PENDING:
+                    errors.append(error)
+                    self._conn.execute(
+                        "UPDATE checkins SET attempts = attempts + 1, last_error = ?, "
+                        "status = CASE WHEN ? OR attempts + 1 < ? THEN status ELSE ? END WHERE ticket_id = ?",
+                        (error, retryable, self.max_attempts, FAILED, ticket_id),
+                    )
+                    row = self._conn.execute("SELECT status FROM checkins WHERE ticket_id = ?", (ticket_id,)).fetchone()
+                    if row[0] == FAILED:
+                        done += 1
+                        print(f"[checkin-journal] {ticket_id} pasa a failed: {error}")
+                else:
+                    done += 1
+                    self._conn.execute(
+                        "UPDATE checkins SET status = ?, synced_at = ?, last_error = NULL WHERE ticket_id = ?",
+                        (status, now, ticket_id),
+                    )
+        self.last_sync_at = now
+        self.last_error = errors[-1] if errors else None
+        return done
+
+    def _sync_loop(self) -> None:
+        backoff = self.interval_s
+        while not self._stop.is_set():
+            self._wake.wait(backoff)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                # Vaciar el backlog mientras haya avance
+                while self.sync_once() > 0 and not self._stop.is_set():
+                    pass
+                backoff = self.interval_s if self.last_error is None else min(backoff * 2, 60)
+            except Exception as e:
+                self.last_error = str(e)
+                backoff = min(backoff * 2, 60)
+                print(f"[checkin-journal] sync falló: {e}")
+
+    def start_sync(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sync_loop, name="checkin-journal-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    # ── Métricas ──────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM checkins GROUP BY status").fetchall())
+            oldest = self._conn.execute(
+                "SELECT MIN(created_at) FROM checkins WHERE status = ?", (PENDING,)
+            ).fetchone()[0]
+        return {
+            "path": self.path,
+            "backlog": counts.get(PENDING, 0),
+            "synced": counts.get(SYNCED, 0),
+            "conflicts": counts.get(CONFLICT, 0),
+            "notFound": counts.get(NOT_FOUND, 0),
+            "failed": counts.get(FAILED, 0),
+            "lagS": round(time.time() - oldest, 1) if oldest else 0.0,
+            "lastSyncAt": self.last_sync_at,
+            "lastError": self.last_error,
+        }
+
+
+def load_checkin_journal() -> CheckinJournal | None:
+    """Abre el journal y arranca el sync si CHECKIN_JOURNAL_ENABLED está activo."""
+    if not CHECKIN_JOURNAL_ENABLED:
+        return None
+    if not ticket_index.TICKET_INDEX_ENABLED:
+        # Sin índice cada check-in busca el ticket en DynamoDB: sin red falla igual
+        print("[checkin-journal] TICKET_INDEX_ENABLED está apagado: los check-ins sin red no van a resolver tickets")
+    journal = CheckinJournal()
+    journal.start_sync()
+    return journal
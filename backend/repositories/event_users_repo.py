@@ -1,52 +1,451 @@
 import os
-from boto3.dynamodb.conditions import Key
+import random
+import secrets
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
 from botocore.exceptions import ClientError
 
-from db.dynamo import get_table
+from db.codec import decode_item, serialize_item
+from repositories.attendee import AttendeeRecord
+from repositories import attendance_repo
+from repositories.attendance_repo import CHECKED_IN_KEY, CHECKED_IN_KEY_ATTR, STATS_PREFIX, counter_update
+from db.dynamo import TABLE_NAME, get_client
 
 TICKET_GSI = os.getenv("TICKET_GSI_NAME", "TicketIdIndex")
 
+# "gsi": Query al TicketIdIndex (eventualmente consistente)
+# "pointer": GetItem fuertemente consistente sobre items puntero TICKET#<ticketId>
+TICKET_LOOKUP_MODE = os.getenv("TICKET_LOOKUP_MODE", "gsi").lower()
+# En modo pointer, si el puntero aún no existe se intenta el GSI
+TICKET_POINTER_FALLBACK = os.getenv("TICKET_POINTER_FALLBACK", "true").lower() in ("1", "true", "yes")
+TICKET_POINTER_PREFIX = "TICKET#"
+# Lecturas en paralelo para lotes (Query al GSI por ticket)
+BATCH_READ_WORKERS = int(os.getenv("BATCH_READ_WORKERS", "16"))
+_BATCH_GET_MAX_KEYS = 100
+_BATCH_WRITE_MAX_ITEMS = 25
+_BATCH_RETRIES = 5
+_WALKIN_ID_ATTEMPTS = 3
+# Check-ins simultáneos que tocan el mismo shard de contadores se cancelan con TransactionConflict
+_TRANSACT_CONFLICT_RETRIES = 4
+
+# Atributos que usan /badge y /checkin
+PROJECTION = "#uid, #tid, #name, #prof, checkedIn, checkedInAt"
+PROJECTION_NAMES = {
+    "#uid": "userId",
+    "#tid": "ticketId",
+    "#name": "name",
+    "#prof": "profession",
+}
+
+# El puntero NO lleva atributo ticketId para no aparecer en el TicketIdIndex
+POINTER_PROJECTION = "ownerUserId, #name, #prof, checkedIn, checkedInAt"
+POINTER_PROJECTION_NAMES = {
+    "#name": "name",
+    "#prof": "profession",
+}
+
+
+class AttendeeNotFound(LookupError):
+    """El check-in apunta a un usuario que ya no existe (p. ej. QR firmado de un borrado)."""
+
+
+def pointer_key(ticket_id: str) -> dict:
+    return {"userId": f"{TICKET_POINTER_PREFIX}{ticket_id}"}
+
+
+def is_pointer_item(item: dict) -> bool:
+    return str(item.get("userId", "")).startswith(TICKET_POINTER_PREFIX)
+
+
+def pointer_item(item: dict) -> dict:
+    """Item puntero (keyed por ticketId) con copia de los campos del badge."""
+    ptr = {
+        **pointer_key(item["ticketId"]),
+        "ownerUserId": item["userId"],
+        "name": item.get("name"),
+        "profession": item.get("profession"),
+        "checkedIn": item.get("checkedIn") is True,
+    }
+    if item.get("checkedInAt"):
+        ptr["checkedInAt"] = item["checkedInAt"]
+    return {k: v for k, v in ptr.items() if v is not None}
+
+
+def _item_from_pointer(ticket_id: str, ptr: dict) -> dict:
+    item = {
+        "userId": ptr.get("ownerUserId"),
+        "ticketId": ticket_id,
+        "name": ptr.get("name"),
+        "profession": ptr.get("profession"),
+        "checkedIn": ptr.get("checkedIn") is True,
+    }
+    if ptr.get("checkedInAt"):
+        item["checkedInAt"] = ptr["checkedInAt"]
+    return item
+
+
+def new_ticket_id(now_iso: str) -> str:
+    """TKT-<año>-<8 base36 del tiempo>-<8 hex aleatorios>, como los de la boletera."""
+    moment = datetime.fromisoformat(now_iso)
+    stamp, digits = int(moment.timestamp() * 1000), ""
+    while stamp:
+        stamp, r = divmod(stamp, 36)
+        digits = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"[r] + digits
+    return f"TKT-{moment.year}-{digits[-8:]}-{secrets.token_hex(4).upper()}"
+
+
+def _user_checkin_update(user_id: str, now_iso: str) -> dict:
+    """Update condicional del usuario; también lo agrega al índice disperso."""
+    expression = "SET checkedIn = :true, checkedInAt = :now"
+    values = {":true": {"BOOL": True}, ":false": {"BOOL": False}, ":now": {"S": now_iso}}
+    if attendance_repo.ATTENDANCE_TRACKING_ENABLED:
+        expression += f", {CHECKED_IN_KEY_ATTR} = :ck"
+        values[":ck"] = {"S": CHECKED_IN_KEY}
+    return {
+        "Update": {
+            "TableName": TABLE_NAME,
+            "Key": {"userId": {"S": user_id}},
+            "UpdateExpression": expression,
+            # Sin attribute_exists un usuario borrado se re-crearía como item fantasma
+            "ConditionExpression": "attribute_exists(userId) AND (attribute_not_exists(checkedIn) OR checkedIn = :false)",
+            "ExpressionAttributeValues": values,
+            # El item viejo distingue "ya estaba marcado" de "no existe"
+            "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+        }
+    }
+
+
+def _pointer_checkin_update(ticket_id: str, now_iso: str) -> dict:
+    return {
+        "Update": {
+            "TableName": TABLE_NAME,
+            "Key": serialize_item(pointer_key(ticket_id)),
+            "UpdateExpression": "SET checkedIn = :true, checkedInAt = :now",
+            "ConditionExpression": "attribute_exists(ownerUserId)",
+            "ExpressionAttributeValues": {":true": {"BOOL": True}, ":now": {"S": now_iso}},
+        }
+    }
+
+
+def _transact_write(client, transact_items: list[dict]) -> None:
+    """TransactWriteItems; reintenta con backoff si se canceló solo por TransactionConflict."""
+    for attempt in range(_TRANSACT_CONFLICT_RETRIES + 1):
+        try:
+            client.transact_write_items(TransactItems=transact_items)
+            return
+        except client.exceptions.TransactionCanceledException as e:
+            reasons = [r.get("Code") for r in e.response.get("CancellationReasons", [])]
+            if ("TransactionConflict" not in reasons or "ConditionalCheckFailed" in reasons
+                    or attempt == _TRANSACT_CONFLICT_RETRIES):
+                raise
+        time.sleep(random.uniform(0, min(0.025 * 2 ** attempt, 0.5)))
+
+
 class EventUsersRepo:
+    # Todas las llamadas usan el cliente low-level compartido (thread-safe)
+    # y el codec de db.codec, no el resource Table.
+
     @staticmethod
     def get_by_ticket_id(ticket_id: str) -> dict | None:
-        table = get_table()
+        if TICKET_LOOKUP_MODE == "pointer":
+            item = EventUsersRepo.get_by_ticket_pointer(ticket_id)
+            if item or not TICKET_POINTER_FALLBACK:
+                return item
+        return EventUsersRepo._query_ticket_gsi(ticket_id)
+
+    @staticmethod
+    def _query_ticket_gsi(ticket_id: str) -> dict | None:
+        client = get_client()
 
-        resp = table.query(
+        resp = client.query(
+            TableName=TABLE_NAME,
             IndexName=TICKET_GSI,
-            KeyConditionExpression=Key("ticketId").eq(ticket_id),
-            ProjectionExpression="#uid, #tid, #name, #prof, checkedIn, checkedInAt",
-            ExpressionAttributeNames={
-                "#uid": "userId",
-                "#tid": "ticketId",
-                "#name": "name",
-                "#prof": "profession",
-            },
+            KeyConditionExpression="#tid = :tid",
+            ProjectionExpression=PROJECTION,
+            ExpressionAttributeNames=PROJECTION_NAMES,
+            ExpressionAttributeValues={":tid": {"S": ticket_id}},
         )
 
         items = resp.get("Items", [])
-        return items[0] if items else None
+        return decode_item(items[0]) if items else None
+
+    @staticmethod
+    def get_by_ticket_pointer(ticket_id: str) -> dict | None:
+        """
+        Lectura puntual y fuertemente consistente del puntero TICKET#<ticketId>.
+        Requiere dynamodb:GetItem
+        """
+        client = get_client()
+        resp = client.get_item(
+            TableName=TABLE_NAME,
+            Key=serialize_item(pointer_key(ticket_id)),
+            ConsistentRead=True,
+            ProjectionExpression=POINTER_PROJECTION,
+            ExpressionAttributeNames=POINTER_PROJECTION_NAMES,
+        )
+        ptr = resp.get("Item")
+        return _item_from_pointer(ticket_id, decode_item(ptr)) if ptr else None
+
+    @staticmethod
+    def get_by_ticket_ids(ticket_ids: list[str]) -> dict[str, dict]:
+        """
+        Resuelve varios tickets a la vez. Regresa {ticketId: item} solo con
+        los encontrados. En modo pointer usa BatchGetItem (consistente); en
+        modo gsi, o para punteros faltantes, lanza los Query en paralelo.
+        """
+        ticket_ids = list(dict.fromkeys(t for t in ticket_ids if t))
+        found: dict[str, dict] = {}
+        pending = ticket_ids
+
+        if TICKET_LOOKUP_MODE == "pointer":
+            found = EventUsersRepo._batch_get_pointers(ticket_ids)
+            pending = [t for t in ticket_ids if t not in found] if TICKET_POINTER_FALLBACK else []
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(BATCH_READ_WORKERS, len(pending))) as pool:
+                for ticket_id, item in zip(pending, pool.map(EventUsersRepo._query_ticket_gsi, pending)):
+                    if item:
+                        found[ticket_id] = item
+        return found
 
     @staticmethod
-    def mark_checkin(user_id: str, now_iso: str) -> tuple[dict, bool]:
+    def _batch_get_pointers(ticket_ids: list[str]) -> dict[str, dict]:
         """
-        Regresa: (updated_item, already_checked_in)
+        BatchGetItem de punteros en bloques de 100, reintentando UnprocessedKeys.
+        Requiere dynamodb:BatchGetItem
+        """
+        client = get_client()
+        found: dict[str, dict] = {}
+        for i in range(0, len(ticket_ids), _BATCH_GET_MAX_KEYS):
+            request = {
+                TABLE_NAME: {
+                    "Keys": [serialize_item(pointer_key(t)) for t in ticket_ids[i:i + _BATCH_GET_MAX_KEYS]],
+                    "ConsistentRead": True,
+                    "ProjectionExpression": "#uid, " + POINTER_PROJECTION,
+                    "ExpressionAttributeNames": {"#uid": "userId", **POINTER_PROJECTION_NAMES},
+                }
+            }
+            for attempt in range(_BATCH_RETRIES + 1):
+                resp = client.batch_get_item(RequestItems=request)
+                for raw in resp.get("Responses", {}).get(TABLE_NAME, []):
+                    ptr = decode_item(raw)
+                    ticket_id = ptr["userId"][len(TICKET_POINTER_PREFIX):]
+                    found[ticket_id] = _item_from_pointer(ticket_id, ptr)
+                request = resp.get("UnprocessedKeys") or {}
+                if not request:
+                    break
+                time.sleep(min(0.05 * (2 ** attempt), 1.0))
+            else:
+                raise RuntimeError("BatchGetItem: quedaron llaves sin procesar")
+        return found
+
+    @staticmethod
+    def scan_segment(segment: int, total_segments: int):
+        """
+        Itera los items de un segmento de un Scan paralelo, página por página.
+        Los items puntero se excluyen.
+        Requiere dynamodb:Scan
+        """
+        for raw in EventUsersRepo._scan_segment_raw(segment, total_segments):
+            yield decode_item(raw)
+
+    @staticmethod
+    def scan_segment_records(segment: int, total_segments: int):
+        """Como scan_segment pero decodifica directo a AttendeeRecord."""
+        for raw in EventUsersRepo._scan_segment_raw(segment, total_segments):
+            yield AttendeeRecord.from_ddb(raw)
+
+    @staticmethod
+    def scan_segment_pages(segment: int, total_segments: int, checked_in_only: bool = False):
+        """
+        Itera las páginas (listas de items decodificados) de un segmento.
+        Con checked_in_only el filtro se aplica en DynamoDB.
+        Requiere dynamodb:Scan
+        """
+        for page in EventUsersRepo._scan_segment_raw_pages(segment, total_segments, checked_in_only):
+            yield [decode_item(raw) for raw in page]
+
+    @staticmethod
+    def _scan_segment_raw(segment: int, total_segments: int):
+        for page in EventUsersRepo._scan_segment_raw_pages(segment, total_segments):
+            yield from page
+
+    @staticmethod
+    def _scan_segment_raw_pages(segment: int, total_segments: int, checked_in_only: bool = False):
+        client = get_client()
+        # Sin punteros ni el item de contadores
+        filter_expression = "NOT begins_with(#uid, :ptr) AND NOT begins_with(#uid, :stats)"
+        values = {":ptr": {"S": TICKET_POINTER_PREFIX}, ":stats": {"S": STATS_PREFIX}}
+        if checked_in_only:
+            filter_expression += " AND checkedIn = :true"
+            values[":true"] = {"BOOL": True}
+        kwargs = {
+            "TableName": TABLE_NAME,
+            "Segment": segment,
+            "TotalSegments": total_segments,
+            "ProjectionExpression": PROJECTION,
+            "ExpressionAttributeNames": PROJECTION_NAMES,
+            "FilterExpression": filter_expression,
+            "ExpressionAttributeValues": values,
+        }
+        while True:
+            resp = client.scan(**kwargs)
+            yield resp.get("Items", [])
+            last_key = resp.get("LastEvaluatedKey")
+            if not last_key:
+                return
+            kwargs["ExclusiveStartKey"] = last_key
+
+    @staticmethod
+    def mark_checkin(user_id: str, now_iso: str, ticket_id: str | None = None,
+                     profession: str | None = None) -> tuple[dict, bool]:
+        """
+        Regresa: (updated_item, already_checked_in); AttendeeNotFound si el
+        usuario ya no existe.
+        Con ATTENDANCE_TRACKING_ENABLED los contadores se actualizan en la
+        misma transacción, así solo cuentan los check-ins nuevos.
         Requiere dynamodb:UpdateItem
         """
-        table = get_table()
+        extra = [counter_update(profession, now_iso)] if attendance_repo.ATTENDANCE_TRACKING_ENABLED else []
+
+        if TICKET_LOOKUP_MODE == "pointer" and ticket_id:
+            result = EventUsersRepo._transact_checkin([
+                _user_checkin_update(user_id, now_iso),
+                _pointer_checkin_update(ticket_id, now_iso),
+                *extra,
+            ])
+            if result is not None:
+                return result
+
+        if extra:
+            result = EventUsersRepo._transact_checkin([_user_checkin_update(user_id, now_iso), *extra])
+            if result is not None:
+                return result
+
+        client = get_client()
         try:
-            upd = table.update_item(
-                Key={"userId": user_id},
-                UpdateExpression="SET checkedIn = :true, checkedInAt = :now",
-                ConditionExpression="attribute_not_exists(checkedIn) OR checkedIn = :false",
-                ExpressionAttributeValues={
-                    ":true": True,
-                    ":false": False,
-                    ":now": now_iso
-                },
+            upd = client.update_item(
+                **_user_checkin_update(user_id, now_iso)["Update"],
                 ReturnValues="ALL_NEW",
             )
-            return upd.get("Attributes", {}), False
-        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            return decode_item(upd.get("Attributes", {})), False
+        except client.exceptions.ConditionalCheckFailedException as e:
+            if not e.response.get("Item"):
+                raise AttendeeNotFound(user_id)
             # ya estaba marcado
             # NOTA: aquí no tenemos el item completo, el controller lo puede usar del query
             return {}, True
+
+    @staticmethod
+    def _transact_checkin(transact_items: list[dict]) -> tuple[dict, bool] | None:
+        """
+        Marca el usuario (primer item) junto con su puntero y/o los
+        contadores en una sola transacción: el GetItem consistente refleja el
+        check-in de inmediato y los contadores no cuentan dobles.
+        Regresa None si el puntero no existe (el caller hace el update simple).
+        Requiere dynamodb:UpdateItem (TransactWriteItems)
+        """
+        client = get_client()
+        user_id = transact_items[0]["Update"]["Key"]["userId"]["S"]
+        now_iso = transact_items[0]["Update"]["ExpressionAttributeValues"][":now"]["S"]
+        try:
+            _transact_write(client, transact_items)
+            return {"userId": user_id, "checkedIn": True, "checkedInAt": now_iso}, False
+        except client.exceptions.TransactionCanceledException as e:
+            cancellations = e.response.get("CancellationReasons", [])
+            reasons = [r.get("Code") for r in cancellations]
+            if reasons and reasons[0] == "ConditionalCheckFailed":
+                if not cancellations[0].get("Item"):
+                    raise AttendeeNotFound(user_id)
+                # ya estaba marcado
+                return {}, True
+            if "ConditionalCheckFailed" in reasons[1:]:
+                # sin puntero todavía (falta el backfill)
+                return None
+            raise
+
+    @staticmethod
+    def create_walkin(name: str, profession: str | None, now_iso: str) -> dict:
+        """
+        Alta de un walk-in ya con check-in en una sola transacción: el
+        usuario, su puntero TICKET#<ticketId> (attribute_not_exists garantiza
+        que el ticketId es único) y, si aplica, los contadores.
+        Regresa el item creado.
+        Requiere dynamodb:PutItem (TransactWriteItems)
+        """
+        client = get_client()
+        tracking = attendance_repo.ATTENDANCE_TRACKING_ENABLED
+        for _ in range(_WALKIN_ID_ATTEMPTS):
+            item = {
+                "userId": f"walkin-{secrets.token_hex(8)}",
+                "ticketId": new_ticket_id(now_iso),
+                "name": name,
+                "profession": profession,
+                "checkedIn": True,
+                "checkedInAt": now_iso,
+            }
+            item = {k: v for k, v in item.items() if v is not None}
+            stored = {**item, CHECKED_IN_KEY_ATTR: CHECKED_IN_KEY} if tracking else item
+            transact_items = [
+                {"Put": {
+                    "TableName": TABLE_NAME,
+                    "Item": serialize_item(stored),
+                    "ConditionExpression": "attribute_not_exists(userId)",
+                }},
+                {"Put": {
+                    "TableName": TABLE_NAME,
+                    "Item": serialize_item(pointer_item(item)),
+                    "ConditionExpression": "attribute_not_exists(userId)",
+                }},
+            ]
+            if tracking:
+                transact_items.append(counter_update(profession, now_iso))
+            try:
+                _transact_write(client, transact_items)
+                return item
+            except client.exceptions.TransactionCanceledException as e:
+                reasons = [r.get("Code") for r in e.response.get("CancellationReasons", [])]
+                if "ConditionalCheckFailed" not in reasons:
+                    raise
+                # Colisión de ids (muy improbable): se generan otros
+        raise RuntimeError("no se pudo asignar un ticketId único")
+
+    @staticmethod
+    def batch_put(items: list[dict]) -> int:
+        """
+        BatchWriteItem en bloques de 25, reintentando UnprocessedItems.
+        Requiere dynamodb:BatchWriteItem
+        """
+        client = get_client()
+        for i in range(0, len(items), _BATCH_WRITE_MAX_ITEMS):
+            request = {
+                TABLE_NAME: [
+                    {"PutRequest": {"Item": serialize_item(item)}}
+                    for item in items[i:i + _BATCH_WRITE_MAX_ITEMS]
+                ]
+            }
+            for attempt in range(_BATCH_RETRIES + 1):
+                resp = client.batch_write_item(RequestItems=request)
+                request = resp.get("UnprocessedItems") or {}
+                if not request:
+                    break
+                time.sleep(min(0.05 * (2 ** attempt), 1.0))
+            else:
+                raise RuntimeError("BatchWriteItem: quedaron items sin procesar")
+        return len(items)
+
+    @staticmethod
+    def put_ticket_pointers(items: list[dict]) -> int:
+        """
+        Escribe (o sobreescribe) los punteros TICKET#<ticketId> de los items.
+        Requiere dynamodb:BatchWriteItem
+        """
+        # Deduplicado por llave: BatchWriteItem rechaza llaves repetidas
+        pointers = {
+            item["ticketId"]: pointer_item(item)
+            for item in items
+            if item.get("ticketId") and item.get("userId") and not is_pointer_item(item)
+        }
+        return EventUsersRepo.batch_put(list(pointers.values()))
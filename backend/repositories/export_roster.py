@@ -0,0 +1,145 @@
+"""
+Exporta el roster de EventUsers (con checkedIn / checkedInAt) en CSV o NDJSON.
+
+Un hilo por segmento del Scan paralelo deja cada página en una cola
+acotada y el consumidor la serializa en cuanto llega: la memoria no
+depende del tamaño de la tabla. Lo usan GET /export y este CLI.
+
+Uso (desde backend/):
+    python -m repositories.export_roster --format csv --segments 8 -o asistentes.csv
+    python -m repositories.export_roster --format ndjson --checked-in-only > presentes.ndjson
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from repositories.event_users_repo import EventUsersRepo
+
+EXPORT_SEGMENTS = int(os.getenv("EXPORT_SEGMENTS", "8"))
+# Páginas en vuelo por segmento (cada página de Scan pesa hasta 1 MB)
+_PAGES_PER_SEGMENT = 2
+
+EXPORT_COLUMNS = ("userId", "ticketId", "name", "profession", "checkedIn", "checkedInAt")
+EXPORT_FORMATS = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+_DONE = object()
+
+
+def iter_roster_pages(segments: int = EXPORT_SEGMENTS, checked_in_only: bool = False):
+    """
+    Itera páginas de items conforme llegan de los segmentos (sin orden).
+    Si el consumidor deja de iterar (cliente desconectado) los hilos paran
+    en la siguiente página.
+    """
+    segments = max(1, segments)
+    pages: queue.Queue = queue.Queue(maxsize=segments * _PAGES_PER_SEGMENT)
+    stop = threading.Event()
+
+    def _put(value) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(value, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _scan(segment: int) -> None:
+        try:
+            for page in EventUsersRepo.scan_segment_pages(segment, segments, checked_in_only):
+                if page and not _put(page):
+                    return
+        except Exception as e:
+            _put(e)
+        finally:
+            _put(_DONE)
+
+    threads = [
+        threading.Thread(target=_scan, args=(s,), name=f"export-{s}", daemon=True)
+        for s in range(segments)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        pending = segments
+        while pending:
+            page = pages.get()
+            if page is _DONE:
+                pending -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield page
+    finally:
+        stop.set()
+
+
+def _row(item: dict) -> dict:
+    return {
+        "userId": item.get("userId"),
+        "ticketId": item.get("ticketId"),
+        "name": item.get("name"),
+        "profession": item.get("profession"),
+        "checkedIn": item.get("checkedIn") is True,
+        "checkedInAt": item.get("checkedInAt"),
+    }
+
+
+def _csv_row(item: dict) -> dict:
+    """Como en JSON: true/false, no True/False de Python."""
+    row = _row(item)
+    row["checkedIn"] = "true" if row["checkedIn"] else "false"
+    return row
+
+
+def iter_export(fmt: str = "csv", segments: int = EXPORT_SEGMENTS, checked_in_only: bool = False):
+    """Itera bloques de bytes (uno por página) en el formato pedido."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"formato no soportado: {fmt}")
+
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS, lineterminator="\n")
+        writer.writeheader()
+        yield buf.getvalue().encode("utf-8")
+        for page in iter_roster_pages(segments, checked_in_only):
+            buf.seek(0)
+            buf.truncate()
+            writer.writerows(_csv_row(item) for item in page)
+            yield buf.getvalue().encode("utf-8")
+    else:
+        for page in iter_roster_pages(segments, checked_in_only):
+            yield "".join(json.dumps(_row(item), ensure_ascii=False) + "\n" for item in page).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exporta el roster de EventUsers en CSV o NDJSON")
+    parser.add_argument("--format", choices=tuple(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--segments", type=int, default=EXPORT_SEGMENTS, help="segmentos del Scan paralelo")
+    parser.add_argument("--checked-in-only", action="store_true", help="solo asistentes con check-in")
+    parser.add_argument("-o", "--output", help="archivo de salida (default: stdout)")
+    args = parser.parse_args()
+
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    start = time.perf_counter()
+    written = 0
+    try:
+        for chunk in iter_export(args.format, args.segments, args.checked_in_only):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.output:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"[export] {written} bytes en {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os
+import time
+
+from db.dynamo import get_client
+
+# Tabla opcional (PK: idempotencyKey, TTL de DynamoDB sobre expiresAt).
+# Sin ella las llaves solo viven en memoria del proceso.
+IDEMPOTENCY_TABLE = os.getenv("IDEMPOTENCY_TABLE", "")
+
+
+class IdempotencyRepo:
+    @staticmethod
+    def enabled() -> bool:
+        return bool(IDEMPOTENCY_TABLE)
+
+    @staticmethod
+    def get(key: str) -> tuple[str, bytes, int] | None:
+        """
+        Regresa (fingerprint, body, expiresAt) si la llave existe y no ha expirado.
+        Requiere dynamodb:GetItem
+        """
+        resp = get_client().get_item(
+            TableName=IDEMPOTENCY_TABLE,
+            Key={"idempotencyKey": {"S": key}},
+            ConsistentRead=True,
+        )
+        item = resp.get("Item")
+        if not item:
+            return None
+        # El TTL de DynamoDB borra con retraso: se valida aquí también
+        expires_at = int(item["expiresAt"]["N"])
+        if expires_at <= time.time():
+            return None
+        return item["fingerprint"]["S"], item["body"]["B"], expires_at
+
+    @staticmethod
+    def put(key: str, fingerprint: str, body: bytes, ttl_s: float) -> None:
+        """
+        Guarda la respuesta solo si la llave no existe (la primera gana).
+        Requiere dynamodb:PutItem
+        """
+        client = get_client()
+        now = int(time.time())
+        try:
+            client.put_item(
+                TableName=IDEMPOTENCY_TABLE,
+                Item={
+                    "idempotencyKey": {"S": key},
+                    "fingerprint": {"S": fingerprint},
+                    "body": {"B": body},
+                    "expiresAt": {"N": str(now + int(ttl_s))},
+                },
+                ConditionExpression="attribute_not_exists(idempotencyKey) OR expiresAt <= :now",
+                ExpressionAttributeValues={":now": {"N": str(now)}},
+            )
+        except client.exceptions.ConditionalCheckFailedException:
+            pass
@@ -0,0 +1,324 @@
+"""
+Importa asistentes (export de la boletera) a EventUsers.
+
+Lee CSV o NDJSON en streaming, valida cada fila a la forma de EventUsers
+(userId, ticketId, name, profession) y escribe con varios workers de
+BatchWriteItem en paralelo, reintentando UnprocessedItems y con backoff
+ante throttling. Guarda un checkpoint para poder reanudar con --resume.
+
+PutItem reemplaza el item completo: correrlo antes de abrir puertas, un
+re-import durante el evento borraría el estado de check-in.
+
+Uso (desde backend/):
+    python -m repositories.import_attendees registros.csv --workers 16
+    python -m repositories.import_attendees registros.ndjson --resume
+    python -m repositories.import_attendees registros.csv --dry-run --rejects malos.ndjson
+"""
+
+import argparse
+import csv
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+from db.codec import serialize_item
+from db.dynamo import TABLE_NAME, get_client
+from repositories import event_users_repo
+from repositories.attendance_repo import STATS_PREFIX
+from repositories.event_users_repo import TICKET_POINTER_PREFIX, pointer_item
+
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "16"))
+_BATCH_WRITE_MAX_ITEMS = 25
+_MAX_RETRIES = 10
+_THROTTLE_CODES = ("ProvisionedThroughputExceededException", "ThrottlingException", "RequestLimitExceeded")
+_FIELDS = ("userId", "ticketId", "name", "profession")
+_MAX_FIELD_LEN = 256
+
+
+class RowError(ValueError):
+    pass
+
+
+# ── Lectura y validación ──────────────────────────────────────────
+
+def read_rows(path: str, fmt: str | None = None):
+    """Itera (número de fila, dict) sin cargar el archivo completo."""
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "ndjson")
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            for line_no, row in enumerate(csv.DictReader(f), start=1):
+                yield line_no, row
+        else:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    row = e
+                yield line_no, row
+
+
+def validate_row(row) -> dict:
+    """Fila cruda → item de EventUsers. Lanza RowError si no es válida."""
+    if isinstance(row, Exception):
+        raise RowError(f"JSON inválido: {row}")
+    if not isinstance(row, dict):
+        raise RowError("la fila no es un objeto")
+
+    item = {}
+    for field in _FIELDS:
+        value = row.get(field)
+        value = "" if value is None else str(value).strip()
+        if len(value) > _MAX_FIELD_LEN:
+            raise RowError(f"{field} excede {_MAX_FIELD_LEN} caracteres")
+        if value:
+            item[field] = value
+
+    for field in ("userId", "ticketId"):
+        if field not in item:
+            raise RowError(f"{field} requerido")
+    if item["userId"].startswith((TICKET_POINTER_PREFIX, STATS_PREFIX)):
+        raise RowError("userId usa un prefijo reservado")
+    item.setdefault("name", "UNKNOWN")
+    item["checkedIn"] = False
+    return item
+
+
+# ── Escritura ─────────────────────────────────────────────────────
+
+def _backoff(attempt: int) -> None:
+    # Full jitter: los workers no reintentan todos al mismo tiempo
+    time.sleep(random.uniform(0, min(0.05 * (2 ** attempt), 5.0)))
+
+
+def write_chunk(items: list[dict], stats: "ImportStats") -> None:
+    """
+    BatchWriteItem de hasta 25 items; reintenta UnprocessedItems y
+    errores de throttling con backoff exponencial.
+    """
+    client = get_client()
+    request = {TABLE_NAME: [{"PutRequest": {"Item": serialize_item(item)}} for item in items]}
+    for attempt in range(_MAX_RETRIES + 1):
+        try:
+            resp = client.batch_write_item(RequestItems=request)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in _THROTTLE_CODES:
+                raise
+            stats.add(throttled=1)
+            _backoff(attempt)
+            continue
+        request = resp.get("UnprocessedItems") or {}
+        if not request:
+            return
+        stats.add(retried=len(request.get(TABLE_NAME, [])))
+        _backoff(attempt)
+    raise RuntimeError("BatchWriteItem: quedaron items sin procesar")
+
+
+class ImportStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.written = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.retried = 0
+        self.throttled = 0
+        self.started = time.perf_counter()
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for name, n in counts.items():
+                setattr(self, name, getattr(self, name) + n)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = time.perf_counter() - self.started
+            return {
+                "rows": self.rows,
+                "written": self.written,
+                "rejected": self.rejected,
+                "duplicates": self.duplicates,
+                "retried": self.retried,
+                "throttled": self.throttled,
+                "elapsedS": round(elapsed, 2),
+                "rowsPerS": round(self.rows / elapsed, 1) if elapsed else None,
+            }
+
+
+# ── Checkpoint ────────────────────────────────────────────────────
+
+class Checkpoint:
+    """
+    Filas ya confirmadas del archivo de entrada. Los chunks terminan en
+    desorden, así que solo avanza hasta el último chunk contiguo; al
+    reanudar se pueden re-escribir unas filas (PutItem es idempotente).
+    """
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.source_size = os.path.getsize(source)
+        self.rows_done = 0
+        self._lock = threading.Lock()
+        self._done: dict[int, int] = {}   # seq → fila final del chunk
+        self._next_seq = 0
+
+    def load(self) -> int:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return 0
+        if state.get("source") != self.source or state.get("sourceSize") != self.source_size:
+            raise SystemExit(f"[import] el checkpoint {self.path} es de otro archivo; bórralo o usa otro --state")
+        self.rows_done = int(state.get("rowsDone", 0))
+        return self.rows_done
+
+    def complete(self, seq: int, last_row: int) -> None:
+        with self._lock:
+            self._done[seq] = last_row
+            while self._next_seq in self._done:
+                self.rows_done = max(self.rows_done, self._done.pop(self._next_seq))
+                self._next_seq += 1
+
+    def save(self) -> None:
+        with self._lock:
+            state = {"source": self.source, "sourceSize": self.source_size, "rowsDone": self.rows_done}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+
+# ── Pipeline ──────────────────────────────────────────────────────
+
+def import_file(path: str, fmt: str | None = None, workers: int = IMPORT_WORKERS, resume: bool = False,
+                state_path: str | None = None, pointers: bool | None = None, dry_run: bool = False,
+                rejects_path: str | None = None, progress_s: float = 2.0) -> dict:
+    """Importa el archivo y regresa el resumen (mismas llaves que el progreso)."""
+    workers = max(1, workers)
+    if pointers is None:
+        pointers = event_users_repo.TICKET_LOOKUP_MODE == "pointer"
+    checkpoint = Checkpoint(state_path or f"{path}.import-state", path)
+    skip = checkpoint.load() if resume else 0
+
+    stats = ImportStats()
+    chunks: queue.Queue = queue.Queue(maxsize=workers * 4)
+    errors: list[BaseException] = []
+    stop = threading.Event()
+    finished = threading.Event()
+    # Con punteros cada fila son 2 items: chunks de 24 para no partir pares
+    chunk_size = _BATCH_WRITE_MAX_ITEMS - 1 if pointers else _BATCH_WRITE_MAX_ITEMS
+
+    def _worker() -> None:
+        while True:
+            task = chunks.get()
+            if task is None:
+                return
+            seq, last_row, items = task
+            if stop.is_set():
+                continue  # otro worker falló: no se escribe ni avanza el checkpoint
+            try:
+                if not dry_run:
+                    write_chunk(items, stats)
+                stats.add(written=sum(1 for i in items if not i["userId"].startswith(TICKET_POINTER_PREFIX)))
+                checkpoint.complete(seq, last_row)
+            except BaseException as e:  # se reporta al terminar; el checkpoint no avanza
+                errors.append(e)
+                stop.set()
+
+    def _progress() -> None:
+        while not finished.wait(progress_s):
+            print(f"[import] {stats.snapshot()}")
+            if not dry_run:
+                checkpoint.save()
+
+    threads = [threading.Thread(target=_worker, name=f"import-{i}", daemon=True) for i in range(workers)]
+    reporter = threading.Thread(target=_progress, name="import-progress", daemon=True)
+    for t in threads + [reporter]:
+        t.start()
+
+    seen_users: set[str] = set()
+    seen_tickets: set[str] = set()
+    rejects = open(rejects_path, "w", encoding="utf-8") if rejects_path else None
+    batch: list[dict] = []
+    seq = 0
+    row_no = 0
+    try:
+        for row_no, raw in read_rows(path, fmt):
+            if row_no <= skip:
+                continue
+            if stop.is_set():
+                break
+            stats.add(rows=1)
+            try:
+                item = validate_row(raw)
+                if item["userId"] in seen_users or item["ticketId"] in seen_tickets:
+                    stats.add(duplicates=1)
+                    raise RowError("userId o ticketId duplicado en el archivo")
+            except RowError as e:
+                stats.add(rejected=1)
+                if rejects:
+                    rejects.write(json.dumps({"row": row_no, "error": str(e), "data": raw if isinstance(raw, dict) else None},
+                                             ensure_ascii=False) + "\n")
+                continue
+            seen_users.add(item["userId"])
+            seen_tickets.add(item["ticketId"])
+
+            batch.append(item)
+            if pointers:
+                batch.append(pointer_item(item))
+            if len(batch) >= chunk_size:
+                chunks.put((seq, row_no, batch))
+                seq += 1
+                batch = []
+        if batch:
+            chunks.put((seq, row_no, batch))
+    finally:
+        for _ in threads:
+            chunks.put(None)
+        for t in threads:
+            t.join()
+        finished.set()
+        reporter.join()
+        if rejects:
+            rejects.close()
+
+    if not dry_run:
+        checkpoint.save()
+    summary = {**stats.snapshot(), "table": TABLE_NAME, "pointers": pointers, "dryRun": dry_run,
+               "resumedFromRow": skip, "checkpointRow": checkpoint.rows_done}
+    if errors:
+        raise RuntimeError(f"import interrumpido en la fila {checkpoint.rows_done}: {errors[0]}") from errors[0]
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importa asistentes (CSV/NDJSON) a EventUsers")
+    parser.add_argument("path", help="archivo .csv o .ndjson")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="por defecto según la extensión")
+    parser.add_argument("--workers", type=int, default=IMPORT_WORKERS, help="workers de BatchWriteItem en paralelo")
+    parser.add_argument("--resume", action="store_true", help="continúa desde el último checkpoint")
+    parser.add_argument("--state", help="archivo de checkpoint (default: <path>.import-state)")
+    pointer_group = parser.add_mutually_exclusive_group()
+    pointer_group.add_argument("--pointers", dest="pointers", action="store_true", default=None,
+                               help="escribe también los punteros TICKET#<ticketId>")
+    pointer_group.add_argument("--no-pointers", dest="pointers", action="store_false")
+    parser.add_argument("--rejects", help="NDJSON con las filas rechazadas y el motivo")
+    parser.add_argument("--dry-run", action="store_true", help="solo valida, no escribe")
+    args = parser.parse_args()
+
+    print(import_file(args.path, fmt=args.format, workers=args.workers, resume=args.resume,
+                      state_path=args.state, pointers=args.pointers, dry_run=args.dry_run,
+                      rejects_path=args.rejects))
+
+
+if __name__ == "__main__":
+    main()
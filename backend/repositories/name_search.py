@@ -0,0 +1,301 @@
+import heapq
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from repositories.attendee import AttendeeRecord
+from repositories.event_users_repo import EventUsersRepo
+
+NAME_SEARCH_ENABLED = os.getenv("NAME_SEARCH_ENABLED", "false").lower() in ("1", "true", "yes")
+NAME_SEARCH_REFRESH_S = float(os.getenv("NAME_SEARCH_REFRESH_S", "300"))
+NAME_SEARCH_SEGMENTS = int(os.getenv("NAME_SEARCH_SEGMENTS", "4"))
+NAME_SEARCH_MIN_QUERY = 2
+_MIN_WORD_SIMILARITY = 0.4
+# Tope de tickets a puntuar por búsqueda (mantiene la latencia acotada)
+_MAX_CANDIDATES = 100
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(text: str) -> str:
+    """'José  Núñez-Peña' → 'jose nunez pena' (sin acentos, minúsculas)."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", stripped.lower()).strip()
+
+
+def name_trigrams(normalized: str, partial_last: bool = False) -> set[str]:
+    """
+    Trigramas por palabra con relleno "  " al inicio (así un prefijo corto
+    también produce trigramas). Con partial_last la última palabra no se
+    cierra, para buscar mientras se escribe ("mar" ⊂ "maria").
+    """
+    grams: set[str] = set()
+    words = normalized.split()
+    for i, word in enumerate(words):
+        padded = f"  {word}" if partial_last and i == len(words) - 1 else f"  {word} "
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+class NameSearchIndex:
+    """
+    Índice en memoria sobre `name` para buscar asistentes sin QR.
+
+    Los trigramas se indexan sobre el vocabulario de palabras distintas
+    (unos miles aunque el roster sea grande); cada palabra apunta a los
+    tickets que la contienen. Una búsqueda resuelve cada palabra contra el
+    vocabulario (acentos, typos, prefijos) y cruza los conjuntos de
+    tickets. Se construye desde el roster y se actualiza con put() /
+    mark_checked_in().
+    """
+
+    def __init__(self, refresh_s: float = NAME_SEARCH_REFRESH_S, segments: int = NAME_SEARCH_SEGMENTS,
+                 source=None):
+        self.refresh_s = refresh_s
+        self.segments = max(1, segments)
+        # source: callable que regresa los AttendeeRecord (p. ej. del índice de tickets)
+        self._source = source
+        self._lock = threading.Lock()
+        self._records: dict[str, AttendeeRecord] = {}
+        self._words: dict[str, tuple[str, ...]] = {}       # ticketId → palabras normalizadas
+        self._postings: dict[str, set[str]] = {}          # palabra → ticketIds
+        self._word_grams: dict[str, frozenset] = {}       # palabra → trigramas
+        self._grams: dict[str, set[str]] = {}             # trigrama → palabras
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self.searches = 0
+        self.loaded_at: float | None = None
+        self.last_build_ms: float | None = None
+        self.last_error: str | None = None
+
+    # ── Construcción ──────────────────────────────────────────────
+
+    def _scan_records(self) -> list[AttendeeRecord]:
+        def _segment(segment: int) -> list[AttendeeRecord]:
+            return [r for r in EventUsersRepo.scan_segment_records(segment, self.segments) if r.ticket_id]
+
+        with ThreadPoolExecutor(max_workers=self.segments, thread_name_prefix="name-search") as pool:
+            return [r for part in pool.map(_segment, range(self.segments)) for r in part]
+
+    def build(self) -> int:
+        start = time.perf_counter()
+        records = self._source() if self._source else None
+        if records is None:
+            records = self._scan_records()
+
+        fresh = NameSearchIndex(refresh_s=0)
+        for rec in records:
+            fresh._add(rec)
+        with self._lock:
+            # Check-ins locales que el roster leído todavía no trae
+            for ticket_id, old in self._records.items():
+                new = fresh._records.get(ticket_id)
+                if new is not None and old.checked_in and not new.checked_in:
+                    fresh._records[ticket_id] = old
+            self._records, self._words = fresh._records, fresh._words
+            self._postings, self._word_grams, self._grams = fresh._postings, fresh._word_grams, fresh._grams
+            self.loaded_at = time.time()
+            self.last_build_ms = round((time.perf_counter() - start) * 1000, 1)
+            self.last_error = None
+            return len(self._records)
+
+    def _add(self, record: AttendeeRecord) -> None:
+        ticket_id = record.ticket_id
+        self._discard(ticket_id)
+        words = tuple(dict.fromkeys(normalize_name(record.name or "").split()))
+        self._records[ticket_id] = record
+        self._words[ticket_id] = words
+        for word in words:
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = set()
+                grams = self._word_grams[word] = frozenset(name_trigrams(word))
+                for gram in grams:
+                    self._grams.setdefault(gram, set()).add(word)
+            postings.add(ticket_id)
+
+    def _discard(self, ticket_id: str) -> None:
+        self._records.pop(ticket_id, None)
+        for word in self._words.pop(ticket_id, ()):
+            postings = self._postings.get(word)
+            if postings is None:
+                continue
+            postings.discard(ticket_id)
+            if postings:
+                continue
+            # Palabra sin tickets: sale del vocabulario
+            del self._postings[word]
+            for gram in self._word_grams.pop(word, ()):
+                words = self._grams.get(gram)
+                if words is not None:
+                    words.discard(word)
+                    if not words:
+                        del self._grams[gram]
+
+    # ── Altas / cambios incrementales ─────────────────────────────
+
+    def put(self, record: AttendeeRecord) -> None:
+        if not record.ticket_id:
+            return
+        with self._lock:
+            current = self._records.get(record.ticket_id)
+            if current is not None and current.name == record.name:
+                self._records[record.ticket_id] = record
+                return
+            self._add(record)
+
+    def mark_checked_in(self, ticket_id: str, checked_in_at: str) -> None:
+        with self._lock:
+            rec = self._records.get(ticket_id)
+            if rec is not None:
+                rec.checked_in = True
+                rec.checked_in_at = rec.checked_in_at or checked_in_at
+
+    # ── Búsqueda ──────────────────────────────────────────────────
+
+    def _match_word(self, word: str, partial: bool) -> dict[str, float]:
+        """Palabras del vocabulario parecidas a `word` → similitud (0..1)."""
+        grams = name_trigrams(word)
+        hits: Counter = Counter()
+        for gram in grams:
+            words = self._grams.get(gram)
+            if words:
+                hits.update(words)
+        matches = {}
+        for candidate, overlap in hits.items():
+            if candidate == word:
+                sim = 1.0
+            elif partial and candidate.startswith(word):
+                sim = 0.95
+            else:
+                # Jaccard: "garsia" ~ "garcia", pero "ana" no ~ "anastasia"
+                sim = overlap / (len(grams) + len(self._word_grams[candidate]) - overlap)
+            if sim >= _MIN_WORD_SIMILARITY:
+                matches[candidate] = sim
+        return matches
+
+    def _best_candidates(self, candidates: set[str], word_matches: list[dict[str, float]],
+                         per_word: list[set[str]]) -> list[str]:
+        """
+        Búsqueda poco específica ("fer"): en vez de puntuar miles de
+        tickets, toma los de las palabras más parecidas de la palabra más
+        selectiva hasta _MAX_CANDIDATES.
+        """
+        i = min(range(len(per_word)), key=lambda k: len(per_word[k]) or float("inf"))
+        picked: list[str] = []
+        for word, _ in sorted(word_matches[i].items(), key=lambda kv: -kv[1]):
+            for ticket_id in self._postings[word]:
+                if ticket_id in candidates:
+                    picked.append(ticket_id)
+                    if len(picked) >= _MAX_CANDIDATES:
+                        return picked
+        return picked
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        Regresa hasta `limit` asistentes ordenados por score (0..1): el
+        promedio de la mejor similitud de cada palabra buscada dentro del
+        nombre. La última palabra cuenta como prefijo (búsqueda al teclear).
+        """
+        normalized = normalize_name(query)
+        if len(normalized.replace(" ", "")) < NAME_SEARCH_MIN_QUERY:
+            return []
+        query_words = list(dict.fromkeys(normalized.split()))
+
+        with self._lock:
+            self.searches += 1
+            word_matches = [
+                self._match_word(w, partial=(i == len(query_words) - 1))
+                for i, w in enumerate(query_words)
+            ]
+            per_word = [
+                set().union(*(self._postings[m] for m in matches)) if matches else set()
+                for matches in word_matches
+            ]
+            # Primero los que tienen todas las palabras; si no hay, los que tienen alguna
+            candidates = set.intersection(*per_word) if per_word else set()
+            if not candidates:
+                candidates = set().union(*per_word)
+            if len(candidates) > _MAX_CANDIDATES:
+                candidates = self._best_candidates(candidates, word_matches, per_word)
+
+            scored = []
+            by_words: dict[tuple, float] = {}   # nombres repetidos se puntúan una vez
+            n_query = len(query_words)
+            for ticket_id in candidates:
+                words = self._words[ticket_id]
+                score = by_words.get(words)
+                if score is None:
+                    total = 0.0
+                    for matches in word_matches:
+                        total += max([matches.get(w, 0.0) for w in words] or [0.0])
+                    # Desempate: nombres sin palabras de sobra primero
+                    score = total / n_query * (0.9 + 0.1 * n_query / max(len(words), n_query))
+                    by_words[words] = score
+                scored.append((score, ticket_id))
+            top = heapq.nlargest(limit, scored)
+
+            results = []
+            for score, ticket_id in top:
+                rec = self._records[ticket_id]
+                results.append({
+                    "ticketId": rec.ticket_id,
+                    "userId": rec.user_id,
+                    "name": rec.name,
+                    "profession": rec.profession,
+                    "checkedIn": rec.checked_in,
+                    "score": round(score, 3),
+                })
+            return results
+
+    # ── Refresco en segundo plano ─────────────────────────────────
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_s):
+            try:
+                self.build()
+            except Exception as e:  # el índice viejo sigue sirviendo
+                self.last_error = str(e)
+                print(f"[name-search] rebuild falló: {e}")
+
+    def start_refresh(self) -> None:
+        if self.refresh_s <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name="name-search-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "names": len(self._records),
+                "words": len(self._postings),
+                "trigrams": len(self._grams),
+                "searches": self.searches,
+                "loadedAt": self.loaded_at,
+                "lastBuildMs": self.last_build_ms,
+                "lastError": self.last_error,
+            }
+
+
+def load_name_search(source=None) -> NameSearchIndex | None:
+    """Construye el índice al arrancar si NAME_SEARCH_ENABLED está activo."""
+    if not NAME_SEARCH_ENABLED:
+        return None
+    index = NameSearchIndex(source=source)
+    try:
+        index.build()
+    except Exception as e:
+        index.last_error = str(e)
+        print(f"[name-search] carga inicial falló: {e}")
+    index.start_refresh()
+    return index
@@ -0,0 +1,97 @@
+"""
+Reconstruye los contadores de asistencia y el índice disperso CheckedInIndex
+a partir del estado actual de EventUsers.
+
+Necesario al activar ATTENDANCE_TRACKING_ENABLED con check-ins ya hechos.
+Sobreescribe los shards de contadores, así que conviene correrlo sin check-ins
+en curso (antes de abrir puertas o en una pausa).
+
+Uso (desde backend/):
+    python -m repositories.rebuild_attendance --segments 8
+    python -m repositories.rebuild_attendance --dry-run
+"""
+
+import argparse
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from db.codec import serialize_item
+from db.dynamo import TABLE_NAME, get_client
+from repositories.attendance_repo import (
+    ATTENDANCE_COUNTER_SHARDS,
+    CHECKED_IN_KEY,
+    CHECKED_IN_KEY_ATTR,
+    hour_bucket,
+    profession_label,
+    stats_key,
+)
+from repositories.event_users_repo import EventUsersRepo
+
+
+def _rebuild_segment(segment: int, total_segments: int, dry_run: bool) -> tuple[int, Counter, Counter]:
+    client = get_client()
+    seen = 0
+    by_profession: Counter = Counter()
+    by_hour: Counter = Counter()
+    for item in EventUsersRepo.scan_segment(segment, total_segments):
+        seen += 1
+        if item.get("checkedIn") is not True:
+            continue
+        by_profession[profession_label(item.get("profession"))] += 1
+        if item.get("checkedInAt"):
+            by_hour[hour_bucket(item["checkedInAt"])] += 1
+        if not dry_run:
+            client.update_item(
+                TableName=TABLE_NAME,
+                Key={"userId": {"S": item["userId"]}},
+                UpdateExpression="SET #ck = :ck",
+                ExpressionAttributeNames={"#ck": CHECKED_IN_KEY_ATTR},
+                ExpressionAttributeValues={":ck": {"S": CHECKED_IN_KEY}},
+            )
+    return seen, by_profession, by_hour
+
+
+def rebuild(segments: int = 4, dry_run: bool = False) -> dict:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        results = list(pool.map(lambda s: _rebuild_segment(s, segments, dry_run), range(segments)))
+
+    by_profession: Counter = Counter()
+    by_hour: Counter = Counter()
+    for _, professions, hours in results:
+        by_profession.update(professions)
+        by_hour.update(hours)
+    total = sum(by_profession.values())
+
+    if not dry_run:
+        counters = {"total": total}
+        counters.update({f"profession#{k}": v for k, v in by_profession.items()})
+        counters.update({f"hour#{k}": v for k, v in by_hour.items()})
+        # Todo en el shard 0; los demás se vacían
+        client = get_client()
+        client.put_item(TableName=TABLE_NAME, Item={**stats_key(0), **serialize_item(counters)})
+        for shard in range(1, ATTENDANCE_COUNTER_SHARDS):
+            client.put_item(TableName=TABLE_NAME, Item=stats_key(shard))
+
+    return {
+        "table": TABLE_NAME,
+        "scanned": sum(r[0] for r in results),
+        "checkedIn": total,
+        "professions": len(by_profession),
+        "dryRun": dry_run,
+        "elapsedS": round(time.perf_counter() - start, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconstruye contadores de asistencia y CheckedInIndex")
+    parser.add_argument("--segments", type=int, default=4, help="segmentos del Scan paralelo")
+    parser.add_argument("--dry-run", action="store_true", help="solo cuenta, no escribe")
+    args = parser.parse_args()
+
+    print(rebuild(segments=max(1, args.segments), dry_run=args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
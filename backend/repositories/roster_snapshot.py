@@ -0,0 +1,312 @@
+"""
+Snapshot inmutable del roster en un archivo que cada worker abre con mmap.
+
+Con varios workers de uvicorn cada índice en proceso guarda su propia
+copia; el snapshot vive en el page cache y lo comparten todos: 100k
+asistentes ocupan unos pocos MB en total sin importar cuántos workers haya.
+
+Formato (little-endian):
+    header   "RSNAP1\\0\\0", versión, n, offset de la tabla, offset/largo del pool, builtAt
+    tabla    n entradas de 32 bytes ordenadas por ticketId: (offset, largo)
+             de ticketId, userId, name, profession y checkedInAt en el pool + flags
+    pool     strings UTF-8 sin repetir (las profesiones se guardan una vez)
+
+Un snapshot nuevo se escribe a un temporal y se instala con os.replace;
+los workers lo detectan y cambian de mapa sin pausar las lecturas.
+
+Uso (desde backend/):
+    python -m repositories.roster_snapshot build -o roster.snap --segments 8
+    python -m repositories.roster_snapshot build -o roster.snap --from-export ./export/data
+    python -m repositories.roster_snapshot info roster.snap
+"""
+
+import argparse
+import gzip
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from repositories.attendee import AttendeeRecord
+from repositories.event_users_repo import EventUsersRepo
+
+ROSTER_SNAPSHOT_PATH = os.getenv("ROSTER_SNAPSHOT_PATH", "")
+ROSTER_SNAPSHOT_CHECK_S = float(os.getenv("ROSTER_SNAPSHOT_CHECK_S", "30"))
+ROSTER_SNAPSHOT_SEGMENTS = int(os.getenv("ROSTER_SNAPSHOT_SEGMENTS", "4"))
+
+_MAGIC = b"RSNAP1\0\0"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIIQQQd")
+_ENTRY = struct.Struct("<IHIHIHIHIHBx")
+_FLAG_CHECKED_IN = 1
+
+
+# ── Escritura ─────────────────────────────────────────────────────
+
+def write_snapshot(records, path: str) -> dict:
+    """Escribe el snapshot de forma atómica. Regresa {entries, bytes}."""
+    by_ticket: dict[bytes, AttendeeRecord] = {}
+    for rec in records:
+        if rec.ticket_id:
+            by_ticket[rec.ticket_id.encode("utf-8")] = rec
+
+    pool = bytearray()
+    offsets: dict[bytes, int] = {}
+
+    def _string(value: str | None) -> tuple[int, int]:
+        data = (value or "").encode("utf-8")
+        if len(data) > 0xFFFF:
+            # Cortar en un límite de carácter: medio carácter UTF-8 no se puede leer
+            data = data[:0xFFFF].decode("utf-8", "ignore").encode("utf-8")
+        off = offsets.get(data)
+        if off is None:
+            off = offsets[data] = len(pool)
+            pool.extend(data)
+        return off, len(data)
+
+    table = bytearray()
+    for key in sorted(by_ticket):
+        rec = by_ticket[key]
+        fields = [_string(v) for v in (rec.ticket_id, rec.user_id, rec.name, rec.profession, rec.checked_in_at)]
+        table += _ENTRY.pack(*(x for pair in fields for x in pair), _FLAG_CHECKED_IN if rec.checked_in else 0)
+
+    table_off = _HEADER.size
+    pool_off = table_off + len(table)
+    header = _HEADER.pack(_MAGIC, _VERSION, len(by_ticket), table_off, pool_off, len(pool), time.time())
+
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(table)
+        f.write(pool)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return {"entries": len(by_ticket), "bytes": pool_off + len(pool)}
+
+
+def scan_records(segments: int = ROSTER_SNAPSHOT_SEGMENTS) -> list[AttendeeRecord]:
+    """Roster completo con un Scan paralelo segmentado."""
+    segments = max(1, segments)
+
+    def _segment(segment: int) -> list[AttendeeRecord]:
+        return [r for r in EventUsersRepo.scan_segment_records(segment, segments) if r.ticket_id]
+
+    with ThreadPoolExecutor(max_workers=segments, thread_name_prefix="roster-snapshot") as pool:
+        return [r for part in pool.map(_segment, range(segments)) for r in part]
+
+
+def export_records(path: str):
+    """
+    Registros de un export de DynamoDB a S3 (formato DYNAMODB_JSON): un
+    archivo .json/.json.gz o un directorio con ellos.
+    """
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, name) for name in os.listdir(path)
+                       if name.endswith((".json", ".json.gz")))
+    else:
+        files = [path]
+    for name in files:
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(name, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = AttendeeRecord.from_ddb(json.loads(line).get("Item", {}))
+                if rec.ticket_id:   # punteros y STATS# no tienen ticketId
+                    yield rec
+
+
+# ── Lectura ───────────────────────────────────────────────────────
+
+class RosterSnapshot:
+    """Un archivo de snapshot mapeado en memoria (solo lectura)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        magic, version, self.count, self._table_off, self._pool_off, pool_len, self.built_at = \
+            _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} no es un snapshot de roster válido")
+        if self._pool_off + pool_len > len(self._mm):
+            self._mm.close()
+            raise ValueError(f"{path} está truncado")
+        self.size_bytes = len(self._mm)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _str(self, off: int, length: int) -> str:
+        start = self._pool_off + off
+        return self._mm[start:start + length].decode("utf-8")
+
+    def _ticket_at(self, i: int) -> bytes:
+        off, length = struct.unpack_from("<IH", self._mm, self._table_off + i * _ENTRY.size)
+        start = self._pool_off + off
+        return self._mm[start:start + length]
+
+    def get(self, ticket_id: str) -> AttendeeRecord | None:
+        key = ticket_id.encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ticket_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.count or self._ticket_at(lo) != key:
+            return None
+        (t_off, t_len, u_off, u_len, n_off, n_len, p_off, p_len, c_off, c_len, flags) = \
+            _ENTRY.unpack_from(self._mm, self._table_off + lo * _ENTRY.size)
+        return AttendeeRecord(
+            user_id=self._str(u_off, u_len) or None,
+            ticket_id=ticket_id,
+            name=self._str(n_off, n_len) or None,
+            profession=self._str(p_off, p_len) or None,
+            checked_in=bool(flags & _FLAG_CHECKED_IN),
+            checked_in_at=self._str(c_off, c_len) or None,
+        )
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+class SharedRoster:
+    """
+    Snapshot vigente más los check-ins hechos en este worker (el archivo es
+    inmutable). Un hilo revisa si el archivo fue reemplazado y cambia de
+    mapa; el anterior se libera cuando ya nadie lo usa.
+    """
+
+    def __init__(self, path: str, check_s: float = ROSTER_SNAPSHOT_CHECK_S):
+        self.path = path
+        self.check_s = check_s
+        self._snapshot: RosterSnapshot | None = None
+        self._checked_in: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self.hits = 0
+        self.misses = 0
+        self.swaps = 0
+        self.last_error: str | None = None
+
+    def reload(self) -> bool:
+        """Abre el archivo si cambió. Regresa True si hubo swap."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        current = self._snapshot
+        if current is not None and current.identity == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+            return False
+        fresh = RosterSnapshot(self.path)
+        with self._lock:
+            self._snapshot = fresh
+            if current is not None:
+                self.swaps += 1
+            self.last_error = None
+        return True
+
+    def get(self, ticket_id: str) -> AttendeeRecord | None:
+        snapshot = self._snapshot
+        rec = snapshot.get(ticket_id) if snapshot is not None else None
+        if rec is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        checked_in_at = self._checked_in.get(ticket_id)
+        if checked_in_at and not rec.checked_in:
+            rec.checked_in, rec.checked_in_at = True, checked_in_at
+        return rec
+
+    def mark_checked_in(self, ticket_id: str, checked_in_at: str) -> None:
+        with self._lock:
+            self._checked_in.setdefault(ticket_id, checked_in_at)
+
+    def _watch_loop(self) -> None:
+        while not self._stop.wait(self.check_s):
+            try:
+                if self.reload():
+                    print(f"[roster-snapshot] nuevo snapshot: {len(self._snapshot)} asistentes")
+            except Exception as e:  # el snapshot anterior sigue sirviendo
+                self.last_error = str(e)
+                print(f"[roster-snapshot] recarga falló: {e}")
+
+    def start_refresh(self) -> None:
+        if self.check_s <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch_loop, name="roster-snapshot-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        total = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": len(snapshot) if snapshot else 0,
+            # Mapeado y compartido entre workers (page cache)
+            "fileBytes": snapshot.size_bytes if snapshot else 0,
+            # Privado de este worker: solo los check-ins locales
+            "localCheckins": len(self._checked_in),
+            "builtAt": snapshot.built_at if snapshot else None,
+            "swaps": self.swaps,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / total, 4) if total else None,
+            "lastError": self.last_error,
+        }
+
+
+def load_roster_snapshot() -> SharedRoster | None:
+    """Abre el snapshot si ROSTER_SNAPSHOT_PATH está configurado."""
+    if not ROSTER_SNAPSHOT_PATH:
+        return None
+    roster = SharedRoster(ROSTER_SNAPSHOT_PATH)
+    try:
+        if not roster.reload():
+            print(f"[roster-snapshot] {ROSTER_SNAPSHOT_PATH} no existe todavía")
+    except Exception as e:
+        roster.last_error = str(e)
+        print(f"[roster-snapshot] carga inicial falló: {e}")
+    roster.start_refresh()
+    return roster
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Snapshot del roster para mmap")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="escribe un snapshot nuevo (reemplazo atómico)")
+    build.add_argument("-o", "--output", default=ROSTER_SNAPSHOT_PATH or "roster.snap")
+    build.add_argument("--from-export", help="export DYNAMODB_JSON de S3 (archivo o directorio) en vez de Scan")
+    build.add_argument("--segments", type=int, default=ROSTER_SNAPSHOT_SEGMENTS)
+    info = sub.add_parser("info", help="muestra tamaño y número de asistentes")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        records = export_records(args.from_export) if args.from_export else scan_records(args.segments)
+        result = write_snapshot(records, args.output)
+        print(f"[roster-snapshot] {result['entries']} asistentes, {result['bytes']} bytes "
+              f"en {time.perf_counter() - start:.2f}s → {args.output}")
+    else:
+        snapshot = RosterSnapshot(args.path)
+        print(json.dumps({"entries": len(snapshot), "bytes": snapshot.size_bytes, "builtAt": snapshot.built_at}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,939 @@
+"""
+Test suite for the attendee repositories and in-memory indexes.
+
+DynamoDB is never contacted: the repository entry points are
+monkeypatched with in-memory fakes.
+Run:  python -m pytest repositories/test_repositories.py -v
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from botocore.exceptions import ClientError
+
+from db.admission import AdmissionController, AdmissionRejected, TokenBucket
+from db import dynamo
+from db.hedging import HedgedReader
+from db.memory_backend import MemoryDynamoClient, seed_attendees
+
+from db.codec import decode_item, deserialize_item, serialize_item
+from repositories import attendance_repo, checkin_journal, event_users_repo, export_roster, import_attendees, ticket_index
+from repositories.attendance_repo import AttendanceRepo, decode_cursor, encode_cursor
+from repositories.attendee import AttendeeRecord
+from repositories.checkin_journal import CheckinJournal, is_retryable
+from repositories.event_users_repo import AttendeeNotFound, EventUsersRepo, is_pointer_item, pointer_item
+from repositories.ticket_filter import TicketBloomFilter, TicketFilter, bloom_size
+from repositories.name_search import NameSearchIndex, normalize_name
+from repositories.roster_snapshot import RosterSnapshot, SharedRoster, export_records, write_snapshot
+from repositories.ticket_index import TicketIndex
+
+
+# ── Helpers ───────────────────────────────────────────────────────
+
+def _roster(n: int = 10) -> list[dict]:
+    return [
+        {
+            "userId": f"usr-{i:04d}",
+            "ticketId": f"TKT-{i:04d}",
+            "name": f"Asistente {i}",
+            "profession": "Estudiante" if i % 2 else "Cloud Engineer",
+            "checkedIn": False,
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def fake_scan(monkeypatch):
+    roster = _roster()
+
+    def _scan_segment_records(segment, total_segments):
+        for i, item in enumerate(roster):
+            if i % total_segments == segment:
+                yield AttendeeRecord.from_item(item)
+
+    monkeypatch.setattr(EventUsersRepo, "scan_segment_records", staticmethod(_scan_segment_records))
+    return roster
+
+
+class _FakeTransactionCanceled(Exception):
+    def __init__(self, reasons):
+        self.response = {"CancellationReasons": reasons}
+
+
+class _FakeClient:
+    """Subconjunto mínimo del cliente low-level de DynamoDB (modo pointer)."""
+
+    class exceptions:
+        TransactionCanceledException = _FakeTransactionCanceled
+
+    def __init__(self, items):
+        self.items = {i["userId"]: dict(i) for i in items}
+        self.conflicts = 0   # próximas transacciones canceladas con TransactionConflict
+
+    def _key(self, key):
+        return deserialize_item(key)["userId"]
+
+    def get_item(self, Key, **kwargs):
+        item = self.items.get(self._key(Key))
+        return {"Item": serialize_item(item)} if item else {}
+
+    def batch_get_item(self, RequestItems):
+        (table_name, request), = RequestItems.items()
+        keys = [self._key(k) for k in request["Keys"]]
+        return {"Responses": {table_name: [serialize_item(self.items[k]) for k in keys if k in self.items]}}
+
+    def transact_write_items(self, TransactItems):
+        if self.conflicts:
+            self.conflicts -= 1
+            raise _FakeTransactionCanceled([{"Code": "TransactionConflict"} for _ in TransactItems])
+        reasons = []
+        for op in TransactItems:
+            (kind, req), = op.items()
+            key = self._key(req["Key"]) if kind == "Update" else deserialize_item(req["Item"])["userId"]
+            item = self.items.get(key)
+            condition = req.get("ConditionExpression", "")
+            if condition.startswith("attribute_exists(userId) AND"):
+                failed = item is None or bool(item.get("checkedIn"))
+            elif condition == "attribute_exists(ownerUserId)":
+                failed = item is None
+            elif condition == "attribute_not_exists(userId)":
+                failed = item is not None
+            else:
+                failed = False
+            reason = {"Code": "ConditionalCheckFailed" if failed else "None"}
+            if failed and item and req.get("ReturnValuesOnConditionCheckFailure") == "ALL_OLD":
+                reason["Item"] = serialize_item(item)
+            reasons.append(reason)
+        if any(r["Code"] == "ConditionalCheckFailed" for r in reasons):
+            raise _FakeTransactionCanceled(reasons)
+        for op in TransactItems:
+            (kind, req), = op.items()
+            if kind == "Put":
+                item = deserialize_item(req["Item"])
+                self.items[item["userId"]] = item
+                continue
+            key = self._key(req["Key"])
+            item = self.items.setdefault(key, {"userId": key})
+            values = deserialize_item(req["ExpressionAttributeValues"])
+            if req["UpdateExpression"].startswith("ADD"):
+                for name in req["ExpressionAttributeNames"].values():
+                    item[name] = item.get(name, 0) + 1
+            else:
+                item.update(checkedIn=True, checkedInAt=values[":now"])
+                if ":ck" in values:
+                    item["checkedInKey"] = values[":ck"]
+
+
+@pytest.fixture
+def pointer_client(monkeypatch):
+    roster = _roster(3)
+    client = _FakeClient(roster + [pointer_item(i) for i in roster[:2]])
+    monkeypatch.setattr(event_users_repo, "get_client", lambda: client)
+    monkeypatch.setattr(attendance_repo, "get_client", lambda: client)
+    monkeypatch.setattr(event_users_repo, "TICKET_LOOKUP_MODE", "pointer")
+    monkeypatch.setattr(event_users_repo, "TICKET_POINTER_FALLBACK", False)
+    return client
+
+
+# ── AttendeeRecord ───────────────────────────────────────────────
+
+
+class TestAttendeeRecord:
+    def test_roundtrip(self):
+        item = _roster(1)[0]
+        rec = AttendeeRecord.from_item(item)
+        assert rec.as_item() == item
+
+    def test_checked_in_at_kept(self):
+        rec = AttendeeRecord.from_item({"ticketId": "T", "checkedIn": True, "checkedInAt": "2026-03-15T09:30:00+00:00"})
+        assert rec.checked_in is True
+        assert rec.as_item()["checkedInAt"] == "2026-03-15T09:30:00+00:00"
+
+
+    def test_from_ddb_matches_from_item(self):
+        item = {**_roster(1)[0], "checkedIn": True, "checkedInAt": "2026-03-15T09:30:00+00:00"}
+        assert AttendeeRecord.from_ddb(serialize_item(item)).as_item() == AttendeeRecord.from_item(item).as_item()
+
+    def test_from_ddb_missing_attributes(self):
+        rec = AttendeeRecord.from_ddb({"ticketId": {"S": "T"}})
+        assert rec.ticket_id == "T"
+        assert rec.name is None
+        assert rec.checked_in is False
+
+
+class TestCodec:
+    def test_decode_item_matches_deserializer(self):
+        raw = serialize_item({**_roster(1)[0], "checkedInAt": None})
+        assert decode_item(raw) == deserialize_item(raw)
+
+    def test_decode_item_delegates_numbers(self):
+        assert decode_item({"n": {"N": "3"}}) == {"n": 3}
+
+
+# ── Admission control ────────────────────────────────────────────
+
+
+def _throttle() -> ClientError:
+    return ClientError({"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow down"}}, "Query")
+
+
+class TestAdmission:
+    def test_concurrency_limit_and_queue(self):
+        controller = AdmissionController(concurrency=2, max_queue=10, max_wait_s=5)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            peak = max(peak, controller.in_flight)
+            await asyncio.sleep(0.01)
+            return 1
+
+        async def run():
+            return await asyncio.gather(*(controller.run(call) for _ in range(8)))
+
+        assert asyncio.run(run()) == [1] * 8
+        stats = controller.stats()
+        assert peak == 2
+        assert stats["admitted"] == 8 and stats["maxQueueDepth"] >= 6
+        assert stats["waitMsP99"] > 0
+
+    def test_full_queue_rejects(self):
+        controller = AdmissionController(concurrency=1, max_queue=1, max_wait_s=5)
+
+        async def call():
+            await asyncio.sleep(0.05)
+
+        async def run():
+            return await asyncio.gather(*(controller.run(call) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert sum(isinstance(r, AdmissionRejected) for r in results) == 1
+        assert controller.stats()["rejected"] == 1
+
+    def test_throttling_is_retried(self, monkeypatch):
+        controller = AdmissionController(concurrency=4, rate=100, burst=10, throttle_retries=3)
+        monkeypatch.setattr(controller, "_backoff_s", lambda attempt: 0)
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise _throttle()
+            return "ok"
+
+        assert asyncio.run(controller.run(call)) == "ok"
+        stats = controller.stats()
+        assert (stats["throttled"], stats["retries"]) == (2, 2)
+        assert stats["currentRate"] < 100
+
+    def test_non_throttle_errors_are_not_retried(self):
+        controller = AdmissionController(throttle_retries=3)
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            raise ClientError({"Error": {"Code": "ValidationException", "Message": "bad"}}, "Query")
+
+        with pytest.raises(ClientError):
+            asyncio.run(controller.run(call))
+        assert len(attempts) == 1
+
+    def test_botocore_leaves_throttling_to_admission(self, monkeypatch):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        from botocore.config import Config
+        from botocore.retries import standard
+        from botocore.session import get_session
+
+        requests = []
+
+        class _Throttled(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                requests.append(1)
+                body = json.dumps({"__type": "com.amazonaws.dynamodb.v20120810#ThrottlingException",
+                                   "message": "slow down"}).encode()
+                self.send_response(400)
+                self.send_header("Content-Type", "application/x-amz-json-1.0")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Throttled)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        monkeypatch.setattr(standard.ExponentialBackoff, "delay_amount", lambda self, context: 0)
+        client = get_session().create_client(
+            "dynamodb", endpoint_url=f"http://127.0.0.1:{server.server_address[1]}",
+            aws_access_key_id="test", aws_secret_access_key="test",
+            config=Config(region_name="us-east-1", retries={"mode": "standard", "max_attempts": 3}),
+        )
+        dynamo._install_retry_handler(client)
+        key = {"userId": {"S": "usr-1"}}
+        try:
+            with pytest.raises(ClientError):
+                client.get_item(TableName="EventUsers", Key=key)
+            assert len(requests) == 4          # fuera de admission botocore sí reintenta
+            requests.clear()
+            with dynamo.throttle_retries_owned_by_caller(), pytest.raises(ClientError):
+                client.get_item(TableName="EventUsers", Key=key)
+            assert len(requests) == 1          # dentro, el reintento es de admission
+        finally:
+            server.shutdown()
+
+    def test_token_bucket_paces_calls(self):
+        bucket = TokenBucket(rate=10, burst=2)
+        assert bucket.reserve() == 0 and bucket.reserve() == 0
+        assert 0 < bucket.reserve() <= 0.1
+
+
+class TestHedging:
+    @staticmethod
+    def _reads(delays: list[float]):
+        calls = []
+
+        async def read():
+            i = len(calls)
+            calls.append(i)
+            await asyncio.sleep(delays[i])
+            return i
+
+        return calls, read
+
+    def test_fast_read_is_not_hedged(self):
+        reader = HedgedReader(initial_delay_ms=50)
+        calls, read = self._reads([0.0])
+        assert asyncio.run(reader.read(read)) == 0
+        assert len(calls) == 1 and reader.stats()["hedged"] == 0
+
+    def test_slow_read_is_hedged_and_hedge_wins(self):
+        reader = HedgedReader(initial_delay_ms=10)
+        calls, read = self._reads([0.5, 0.0])
+        assert asyncio.run(reader.read(read)) == 1
+        stats = reader.stats()
+        assert (stats["hedged"], stats["hedgesWon"]) == (1, 1)
+
+    def test_failed_hedge_falls_back_to_primary(self):
+        reader = HedgedReader(initial_delay_ms=10)
+        calls = []
+
+        async def read():
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError("boom")
+            await asyncio.sleep(0.05)
+            return "primary"
+
+        assert asyncio.run(reader.read(read)) == "primary"
+        assert reader.stats()["hedgesWon"] == 0
+
+    def test_budget_caps_extra_reads(self):
+        reader = HedgedReader(budget=0.0, initial_delay_ms=1)
+
+        async def read():
+            await asyncio.sleep(0.005)
+            return "ok"
+
+        async def run():
+            for _ in range(15):
+                await reader.read(read)
+
+        asyncio.run(run())
+        stats = reader.stats()
+        assert stats["hedged"] == 10          # solo la ráfaga inicial
+        assert stats["budgetExhausted"] == 5
+
+    def test_threshold_tracks_percentile(self):
+        reader = HedgedReader(percentile=0.9, min_delay_ms=1)
+        for i in range(100):
+            reader._record((i + 1) / 1000)
+        assert reader.threshold_s() == pytest.approx(0.091)
+
+
+# ── TicketIndex ──────────────────────────────────────────────────
+
+
+class TestTicketIndex:
+    def test_build_from_all_segments(self, fake_scan):
+        index = TicketIndex(segments=3, refresh_s=0)
+        assert index.build() == len(fake_scan)
+        assert index.get("TKT-0007").user_id == "usr-0007"
+
+    def test_hit_miss_counters(self, fake_scan):
+        index = TicketIndex(segments=2, refresh_s=0)
+        index.build()
+        index.get("TKT-0001")
+        index.get("NOPE")
+        stats = index.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hitRatio"] == 0.5
+
+    def test_max_entries_bound(self, fake_scan):
+        index = TicketIndex(segments=2, refresh_s=0, max_entries=4)
+        assert index.build() == 4
+        assert index.stats()["truncated"] is True
+        index.put(AttendeeRecord.from_item({"ticketId": "TKT-NEW", "userId": "u"}))
+        assert index.get("TKT-NEW") is None
+
+    def test_rebuild_keeps_local_checkin(self, fake_scan):
+        index = TicketIndex(segments=2, refresh_s=0)
+        index.build()
+        index.mark_checked_in("TKT-0003", "2026-03-15T09:30:00+00:00")
+        index.build()
+        rec = index.get("TKT-0003")
+        assert rec.checked_in is True
+        assert rec.checked_in_at == "2026-03-15T09:30:00+00:00"
+
+
+# ── Roster snapshot (mmap) ───────────────────────────────────────
+
+
+class TestRosterSnapshot:
+    def _records(self, n: int = 50) -> list[AttendeeRecord]:
+        return [AttendeeRecord.from_item(item) for item in _roster(n)]
+
+    def test_lookup_and_miss(self, tmp_path):
+        path = str(tmp_path / "roster.snap")
+        info = write_snapshot(self._records(), path)
+        snapshot = RosterSnapshot(path)
+        assert len(snapshot) == info["entries"] == 50
+        rec = snapshot.get("TKT-0007")
+        assert (rec.user_id, rec.name, rec.profession, rec.checked_in) == \
+            ("usr-0007", "Asistente 7", "Estudiante", False)
+        assert snapshot.get("TKT-9999") is None and snapshot.get("") is None
+
+    def test_oversized_field_is_cut_on_a_character_boundary(self, tmp_path):
+        path = str(tmp_path / "roster.snap")
+        records = self._records(1)
+        records[0].name = "ñ" * 40000   # el byte 0xFFFF cae a media ñ
+        write_snapshot(records, path)
+        name = RosterSnapshot(path).get("TKT-0000").name
+        assert name == "ñ" * 32767 and len(name.encode("utf-8")) <= 0xFFFF
+
+    def test_atomic_swap_and_local_checkins(self, tmp_path):
+        path = str(tmp_path / "roster.snap")
+        write_snapshot(self._records(5), path)
+        roster = SharedRoster(path, check_s=0)
+        assert roster.reload() and not roster.reload()
+        roster.mark_checked_in("TKT-0001", "2026-03-14T10:00:00+00:00")
+        assert roster.get("TKT-0001").checked_in_at == "2026-03-14T10:00:00+00:00"
+
+        records = self._records(8)
+        records[2].checked_in, records[2].checked_in_at = True, "2026-03-14T09:00:00+00:00"
+        write_snapshot(records, path)
+        assert roster.reload()
+        assert roster.get("TKT-0007") is not None and roster.get("TKT-0002").checked_in
+        assert roster.stats()["swaps"] == 1
+
+    def test_rejects_foreign_file(self, tmp_path):
+        path = tmp_path / "bad.snap"
+        path.write_bytes(b"not a snapshot" * 10)
+        with pytest.raises(ValueError):
+            RosterSnapshot(str(path))
+
+    def test_reads_dynamodb_json_export(self, tmp_path):
+        lines = [json.dumps({"Item": serialize_item(item)}) for item in _roster(3)]
+        lines.append(json.dumps({"Item": serialize_item(pointer_item(_roster(1)[0]))}))
+        (tmp_path / "part-0.json").write_text("\n".join(lines))
+        assert sorted(r.ticket_id for r in export_records(str(tmp_path))) == ["TKT-0000", "TKT-0001", "TKT-0002"]
+
+
+# ── In-memory backend (DDB_BACKEND=memory) ───────────────────────
+
+
+@pytest.fixture
+def memory_client():
+    client = MemoryDynamoClient.for_event_users(dynamo.TABLE_NAME, latency_ms=0, jitter_ms=0,
+                                                slow_rate=0, throttle_rate=0)
+    seed_attendees(client, dynamo.TABLE_NAME, 20)
+    dynamo.use_client(client)
+    yield client
+    dynamo.use_client(None)
+
+
+class TestMemoryBackend:
+    @staticmethod
+    def _ticket(client, i: int) -> str:
+        return client.tables[dynamo.TABLE_NAME].items[f"usr-{i:06d}"]["ticketId"]["S"]
+
+    def test_gsi_lookup_and_conditional_checkin(self, memory_client):
+        ticket_id = self._ticket(memory_client, 3)
+        item = EventUsersRepo.get_by_ticket_id(ticket_id)
+        assert item["userId"] == "usr-000003" and item["checkedIn"] is False
+        updated, already = EventUsersRepo.mark_checkin("usr-000003", "2026-03-14T10:00:00+00:00")
+        assert updated["checkedInAt"] == "2026-03-14T10:00:00+00:00" and not already
+        assert EventUsersRepo.mark_checkin("usr-000003", "2026-03-14T11:00:00+00:00") == ({}, True)
+        assert EventUsersRepo.get_by_ticket_id(ticket_id)["checkedInAt"] == "2026-03-14T10:00:00+00:00"
+        assert EventUsersRepo.get_by_ticket_id("NOPE") is None
+
+    def test_pointer_transaction_and_counters(self, memory_client, monkeypatch):
+        monkeypatch.setattr(event_users_repo, "TICKET_LOOKUP_MODE", "pointer")
+        monkeypatch.setattr(attendance_repo, "ATTENDANCE_TRACKING_ENABLED", True)
+        for i in (1, 2):
+            EventUsersRepo.mark_checkin(f"usr-{i:06d}", f"2026-03-14T1{i}:00:00+00:00",
+                                        ticket_id=self._ticket(memory_client, i), profession="Developer")
+        assert EventUsersRepo.get_by_ticket_pointer(self._ticket(memory_client, 1))["checkedIn"] is True
+        assert AttendanceRepo.get_stats()["checkedIn"] == 2
+
+        items, cursor = AttendanceRepo.list_checked_in(limit=1)
+        assert items[0]["userId"] == "usr-000002" and cursor
+        items, _ = AttendanceRepo.list_checked_in(limit=1, cursor=cursor)
+        assert items[0]["userId"] == "usr-000001"
+
+    def test_checkin_of_deleted_user_is_not_found(self, memory_client, monkeypatch):
+        monkeypatch.setattr(attendance_repo, "ATTENDANCE_TRACKING_ENABLED", True)
+        table = memory_client.tables[dynamo.TABLE_NAME]
+        for mode in ("gsi", "pointer"):
+            monkeypatch.setattr(event_users_repo, "TICKET_LOOKUP_MODE", mode)
+            with pytest.raises(AttendeeNotFound):
+                EventUsersRepo.mark_checkin("usr-borrado", "2026-03-14T10:00:00+00:00",
+                                            ticket_id="TKT-BORRADO", profession="Developer")
+        # Ni item fantasma ni contadores inflados
+        assert "usr-borrado" not in table.items
+        assert AttendanceRepo.get_stats()["checkedIn"] == 0
+
+    def test_walkin_and_segmented_scan(self, memory_client):
+        walkin = EventUsersRepo.create_walkin("Ana López", None, "2026-03-14T10:00:00+00:00")
+        assert EventUsersRepo.get_by_ticket_id(walkin["ticketId"])["name"] == "Ana López"
+        seen = [r.user_id for s in range(3) for r in EventUsersRepo.scan_segment_records(s, 3)]
+        assert len(seen) == len(set(seen)) == 21   # sin punteros
+
+    def test_throttle_injection(self, memory_client):
+        memory_client.throttle_rate = 1.0
+        with pytest.raises(ClientError) as exc:
+            EventUsersRepo.get_by_ticket_id("TKT-0001")
+        assert exc.value.response["Error"]["Code"] == "ProvisionedThroughputExceededException"
+        assert memory_client.stats()["throttled"] == 1
+
+
+# ── Ticket pointers (TICKET_LOOKUP_MODE=pointer) ─────────────────
+
+
+class TestTicketPointers:
+    def test_pointer_item_has_no_ticket_id(self):
+        ptr = pointer_item(_roster(1)[0])
+        assert ptr["userId"] == "TICKET#TKT-0000"
+        assert ptr["ownerUserId"] == "usr-0000"
+        assert "ticketId" not in ptr
+        assert is_pointer_item(ptr)
+
+    def test_get_by_ticket_id_uses_pointer(self, pointer_client):
+        item = EventUsersRepo.get_by_ticket_id("TKT-0001")
+        assert item["userId"] == "usr-0001"
+        assert item["ticketId"] == "TKT-0001"
+
+    def test_missing_pointer_without_fallback(self, pointer_client):
+        assert EventUsersRepo.get_by_ticket_id("TKT-0002") is None
+
+    def test_checkin_updates_pointer_and_user(self, pointer_client):
+        now = "2026-03-15T09:30:00+00:00"
+        updated, already = EventUsersRepo.mark_checkin("usr-0000", now, ticket_id="TKT-0000")
+        assert already is False
+        assert updated["checkedInAt"] == now
+        assert EventUsersRepo.get_by_ticket_id("TKT-0000")["checkedIn"] is True
+
+        _, already = EventUsersRepo.mark_checkin("usr-0000", now, ticket_id="TKT-0000")
+        assert already is True
+
+    def test_walkin_creates_user_and_pointer(self, pointer_client, monkeypatch):
+        monkeypatch.setattr(attendance_repo, "ATTENDANCE_TRACKING_ENABLED", True)
+        now = "2026-03-15T09:30:00+00:00"
+        item = EventUsersRepo.create_walkin("Walk In", None, now)
+        assert item["ticketId"].startswith("TKT-2026-")
+        assert EventUsersRepo.get_by_ticket_id(item["ticketId"])["checkedIn"] is True
+        assert pointer_client.items[item["userId"]]["checkedInKey"] == "CHECKEDIN"
+        assert AttendanceRepo.get_stats()["byProfession"] == {"N/A": 1}
+
+    def test_walkin_retries_ticket_id_collision(self, pointer_client, monkeypatch):
+        ids = iter(["TKT-0000", "TKT-NEW"])   # TKT-0000 ya tiene puntero
+        monkeypatch.setattr(event_users_repo, "new_ticket_id", lambda now: next(ids))
+        item = EventUsersRepo.create_walkin("Walk In", "Estudiante", "2026-03-15T09:30:00+00:00")
+        assert item["ticketId"] == "TKT-NEW"
+
+    def test_batch_lookup_uses_pointers(self, pointer_client):
+        found = EventUsersRepo.get_by_ticket_ids(["TKT-0000", "TKT-0001", "TKT-0002", "TKT-0000"])
+        assert sorted(found) == ["TKT-0000", "TKT-0001"]
+        assert found["TKT-0001"]["userId"] == "usr-0001"
+
+
+class TestBatchLookup:
+    def test_gsi_mode_queries_each_ticket_once(self, monkeypatch):
+        calls = []
+
+        def _query(ticket_id):
+            calls.append(ticket_id)
+            return {"userId": "u-" + ticket_id, "ticketId": ticket_id} if ticket_id != "BAD" else None
+
+        monkeypatch.setattr(EventUsersRepo, "_query_ticket_gsi", staticmethod(_query))
+        found = EventUsersRepo.get_by_ticket_ids(["A", "B", "BAD", "A", ""])
+        assert sorted(calls) == ["A", "B", "BAD"]
+        assert sorted(found) == ["A", "B"]
+
+
+# ── TicketFilter (Bloom) ─────────────────────────────────────────
+
+
+class TestTicketFilter:
+    def test_no_false_negatives(self):
+        ids = [f"TKT-{i:05d}" for i in range(2000)]
+        bloom = TicketBloomFilter.from_ticket_ids(ids, fp_rate=0.01)
+        assert all(bloom.might_contain(t) for t in ids)
+
+    def test_rejects_foreign_qr_codes(self):
+        bloom = TicketBloomFilter.from_ticket_ids([f"TKT-{i:05d}" for i in range(2000)], fp_rate=0.001)
+        foreign = [f"WIFI:S:cafe-{i};T:WPA;P:secret;;" for i in range(2000)]
+        passed = sum(bloom.might_contain(q) for q in foreign)
+        assert passed < 20
+        assert bloom.stats()["rejected"] == 2000 - passed
+
+    def test_sizing_and_memory(self):
+        bits, hashes = bloom_size(100_000, 0.001)
+        assert 1_400_000 < bits < 1_500_000
+        assert hashes == 10
+        assert TicketBloomFilter(100_000, 0.001).memory_bytes() == (bits + 7) // 8
+
+    def test_incremental_add_and_source_rebuild(self, fake_scan):
+        index = TicketIndex(segments=2, refresh_s=0)
+        index.build()
+        ticket_filter = TicketFilter(refresh_s=0, source=index.ticket_ids)
+        assert ticket_filter.build() == len(fake_scan)
+        assert not ticket_filter.might_contain("TKT-WALKIN")
+        ticket_filter.add("TKT-WALKIN")
+        assert ticket_filter.might_contain("TKT-WALKIN")
+
+    def test_failed_index_load_does_not_reject(self, fake_scan):
+        index = TicketIndex(segments=2, refresh_s=0)
+        assert index.ticket_ids() is None
+        # El filtro cae a su propio Scan en vez de construirse vacío
+        ticket_filter = TicketFilter(refresh_s=0, source=index.ticket_ids)
+        assert ticket_filter.build() == len(fake_scan)
+        assert all(ticket_filter.might_contain(item["ticketId"]) for item in fake_scan)
+
+    def test_recent_walkin_from_other_worker_passes(self, fake_scan):
+        ticket_filter = TicketFilter(refresh_s=0)
+        ticket_filter.build()
+        # Alta hecha en otro proceso: este filtro nunca vio su add()
+        walkin = event_users_repo.new_ticket_id(datetime.now(timezone.utc).isoformat())
+        assert ticket_filter.might_contain(walkin)
+        old = event_users_repo.new_ticket_id("2025-01-01T00:00:00+00:00")
+        assert not ticket_filter.might_contain(old)
+        stats = ticket_filter.stats()
+        assert stats["recentPassed"] == 1
+        assert stats["rejected"] == 1
+
+
+# ── Attendance counters ──────────────────────────────────────────
+
+
+class TestAttendance:
+    def test_counters_only_count_new_checkins(self, pointer_client, monkeypatch):
+        monkeypatch.setattr(attendance_repo, "ATTENDANCE_TRACKING_ENABLED", True)
+        now = "2026-03-15T09:30:00+00:00"
+        # usr-0000 tiene puntero; usr-0002 no (cae a la transacción sin puntero)
+        assert EventUsersRepo.mark_checkin("usr-0000", now, ticket_id="TKT-0000", profession="Estudiante")[1] is False
+        assert EventUsersRepo.mark_checkin("usr-0000", now, ticket_id="TKT-0000", profession="Estudiante")[1] is True
+        assert EventUsersRepo.mark_checkin("usr-0002", now, ticket_id="TKT-0002", profession=None)[1] is False
+
+        stats = AttendanceRepo.get_stats()
+        assert stats == {
+            "checkedIn": 2,
+            "byProfession": {"Estudiante": 1, "N/A": 1},
+            "byHour": {"2026-03-15T09": 2},
+        }
+        assert pointer_client.items["usr-0000"]["checkedInKey"] == "CHECKEDIN"
+        assert "checkedInKey" not in pointer_client.items["TICKET#TKT-0000"]
+
+    def test_conflicts_are_retried_and_shards_summed(self, pointer_client, monkeypatch):
+        monkeypatch.setattr(attendance_repo, "ATTENDANCE_TRACKING_ENABLED", True)
+        monkeypatch.setattr(attendance_repo, "ATTENDANCE_COUNTER_SHARDS", 4)
+        now = "2026-03-15T09:30:00+00:00"
+        pointer_client.conflicts = 2
+        assert EventUsersRepo.mark_checkin("usr-0000", now, ticket_id="TKT-0000", profession="Estudiante")[1] is False
+        assert pointer_client.conflicts == 0
+        for user_id in ("usr-0001", "usr-0002"):
+            EventUsersRepo.mark_checkin(user_id, now, profession="Estudiante")
+        shards = [k for k in pointer_client.items if k.startswith("STATS#attendance#")]
+        assert shards and all(int(k.rsplit("#", 1)[1]) < 4 for k in shards)
+        assert AttendanceRepo.get_stats()["byProfession"] == {"Estudiante": 3}
+
+        # Contención sostenida: se agotan los reintentos y sube el error
+        pointer_client.conflicts = 99
+        with pytest.raises(_FakeTransactionCanceled):
+            EventUsersRepo.create_walkin("Ana", None, now)
+
+    def test_cursor_roundtrip(self):
+        key = {"userId": {"S": "usr-1"}, "checkedInKey": {"S": "CHECKEDIN"}}
+        assert decode_cursor(encode_cursor(key)) == key
+        assert encode_cursor(None) is None
+        with pytest.raises(ValueError):
+            decode_cursor("no-es-un-cursor")
+
+
+# ── CheckinJournal ───────────────────────────────────────────────
+
+
+class TestCheckinJournal:
+    def test_record_is_local_and_idempotent(self, tmp_path):
+        journal = CheckinJournal(str(tmp_path / "journal.db"), interval_s=0)
+        assert journal.record("TKT-1", "usr-1", "t1") == ("t1", False)
+        assert journal.record("TKT-1", "usr-1", "t2") == ("t1", True)
+        stats = journal.stats()
+        assert stats["backlog"] == 1
+        assert stats["lagS"] >= 0
+
+    def test_sync_handles_conflicts_and_errors(self, tmp_path, monkeypatch):
+        remote = {"usr-2": True}
+        offline = {"usr-3"}
+
+        def _mark_checkin(user_id, now_iso, ticket_id=None, profession=None):
+            if user_id in offline:
+                raise ConnectionError("sin red")
+            if remote.get(user_id):
+                return {}, True
+            remote[user_id] = True
+            return {"checkedInAt": now_iso}, False
+
+        monkeypatch.setattr(EventUsersRepo, "mark_checkin", staticmethod(_mark_checkin))
+        # Sin red es reintentable: no cuenta para max_attempts
+        journal = CheckinJournal(str(tmp_path / "journal.db"), interval_s=0, batch_size=10, max_attempts=1)
+        for i in (1, 2, 3):
+            journal.record(f"TKT-{i}", f"usr-{i}", f"t{i}")
+
+        assert journal.sync_once() == 2
+        stats = journal.stats()
+        assert (stats["backlog"], stats["synced"], stats["conflicts"]) == (1, 1, 1)
+        assert stats["lastError"] == "sin red"
+        assert journal.get("TKT-3")["attempts"] == 1
+
+        offline.clear()
+        assert journal.sync_once() == 1
+        assert journal.stats()["backlog"] == 0
+        assert journal.get("TKT-3")["checkedInAt"] == "t3"
+
+    def test_load_warns_without_ticket_index(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(checkin_journal, "CHECKIN_JOURNAL_ENABLED", True)
+        for enabled, warned in ((False, True), (True, False)):
+            monkeypatch.setattr(ticket_index, "TICKET_INDEX_ENABLED", enabled)
+            journal = checkin_journal.load_checkin_journal()
+            journal.stop()
+            assert ("TICKET_INDEX_ENABLED" in capsys.readouterr().out) is warned
+        columns = {row[1] for row in journal._conn.execute("PRAGMA table_info(checkins)")}
+        assert "profession" in columns
+
+    def test_poison_rows_do_not_block_new_checkins(self, tmp_path, monkeypatch):
+        synced = []
+
+        def _mark_checkin(user_id, now_iso, ticket_id=None, profession=None):
+            if user_id.startswith("poison"):
+                raise ValueError("item inválido")
+            synced.append(user_id)
+            return {"checkedInAt": now_iso}, False
+
+        monkeypatch.setattr(EventUsersRepo, "mark_checkin", staticmethod(_mark_checkin))
+        journal = CheckinJournal(str(tmp_path / "journal.db"), interval_s=0, batch_size=3, max_attempts=2)
+        for i in range(5):
+            journal.record(f"TKT-P{i}", f"poison-{i}", f"t{i}")
+        assert journal.sync_once() == 0
+        journal.record("TKT-OK", "usr-ok", "t9")
+
+        # Las filas con menos intentos van primero: la nueva entra en el siguiente lote
+        assert journal.sync_once() == 1
+        assert synced == ["usr-ok"]
+        while journal.sync_once() > 0:
+            pass
+        stats = journal.stats()
+        assert (stats["backlog"], stats["synced"], stats["failed"]) == (0, 1, 5)
+        assert journal.get("TKT-P0")["status"] == "failed"
+
+    def test_transaction_conflicts_are_retryable(self):
+        def _canceled(*codes):
+            return ClientError({"Error": {"Code": "TransactionCanceledException"},
+                                "CancellationReasons": [{"Code": c} for c in codes]}, "TransactWriteItems")
+
+        assert is_retryable(_canceled("None", "TransactionConflict"))
+        assert not is_retryable(_canceled("ConditionalCheckFailed", "TransactionConflict"))
+        assert not is_retryable(ValueError("item inválido"))
+
+    def test_sync_drops_deleted_users(self, tmp_path, monkeypatch):
+        def _mark_checkin(user_id, now_iso, ticket_id=None, profession=None):
+            raise AttendeeNotFound(user_id)
+
+        monkeypatch.setattr(EventUsersRepo, "mark_checkin", staticmethod(_mark_checkin))
+        journal = CheckinJournal(str(tmp_path / "journal.db"), interval_s=0)
+        journal.record("TKT-1", "usr-borrado", "t1")
+        assert journal.sync_once() == 1
+        stats = journal.stats()
+        assert (stats["backlog"], stats["synced"], stats["notFound"]) == (0, 0, 1)
+
+
+# ── Bulk import ──────────────────────────────────────────────────
+
+
+class _FakeBatchWriter:
+    """batch_write_item que deja la mitad de cada lote como UnprocessedItems."""
+
+    def __init__(self, fail_after: int | None = None):
+        self.items: dict[str, dict] = {}
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def batch_write_item(self, RequestItems):
+        self.calls += 1
+        if self.fail_after is not None and len(self.items) >= self.fail_after:
+            raise RuntimeError("sin red")
+        (table_name, requests), = RequestItems.items()
+        keep = requests[: max(1, len(requests) // 2)]
+        for r in keep:
+            item = deserialize_item(r["PutRequest"]["Item"])
+            self.items[item["userId"]] = item
+        rest = requests[len(keep):]
+        return {"UnprocessedItems": {table_name: rest} if rest else {}}
+
+
+@pytest.fixture
+def batch_writer(monkeypatch):
+    client = _FakeBatchWriter()
+    monkeypatch.setattr(import_attendees, "get_client", lambda: client)
+    monkeypatch.setattr(import_attendees.time, "sleep", lambda s: None)
+    return client
+
+
+class TestImportAttendees:
+    def _write_csv(self, path, n):
+        lines = ["userId,ticketId,name,profession"]
+        lines += [f"usr-{i},TKT-{i},Asistente {i},Estudiante" for i in range(n)]
+        lines += [",TKT-X,Sin id,", "usr-0,TKT-DUP,Duplicado,"]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return str(path)
+
+    def test_validate_row(self):
+        item = import_attendees.validate_row({"userId": " u1 ", "ticketId": "T1", "profession": ""})
+        assert item == {"userId": "u1", "ticketId": "T1", "name": "UNKNOWN", "checkedIn": False}
+        with pytest.raises(import_attendees.RowError):
+            import_attendees.validate_row({"userId": "TICKET#T1", "ticketId": "T1"})
+
+    def test_import_retries_unprocessed_and_writes_pointers(self, tmp_path, batch_writer):
+        path = self._write_csv(tmp_path / "regs.csv", 60)
+        rejects = tmp_path / "rejects.ndjson"
+        summary = import_attendees.import_file(path, workers=4, pointers=True, rejects_path=str(rejects),
+                                               progress_s=60)
+        assert (summary["rows"], summary["written"], summary["rejected"], summary["duplicates"]) == (62, 60, 2, 1)
+        assert summary["retried"] > 0
+        assert len(batch_writer.items) == 120
+        assert batch_writer.items["TICKET#TKT-7"]["ownerUserId"] == "usr-7"
+        assert len(rejects.read_text().splitlines()) == 2
+        assert json.loads((tmp_path / "regs.csv.import-state").read_text())["rowsDone"] == 60
+
+    def test_resume_skips_committed_rows(self, tmp_path, batch_writer, monkeypatch):
+        path = self._write_csv(tmp_path / "regs.csv", 100)
+        batch_writer.fail_after = 50
+        with pytest.raises(RuntimeError):
+            import_attendees.import_file(path, workers=1, pointers=False, progress_s=60)
+        done = json.loads((tmp_path / "regs.csv.import-state").read_text())["rowsDone"]
+        assert 0 < done < 100
+
+        batch_writer.fail_after = None
+        summary = import_attendees.import_file(path, workers=4, pointers=False, resume=True, progress_s=60)
+        assert summary["resumedFromRow"] == done
+        assert summary["rows"] == 102 - done
+        assert len(batch_writer.items) == 100
+
+
+# ── Roster export ────────────────────────────────────────────────
+
+
+@pytest.fixture
+def fake_pages(monkeypatch):
+    roster = _roster(50)
+    roster[3].update(checkedIn=True, checkedInAt="2026-03-15T09:30:00+00:00")
+    calls = []
+
+    def _scan_segment_pages(segment, total_segments, checked_in_only=False):
+        calls.append((segment, checked_in_only))
+        mine = [i for n, i in enumerate(roster) if n % total_segments == segment]
+        if checked_in_only:
+            mine = [i for i in mine if i["checkedIn"]]
+        for start in range(0, len(mine), 4):
+            yield mine[start:start + 4]
+
+    monkeypatch.setattr(EventUsersRepo, "scan_segment_pages", staticmethod(_scan_segment_pages))
+    return calls
+
+
+class TestExportRoster:
+    def test_csv_has_every_row_once(self, fake_pages):
+        body = b"".join(export_roster.iter_export("csv", segments=3)).decode()
+        lines = body.splitlines()
+        assert lines[0] == ",".join(export_roster.EXPORT_COLUMNS)
+        assert sorted(lines[1:]) == sorted(set(lines[1:]))
+        assert len(lines) == 51
+        assert "usr-0003,TKT-0003,Asistente 3,Estudiante,true,2026-03-15T09:30:00+00:00" in lines
+        assert "usr-0004,TKT-0004,Asistente 4,Cloud Engineer,false," in lines
+        assert sorted(s for s, _ in fake_pages) == [0, 1, 2]
+
+    def test_checked_in_only_ndjson(self, fake_pages):
+        body = b"".join(export_roster.iter_export("ndjson", segments=2, checked_in_only=True))
+        rows = [json.loads(line) for line in body.splitlines()]
+        assert [r["ticketId"] for r in rows] == ["TKT-0003"]
+        assert all(only for _, only in fake_pages)
+
+    def test_consumer_can_stop_early(self, fake_pages):
+        pages = export_roster.iter_roster_pages(segments=2)
+        assert len(next(pages)) == 4
+        pages.close()
+
+
+# ── Name search ──────────────────────────────────────────────────
+
+
+def _people(*names: str) -> list[AttendeeRecord]:
+    return [AttendeeRecord(f"usr-{i}", f"TKT-{i}", name, "Estudiante") for i, name in enumerate(names)]
+
+
+class TestNameSearch:
+    def _index(self, *names):
+        index = NameSearchIndex(refresh_s=0, source=lambda: _people(*names))
+        index.build()
+        return index
+
+    def test_normalize_strips_accents(self):
+        assert normalize_name("  José Núñez-PEÑA ") == "jose nunez pena"
+
+    def test_accent_insensitive_and_prefix(self):
+        index = self._index("José Núñez", "Josefina Pérez", "Ana López")
+        assert [r["ticketId"] for r in index.search("jose nun")][:1] == ["TKT-0"]
+        assert [r["name"] for r in index.search("lopez")] == ["Ana López"]
+        assert index.search("Perez")[0]["name"] == "Josefina Pérez"
+
+    def test_tolerates_typos_and_ranks(self):
+        index = self._index("María Fernanda García", "Mario García", "Fernando Ruiz")
+        results = index.search("maria garsia")
+        assert results[0]["name"] == "María Fernanda García"
+        assert results[0]["score"] > results[1]["score"]
+
+    def test_incremental_put_and_checkin(self):
+        index = self._index("Ana López")
+        assert index.search("walkin") == []
+        index.put(AttendeeRecord("usr-9", "TKT-9", "Walkin Rodríguez", "N/A"))
+        index.mark_checked_in("TKT-9", "2026-03-15T09:30:00+00:00")
+        (hit,) = index.search("rodriguez")
+        assert hit["ticketId"] == "TKT-9" and hit["checkedIn"] is True
+        index.put(AttendeeRecord("usr-9", "TKT-9", "Walkin Ramírez", "N/A"))
+        assert index.search("rodriguez") == []
+
+    def test_failed_ticket_index_load_falls_back_to_scan(self, fake_scan):
+        ticket_index = TicketIndex(segments=2, refresh_s=0)
+        assert ticket_index.records() is None
+        index = NameSearchIndex(refresh_s=0, source=ticket_index.records)
+        assert index.build() == len(fake_scan)
+        assert index.search("asistente 7")[0]["ticketId"] == "TKT-0007"
@@ -0,0 +1,258 @@
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from repositories.event_users_repo import EventUsersRepo
+
+TICKET_FILTER_ENABLED = os.getenv("TICKET_FILTER_ENABLED", "false").lower() in ("1", "true", "yes")
+TICKET_FILTER_FP_RATE = float(os.getenv("TICKET_FILTER_FP_RATE", "0.001"))
+TICKET_FILTER_MIN_CAPACITY = int(os.getenv("TICKET_FILTER_MIN_CAPACITY", "10000"))
+TICKET_FILTER_REFRESH_S = float(os.getenv("TICKET_FILTER_REFRESH_S", "120"))
+TICKET_FILTER_SEGMENTS = int(os.getenv("TICKET_FILTER_SEGMENTS", "4"))
+# Tickets creados después de (build - esto) pasan aunque no estén en el filtro:
+# un walk-in de otro worker, o del índice que alimentó el build, aún no llega aquí
+TICKET_FILTER_RECENT_S = float(os.getenv("TICKET_FILTER_RECENT_S", "600"))
+
+_TICKET_ID_RE = re.compile(r"TKT-\d{4}-([0-9A-Z]{8})-[0-9A-F]{8}")
+
+
+def bloom_size(capacity: int, fp_rate: float) -> tuple[int, int]:
+    """Regresa (bits, hashes) óptimos para `capacity` elementos con `fp_rate`."""
+    capacity = max(1, capacity)
+    bits = math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+def ticket_created_at(ticket_id: str) -> float | None:
+    """Epoch (s) codificado en un ticketId de new_ticket_id, o None si no tiene ese formato."""
+    match = _TICKET_ID_RE.fullmatch(ticket_id)
+    if match is None:
+        return None
+    return int(match.group(1), 36) / 1000
+
+
+class TicketBloomFilter:
+    """
+    Filtro de Bloom sobre los ticketId válidos.
+
+    Si might_contain() regresa False el ticket seguro no es nuestro (QR de
+    Wi-Fi, URLs, lecturas parciales) y se rechaza sin ir a DynamoDB. Un True
+    puede ser falso positivo con probabilidad ~fp_rate; en ese caso la
+    búsqueda normal responde 404.
+
+    Los ticketId creados cerca o después del build (ver ticket_created_at)
+    no se rechazan: el filtro no puede saber de ellos y se consulta DynamoDB.
+    """
+
+    def __init__(self, capacity: int = TICKET_FILTER_MIN_CAPACITY, fp_rate: float = TICKET_FILTER_FP_RATE):
+        self.capacity = max(1, capacity)
+        self.fp_rate = fp_rate
+        self.num_bits, self.num_hashes = bloom_size(self.capacity, fp_rate)
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._lock = threading.Lock()
+        self.count = 0
+
+        self.checks = 0
+        self.rejected = 0
+        self.recent_passed = 0
+        self.false_positives = 0
+        self.built_at: float | None = None
+        self.last_build_ms: float | None = None
+        self.last_error: str | None = None
+
+    @classmethod
+    def from_ticket_ids(cls, ticket_ids, fp_rate: float = TICKET_FILTER_FP_RATE,
+                        min_capacity: int = TICKET_FILTER_MIN_CAPACITY) -> "TicketBloomFilter":
+        ticket_ids = list(ticket_ids)
+        # Holgura x2 para absorber altas del día sin degradar el fp_rate
+        bloom = cls(capacity=max(min_capacity, 2 * len(ticket_ids)), fp_rate=fp_rate)
+        for ticket_id in ticket_ids:
+            bloom.add(ticket_id)
+        bloom.built_at = time.time()
+        return bloom
+
+    def _positions(self, ticket_id: str):
+        # Doble hashing (Kirsch–Mitzenmacher) sobre un solo digest
+        digest = hashlib.blake2b(ticket_id.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, ticket_id: str) -> None:
+        if not ticket_id:
+            return
+        positions = self._positions(ticket_id)
+        with self._lock:
+            for pos in positions:
+                self._bits[pos >> 3] |= 1 << (pos & 7)
+            self.count += 1
+
+    def might_contain(self, ticket_id: str) -> bool:
+        bits = self._bits
+        found = all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(ticket_id))
+        recent = not found and self._is_recent(ticket_id)
+        with self._lock:
+            self.checks += 1
+            if recent:
+                self.recent_passed += 1
+            elif not found:
+                self.rejected += 1
+        return found or recent
+
+    def _is_recent(self, ticket_id: str) -> bool:
+        created = ticket_created_at(ticket_id)
+        if created is None:
+            return False
+        # Tope en el futuro: un QR ajeno con el mismo formato no pasa por azar
+        return (self.built_at or 0) - TICKET_FILTER_RECENT_S <= created <= time.time() + 60
+
+    def record_false_positive(self) -> None:
+        """El caller avisa que un ticket pasó el filtro pero no existía."""
+        with self._lock:
+            self.false_positives += 1
+
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+    def estimated_fp_rate(self) -> float:
+        """(1 - e^(-k·n/m))^k con el número actual de elementos."""
+        k, n, m = self.num_hashes, self.count, self.num_bits
+        return (1 - math.exp(-k * n / m)) ** k
+
+    def stats(self) -> dict:
+        with self._lock:
+            passed = self.checks - self.rejected
+            return {
+                "tickets": self.count,
+                "capacity": self.capacity,
+                "bits": self.num_bits,
+                "hashes": self.num_hashes,
+                "memoryBytes": self.memory_bytes(),
+                "targetFpRate": self.fp_rate,
+                "estimatedFpRate": round(self.estimated_fp_rate(), 6),
+                "checks": self.checks,
+                "rejected": self.rejected,
+                "passed": passed,
+                "recentPassed": self.recent_passed,
+                "falsePositives": self.false_positives,
+                "observedFpRate": round(self.false_positives / passed, 6) if passed else None,
+                "builtAt": self.built_at,
+                "lastBuildMs": self.last_build_ms,
+                "lastError": self.last_error,
+            }
+
+
+class TicketFilter:
+    """
+    Mantiene un TicketBloomFilter vigente: lo construye desde el roster, lo
+    reconstruye en segundo plano (creciendo si hace falta) y acepta altas
+    incrementales con add().
+    """
+
+    def __init__(self, refresh_s: float = TICKET_FILTER_REFRESH_S, segments: int = TICKET_FILTER_SEGMENTS,
+                 source=None):
+        self.refresh_s = refresh_s
+        self.segments = max(1, segments)
+        # source: callable que regresa los ticketIds (p. ej. del índice en memoria)
+        self._source = source
+        self.bloom = TicketBloomFilter()
+        self._lock = threading.Lock()
+        # Altas recibidas mientras corre un build (se re-aplican al nuevo filtro)
+        self._adds_during_build: list[str] | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _scan_ticket_ids(self) -> list[str]:
+        def _segment(segment: int) -> list[str]:
+            return [
+                rec.ticket_id
+                for rec in EventUsersRepo.scan_segment_records(segment, self.segments)
+                if rec.ticket_id
+            ]
+
+        with ThreadPoolExecutor(max_workers=self.segments, thread_name_prefix="ticket-filter") as pool:
+            return [t for part in pool.map(_segment, range(self.segments)) for t in part]
+
+    def build(self) -> int:
+        start = time.perf_counter()
+        with self._lock:
+            self._adds_during_build = []
+        try:
+            ticket_ids = self._source() if self._source else None
+            if ticket_ids is None:
+                ticket_ids = self._scan_ticket_ids()
+            old = self.bloom
+            fresh = TicketBloomFilter.from_ticket_ids(ticket_ids, fp_rate=old.fp_rate)
+            fresh.last_build_ms = round((time.perf_counter() - start) * 1000, 1)
+            # Las métricas sobreviven al rebuild
+            fresh.checks, fresh.rejected, fresh.false_positives = old.checks, old.rejected, old.false_positives
+            fresh.recent_passed = old.recent_passed
+            with self._lock:
+                for ticket_id in self._adds_during_build:
+                    fresh.add(ticket_id)
+                self.bloom = fresh
+        finally:
+            with self._lock:
+                self._adds_during_build = None
+        return fresh.count
+
+    def add(self, ticket_id: str) -> None:
+        """Alta incremental (registro nuevo, walk-in, import)."""
+        with self._lock:
+            bloom = self.bloom
+            bloom.add(ticket_id)
+            if self._adds_during_build is not None:
+                self._adds_during_build.append(ticket_id)
+        if bloom.count > bloom.capacity:
+            # Se pasó de capacidad: el fp_rate sube hasta el siguiente rebuild
+            bloom.last_error = "capacidad excedida; pendiente rebuild"
+
+    def might_contain(self, ticket_id: str) -> bool:
+        return self.bloom.might_contain(ticket_id)
+
+    def record_false_positive(self) -> None:
+        self.bloom.record_false_positive()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_s):
+            try:
+                self.build()
+            except Exception as e:  # el filtro viejo sigue sirviendo
+                self.bloom.last_error = str(e)
+                print(f"[ticket-filter] rebuild falló: {e}")
+
+    def start_refresh(self) -> None:
+        if self.refresh_s <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name="ticket-filter-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return self.bloom.stats()
+
+
+def load_ticket_filter(source=None) -> TicketFilter | None:
+    """
+    Construye el filtro al arrancar si TICKET_FILTER_ENABLED está activo.
+    Si la carga inicial falla regresa None: sin filtro no se rechaza nada.
+    """
+    if not TICKET_FILTER_ENABLED:
+        return None
+    ticket_filter = TicketFilter(source=source)
+    try:
+        ticket_filter.build()
+    except Exception as e:
+        print(f"[ticket-filter] carga inicial falló: {e}")
+        return None
+    ticket_filter.start_refresh()
+    return ticket_filter
@@ -0,0 +1,170 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from repositories.attendee import AttendeeRecord
+from repositories.event_users_repo import EventUsersRepo
+
+TICKET_INDEX_ENABLED = os.getenv("TICKET_INDEX_ENABLED", "false").lower() in ("1", "true", "yes")
+TICKET_INDEX_SEGMENTS = int(os.getenv("TICKET_INDEX_SEGMENTS", "4"))
+TICKET_INDEX_REFRESH_S = float(os.getenv("TICKET_INDEX_REFRESH_S", "300"))
+TICKET_INDEX_MAX_ENTRIES = int(os.getenv("TICKET_INDEX_MAX_ENTRIES", "200000"))
+
+
+class TicketIndex:
+    """
+    Índice en memoria ticketId → AttendeeRecord precargado desde DynamoDB.
+
+    Se construye con un Scan paralelo segmentado, se refresca en un hilo de
+    fondo y está acotado a `max_entries` registros. Si un ticket no está en
+    el índice, el llamador debe ir a DynamoDB (y puede usar put() para
+    guardarlo).
+    """
+
+    def __init__(self, segments: int = TICKET_INDEX_SEGMENTS,
+                 refresh_s: float = TICKET_INDEX_REFRESH_S,
+                 max_entries: int = TICKET_INDEX_MAX_ENTRIES):
+        self.segments = max(1, segments)
+        self.refresh_s = refresh_s
+        self.max_entries = max_entries
+
+        self._entries: dict[str, AttendeeRecord] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self.hits = 0
+        self.misses = 0
+        self.truncated = False
+        self.loaded_at: float | None = None
+        self.last_build_ms: float | None = None
+        self.last_error: str | None = None
+
+    # ── Construcción ──────────────────────────────────────────────
+
+    def _scan_segment(self, segment: int) -> list[AttendeeRecord]:
+        return [
+            rec
+            for rec in EventUsersRepo.scan_segment_records(segment, self.segments)
+            if rec.ticket_id
+        ]
+
+    def build(self) -> int:
+        """Escanea la tabla completa y reemplaza el índice. Regresa el tamaño."""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.segments, thread_name_prefix="ticket-index") as pool:
+            parts = list(pool.map(self._scan_segment, range(self.segments)))
+
+        fresh: dict[str, AttendeeRecord] = {}
+        truncated = False
+        for records in parts:
+            for rec in records:
+                if len(fresh) >= self.max_entries:
+                    truncated = True
+                    break
+                fresh[rec.ticket_id] = rec
+
+        with self._lock:
+            # Un check-in hecho en este proceso mientras corría el Scan
+            # puede no venir en la página leída: se conserva el local.
+            for ticket_id, old in self._entries.items():
+                new = fresh.get(ticket_id)
+                if new is not None and old.checked_in and not new.checked_in:
+                    fresh[ticket_id] = old
+            self._entries = fresh
+            self.truncated = truncated
+            self.loaded_at = time.time()
+            self.last_build_ms = round((time.perf_counter() - start) * 1000, 1)
+            self.last_error = None
+        return len(fresh)
+
+    # ── Lecturas / escrituras ─────────────────────────────────────
+
+    def get(self, ticket_id: str) -> AttendeeRecord | None:
+        with self._lock:
+            rec = self._entries.get(ticket_id)
+            if rec is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return rec
+
+    def put(self, record: AttendeeRecord) -> None:
+        """Agrega o reemplaza un registro (respetando el límite de memoria)."""
+        if not record.ticket_id:
+            return
+        with self._lock:
+            if record.ticket_id not in self._entries and len(self._entries) >= self.max_entries:
+                self.truncated = True
+                return
+            self._entries[record.ticket_id] = record
+
+    def ticket_ids(self) -> list[str] | None:
+        """Todos los ticketId indexados, o None si el índice está truncado o nunca cargó."""
+        with self._lock:
+            return None if self.truncated or self.loaded_at is None else list(self._entries)
+
+    def records(self) -> list[AttendeeRecord] | None:
+        """Todos los registros indexados, o None si el índice está truncado o nunca cargó."""
+        with self._lock:
+            return None if self.truncated or self.loaded_at is None else list(self._entries.values())
+
+    def mark_checked_in(self, ticket_id: str, checked_in_at: str) -> None:
+        with self._lock:
+            rec = self._entries.get(ticket_id)
+            if rec is not None:
+                rec.checked_in = True
+                rec.checked_in_at = rec.checked_in_at or checked_in_at
+
+    # ── Refresco en segundo plano ─────────────────────────────────
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_s):
+            try:
+                self.build()
+            except Exception as e:  # el índice viejo sigue sirviendo
+                self.last_error = str(e)
+                print(f"[ticket-index] refresh falló: {e}")
+
+    def start_refresh(self) -> None:
+        if self.refresh_s <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name="ticket-index-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # ── Métricas ──────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "truncated": self.truncated,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / total, 4) if total else None,
+                "loadedAt": self.loaded_at,
+                "lastBuildMs": self.last_build_ms,
+                "lastError": self.last_error,
+            }
+
+
+def load_ticket_index() -> TicketIndex | None:
+    """Construye el índice al arrancar si TICKET_INDEX_ENABLED está activo."""
+    if not TICKET_INDEX_ENABLED:
+        return None
+    index = TicketIndex()
+    try:
+        index.build()
+    except Exception as e:
+        # Sin índice caliente seguimos funcionando contra DynamoDB
+        index.last_error = str(e)
+        print(f"[ticket-index] carga inicial falló: {e}")
+    index.start_refresh()
+    return index
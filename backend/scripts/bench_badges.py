@@ -0,0 +1,117 @@
+"""
+Benchmark del render de badges: badges/s antes y después del motor de templates.
+
+  - legacy: el build_badge_pdf anterior (todo el dibujo con reportlab en cada
+    badge, streams con ASCII85), copiado aquí tal cual para comparar
+  - template:<layout>: utils.badge_template (capa estática compilada en un
+    form, métricas de texto cacheadas, streams solo Flate)
+
+Uso (desde backend/):
+    python -m scripts.bench_badges --badges 2000 --rounds 3
+    python -m scripts.bench_badges --layouts classic bold-name
+"""
+
+import argparse
+import io
+import time
+
+from reportlab.lib.colors import HexColor
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+
+from utils.badge_layout import BADGE_LAYOUT
+from utils.badge_template import get_template
+
+_NAMES = ["Ana López", "José Pérez García de la Fuente", "María Fernanda Núñez Rodríguez", "Luis Ortega"]
+_PROFESSIONS = ["Estudiante", "Cloud Engineer", "Ingeniería en Sistemas Computacionales", "Docente"]
+
+
+def _legacy_badge(ticket_id: str, name: str, profession: str, checked_in_at: str) -> bytes:
+    width, height = 4 * inch, 2 * inch
+    margin, pad = 0.18 * inch, 0.10 * inch
+    usable_w = width - 2 * margin
+    usable_text_w = usable_w - 2 * pad
+
+    def fit_center(c, y, text, font, start, minimum):
+        size = start
+        while size > minimum and c.stringWidth(text, font, size) > usable_text_w:
+            size -= 1
+        c.setFont(font, size)
+        c.drawString((width - c.stringWidth(text, font, size)) / 2.0, y, text)
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(width, height))
+    c.setStrokeColor(HexColor("#CCCCCC"))
+    c.setLineWidth(0.75)
+    c.roundRect(margin, margin, usable_w, height - 2 * margin, radius=6)
+    header_h = 0.32 * inch
+    header_y = height - margin - header_h
+    c.setFillColor(HexColor("#000000"))
+    c.roundRect(margin, header_y, usable_w, header_h, radius=6, stroke=0, fill=1)
+    c.rect(margin, header_y, usable_w, header_h / 2, stroke=0, fill=1)
+    c.setFillColor(HexColor("#FFFFFF"))
+    c.setFont("Helvetica-Bold", 9)
+    c.drawString(margin + pad, header_y + 0.10 * inch, "AWS Community Student Day")
+    c.setFillColor(HexColor("#1A1A1A"))
+    fit_center(c, height - margin - 0.82 * inch, name, "Helvetica-Bold", 18, 12)
+    c.setFillColor(HexColor("#555555"))
+    fit_center(c, height - margin - 1.12 * inch, profession, "Helvetica", 11, 8)
+    sep_y = margin + 0.48 * inch
+    c.setStrokeColor(HexColor("#CCCCCC"))
+    c.setLineWidth(0.5)
+    c.line(margin + pad, sep_y, width - margin - pad, sep_y)
+    c.setFillColor(HexColor("#555555"))
+    c.setFont("Helvetica", 7)
+    footer_y = margin + 0.24 * inch
+    c.drawString(margin + pad, footer_y + 0.14 * inch, f"Ticket: {ticket_id}")
+    c.drawString(margin + pad, footer_y, f"CheckedInAt: {checked_in_at}")
+    c.setFillColor(HexColor("#000000"))
+    c.setFont("Helvetica-Bold", 7)
+    c.drawString(width - margin - pad - c.stringWidth("AWSQR", "Helvetica-Bold", 7), footer_y, "AWSQR")
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def _inputs(n: int) -> list[dict]:
+    return [{
+        "ticketId": f"TKT-2026-{i:08X}",
+        "name": _NAMES[i % len(_NAMES)],
+        "profession": _PROFESSIONS[i % len(_PROFESSIONS)],
+        "checkedInAt": "2026-03-15T09:30:00+00:00" if i % 3 == 0 else "N/A",
+    } for i in range(n)]
+
+
+def _run_legacy(inputs: list[dict]) -> int:
+    return sum(len(_legacy_badge(v["ticketId"], v["name"], v["profession"], v["checkedInAt"])) for v in inputs)
+
+
+def _runner(layout: str):
+    template = get_template(layout)
+    return lambda inputs: sum(len(template.render(v)) for v in inputs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del render de badges")
+    parser.add_argument("--badges", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--layouts", nargs="+", default=[BADGE_LAYOUT])
+    args = parser.parse_args()
+
+    inputs = _inputs(args.badges)
+    paths = [("legacy", _run_legacy)] + [(f"template:{name}", _runner(name)) for name in args.layouts]
+    baseline = None
+    print(f"{'path':<22} {'best ms':>10} {'badges/s':>10} {'avg bytes':>10} {'speedup':>8}")
+    for name, fn in paths:
+        best, size = float("inf"), 0
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            size = fn(inputs)
+            best = min(best, time.perf_counter() - start)
+        baseline = baseline or best
+        print(f"{name:<22} {best * 1000:>10.1f} {args.badges / best:>10,.0f} {size / args.badges:>10,.0f} "
+              f"{baseline / best:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
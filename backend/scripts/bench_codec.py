@@ -0,0 +1,70 @@
+"""
+Micro-benchmark del decodificado de items de DynamoDB.
+
+Compara, sobre una página sintética de resultados de Scan/Query:
+  - resource: TypeDeserializer completo (lo que hace boto3 Table) + dict
+  - lean_dict: db.codec.decode_item + AttendeeRecord.from_item
+  - lean_record: AttendeeRecord.from_ddb directo de los AttributeValues
+
+Uso (desde backend/):
+    python -m scripts.bench_codec --items 50000 --rounds 5
+"""
+
+import argparse
+import time
+
+from db.codec import decode_item, deserialize_item, serialize_item
+from repositories.attendee import AttendeeRecord
+
+_PROFESSIONS = ["Estudiante", "Cloud Engineer", "Docente", "DevOps", "Data Scientist"]
+
+
+def _sample_page(n: int) -> list[dict]:
+    page = []
+    for i in range(n):
+        item = {
+            "userId": f"usr-{i:06d}",
+            "ticketId": f"TKT-2026-{i:08X}",
+            "name": f"Asistente Número {i}",
+            "profession": _PROFESSIONS[i % len(_PROFESSIONS)],
+            "checkedIn": i % 3 == 0,
+        }
+        if item["checkedIn"]:
+            item["checkedInAt"] = "2026-03-15T09:30:00+00:00"
+        page.append(serialize_item(item))
+    return page
+
+
+def _resource(page):
+    return [AttendeeRecord.from_item(deserialize_item(raw)) for raw in page]
+
+
+def _lean_dict(page):
+    return [AttendeeRecord.from_item(decode_item(raw)) for raw in page]
+
+
+def _lean_record(page):
+    return [AttendeeRecord.from_ddb(raw) for raw in page]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del codec de DynamoDB")
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    page = _sample_page(args.items)
+    baseline = None
+    print(f"{'path':<12} {'best ms':>10} {'items/s':>12} {'speedup':>8}")
+    for name, fn in (("resource", _resource), ("lean_dict", _lean_dict), ("lean_record", _lean_record)):
+        best = float("inf")
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            fn(page)
+            best = min(best, time.perf_counter() - start)
+        baseline = baseline or best
+        print(f"{name:<12} {best * 1000:>10.1f} {args.items / best:>12,.0f} {baseline / best:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
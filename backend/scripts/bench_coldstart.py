@@ -0,0 +1,146 @@
+"""
+Benchmark de cold start: costo de importar main.py y del primer request.
+
+Corre varios intérpretes nuevos con `python -X importtime -c "import main"`
+y reporta la mediana por paquete (tiempo propio de todos sus módulos) y
+por módulo de la app (tiempo acumulado). Con --first-request también mide
+import + primera invocación del handler de Mangum (GET /health) contra el
+backend en memoria, sin red.
+
+Uso (desde backend/):
+    python -m scripts.bench_coldstart --runs 7
+    python -m scripts.bench_coldstart --lambda --first-request
+    python -m scripts.bench_coldstart --lambda --budget-ms 450   # exit 1 si se pasa
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+_APP_PACKAGES = ("main", "db", "repositories", "utils", "printer")
+
+_FIRST_REQUEST = """
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+event = {
+    "version": "2.0", "routeKey": "$default", "rawPath": "/health", "rawQueryString": "",
+    "headers": {"host": "localhost"},
+    "requestContext": {"http": {"method": "GET", "path": "/health", "sourceIp": "127.0.0.1",
+                                "protocol": "HTTP/1.1", "userAgent": "bench"},
+                       "stage": "$default", "requestId": "bench", "accountId": "0", "apiId": "bench",
+                       "domainName": "localhost", "time": "", "timeEpoch": 0},
+    "isBase64Encoded": False,
+}
+resp = main.handler(event, None)
+t2 = time.perf_counter()
+print(json.dumps({"importMs": (t1 - t0) * 1000, "firstRequestMs": (t2 - t1) * 1000,
+                  "status": resp.get("statusCode")}))
+"""
+
+
+def _env(simulate_lambda: bool) -> dict:
+    env = dict(os.environ)
+    if simulate_lambda:
+        env["AWS_LAMBDA_FUNCTION_NAME"] = env.get("AWS_LAMBDA_FUNCTION_NAME", "bench-coldstart")
+    # Sin red: el pre-init y el prewarm van contra el backend en memoria
+    env.setdefault("DDB_BACKEND", "memory")
+    env.setdefault("DDB_PREWARM_CONNECTIONS", "0")
+    return env
+
+
+def _import_profile(env: dict) -> tuple[float, dict[str, int], dict[str, int]]:
+    """Una corrida: (total µs, propio por paquete, acumulado por módulo de la app)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                          capture_output=True, text=True, env=env, check=True)
+    by_package: dict[str, int] = defaultdict(int)
+    app_modules: dict[str, int] = {}
+    total = 0
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = int(match[1]), int(match[2]), match[3], match[4]
+        by_package[module.split(".")[0]] += self_us
+        if module.split(".")[0] in _APP_PACKAGES:
+            app_modules[module] = cumulative_us
+        if module == "main" and not indent:
+            total = cumulative_us
+    return total, by_package, app_modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Costo de import / cold start de main.py")
+    parser.add_argument("--runs", type=int, default=5, help="intérpretes nuevos (se reporta la mediana)")
+    parser.add_argument("--top", type=int, default=15, help="paquetes a mostrar")
+    parser.add_argument("--lambda", dest="simulate_lambda", action="store_true",
+                        help="simula Lambda (AWS_LAMBDA_FUNCTION_NAME): sin agente de impresión, con pre-init")
+    parser.add_argument("--first-request", action="store_true", help="mide también la primera invocación")
+    parser.add_argument("--budget-ms", type=float, help="falla si la mediana de import main la excede")
+    parser.add_argument("--json", action="store_true", help="salida JSON (para CI)")
+    args = parser.parse_args()
+
+    env = _env(args.simulate_lambda)
+    totals, packages, modules = [], defaultdict(list), defaultdict(list)
+    for _ in range(max(1, args.runs)):
+        total, by_package, app_modules = _import_profile(env)
+        totals.append(total)
+        for name, us in by_package.items():
+            packages[name].append(us)
+        for name, us in app_modules.items():
+            modules[name].append(us)
+
+    def _median_ms(values: list[int]) -> float:
+        return round(statistics.median(values) / 1000, 1)
+
+    result = {
+        "mode": "lambda" if args.simulate_lambda else "server",
+        "runs": len(totals),
+        "importMainMs": _median_ms(totals),
+        "packagesMs": dict(sorted(((k, _median_ms(v)) for k, v in packages.items()),
+                                  key=lambda kv: -kv[1])[:args.top]),
+        "appModulesMs": dict(sorted(((k, _median_ms(v)) for k, v in modules.items()),
+                                    key=lambda kv: -kv[1])),
+    }
+    if args.first_request:
+        samples = [
+            json.loads(subprocess.run([sys.executable, "-c", _FIRST_REQUEST], capture_output=True, text=True,
+                                      env=env, check=True).stdout.strip().splitlines()[-1])
+            for _ in range(max(1, args.runs))
+        ]
+        result["firstRequest"] = {
+            "importMs": round(statistics.median(s["importMs"] for s in samples), 1),
+            "firstRequestMs": round(statistics.median(s["firstRequestMs"] for s in samples), 1),
+            "status": samples[-1]["status"],
+        }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"[coldstart] modo={result['mode']} runs={result['runs']} import main: {result['importMainMs']} ms (mediana)")
+        print(f"{'paquete':<28} {'ms propio':>10}")
+        for name, ms in result["packagesMs"].items():
+            print(f"{name:<28} {ms:>10.1f}")
+        print(f"\n{'módulo de la app':<40} {'ms acumulado':>12}")
+        for name, ms in result["appModulesMs"].items():
+            print(f"{name:<40} {ms:>12.1f}")
+        if "firstRequest" in result:
+            fr = result["firstRequest"]
+            print(f"\n[coldstart] import {fr['importMs']} ms + primera invocación {fr['firstRequestMs']} ms "
+                  f"(status {fr['status']})")
+
+    if args.budget_ms is not None and result["importMainMs"] > args.budget_ms:
+        print(f"[coldstart] import main {result['importMainMs']} ms excede el presupuesto de {args.budget_ms} ms",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
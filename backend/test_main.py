@@ -0,0 +1,254 @@
+"""
+Test suite for the HTTP API (main.py) through FastAPI's TestClient.
+
+DynamoDB is never contacted: every test runs against the in-memory
+backend (db.memory_backend, the same one DDB_BACKEND=memory uses).
+Run:  python -m pytest test_main.py -v
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from db import dynamo
+from db.memory_backend import MemoryDynamoClient, seed_attendees
+from repositories import attendance_repo
+from utils.idempotency import IdempotencyStore
+from utils.singleflight import SingleFlight
+
+
+@pytest.fixture
+def memory_client():
+    client = MemoryDynamoClient.for_event_users(dynamo.TABLE_NAME, latency_ms=0, jitter_ms=0,
+                                                slow_rate=0, throttle_rate=0)
+    seed_attendees(client, dynamo.TABLE_NAME, 20)
+    dynamo.use_client(client)
+    yield client
+    dynamo.use_client(None)
+
+
+@pytest.fixture
+def api(memory_client, monkeypatch):
+    # Resultados recientes e Idempotency-Keys no pasan de una prueba a otra
+    monkeypatch.setattr(main, "coalescer", SingleFlight(window_s=main.COALESCE_WINDOW_S))
+    monkeypatch.setattr(main, "idempotency", IdempotencyStore())
+    with TestClient(main.app) as client:
+        yield client
+
+
+def _ticket(client: MemoryDynamoClient, n: int) -> str:
+    return client.tables[dynamo.TABLE_NAME].items[f"usr-{n:06d}"]["ticketId"]["S"]
+
+
+_PDF = {"Accept": "application/pdf"}
+
+
+# ── /badge ───────────────────────────────────────────────────────
+
+
+class TestBadge:
+    def test_json_and_binary(self, api, memory_client):
+        ticket_id = _ticket(memory_client, 1)
+        r = api.post("/badge", json={"ticketId": ticket_id})
+        assert r.status_code == 200
+        body = r.json()
+        assert body["ticketId"] == ticket_id and body["checkedIn"] is False and body["pdfBase64"]
+
+        r = api.post("/badge", json={"ticketId": ticket_id}, headers=_PDF)
+        assert r.status_code == 200
+        assert r.headers["content-type"] == "application/pdf" and r.content.startswith(b"%PDF")
+        assert r.headers["X-Ticket-Id"] == ticket_id and r.headers["X-Checked-In"] == "false"
+        assert r.headers["ETag"]
+
+    def test_matching_if_none_match_is_412(self, api, memory_client):
+        ticket_id = _ticket(memory_client, 2)
+        etag = api.post("/badge", json={"ticketId": ticket_id}, headers=_PDF).headers["ETag"]
+
+        r = api.post("/badge", json={"ticketId": ticket_id}, headers=_PDF | {"If-None-Match": etag})
+        assert r.status_code == 412 and r.content == b""
+        assert r.headers["ETag"] == etag
+
+        r = api.post("/badge", json={"ticketId": ticket_id}, headers=_PDF | {"If-None-Match": '"otro"'})
+        assert r.status_code == 200 and r.content.startswith(b"%PDF")
+
+    def test_unknown_ticket(self, api):
+        assert api.post("/badge", json={"ticketId": "TKT-NOPE"}).status_code == 404
+        assert api.post("/badge", json={"ticketId": "  "}).status_code == 400
+
+
+# ── /pdf ─────────────────────────────────────────────────────────
+
+
+class TestPdf:
+    def test_json_and_binary(self, api):
+        r = api.post("/pdf", json={"id": "TKT-1"})
+        assert r.status_code == 200
+        assert r.json()["contentType"] == "application/pdf" and r.json()["pdfBase64"]
+
+        r = api.post("/pdf", json={"id": "TKT-1"}, headers={"Accept": "application/pdf"})
+        assert r.status_code == 200
+        assert r.headers["content-type"] == "application/pdf" and r.content.startswith(b"%PDF")
+
+
+# ── /checkin y /walkin ───────────────────────────────────────────
+
+
+class TestCheckin:
+    def test_json_and_binary(self, api, memory_client):
+        r = api.post("/checkin", json={"ticketId": _ticket(memory_client, 3)})
+        assert r.status_code == 200
+        body = r.json()
+        assert body["checkedIn"] is True and body["alreadyCheckedIn"] is False and body["pdfBase64"]
+
+        ticket_id = _ticket(memory_client, 4)
+        r = api.post("/checkin", json={"ticketId": ticket_id}, headers=_PDF)
+        assert r.status_code == 200 and r.content.startswith(b"%PDF")
+        assert r.headers["X-Ticket-Id"] == ticket_id
+        assert r.headers["X-Checked-In"] == "true" and r.headers["X-Already-Checked-In"] == "false"
+
+        r = api.post("/checkin", json={"ticketId": ticket_id}, headers=_PDF | {"If-None-Match": r.headers["ETag"]})
+        assert r.status_code == 412
+
+    def test_coalesced_taps_see_the_checkin_as_done(self, api, memory_client):
+        ticket_id = _ticket(memory_client, 12)
+        with ThreadPoolExecutor(3) as pool:
+            responses = list(pool.map(lambda _: api.post("/checkin", json={"ticketId": ticket_id}), range(3)))
+        # Dentro de COALESCE_WINDOW_S el resultado se reutiliza
+        responses.append(api.post("/checkin", json={"ticketId": ticket_id}))
+
+        bodies = [r.json() for r in responses]
+        assert [b["alreadyCheckedIn"] for b in bodies].count(False) == 1
+        assert len({b["checkedInAt"] for b in bodies}) == 1
+        assert main.coalescer.stats()["executed"] == 1
+
+    def test_batch_dedupes_tickets(self, api, memory_client):
+        first, second = _ticket(memory_client, 5), _ticket(memory_client, 6)
+        r = api.post("/checkin/batch", json={"ticketIds": [first, f" {first} ", first, second, "TKT-NOPE", ""],
+                                             "includePdf": False})
+        assert r.status_code == 200
+        body = r.json()
+        assert (body["total"], body["checkedIn"], body["alreadyCheckedIn"], body["failed"]) == (3, 2, 0, 1)
+        assert [res["ticketId"] for res in body["results"]] == [first, second, "TKT-NOPE"]
+        assert body["results"][2]["status"] == 404
+        assert all("pdfBase64" not in res for res in body["results"])
+
+        body = api.post("/checkin/batch", json={"ticketIds": [first, second]}).json()
+        assert (body["checkedIn"], body["alreadyCheckedIn"]) == (0, 2)
+        assert all(res["pdfBase64"] for res in body["results"])
+
+
+class TestWalkin:
+    def test_json_and_binary(self, api):
+        r = api.post("/walkin", json={"name": "  Ana   López ", "profession": "Estudiante"})
+        assert r.status_code == 200
+        body = r.json()
+        assert body["name"] == "Ana López" and body["checkedIn"] is True and body["pdfBase64"]
+
+        r = api.post("/walkin", json={"name": "Luis Pérez"}, headers=_PDF)
+        assert r.status_code == 200 and r.content.startswith(b"%PDF")
+        assert r.headers["X-Attendee-Name"] == "Luis%20P%C3%A9rez"
+        assert r.headers["X-Ticket-Id"] != body["ticketId"]
+
+        assert api.post("/walkin", json={"name": " "}).status_code == 400
+
+
+# ── Idempotency-Key ──────────────────────────────────────────────
+
+
+class TestIdempotency:
+    def test_replay_and_mismatch(self, api, memory_client):
+        headers = {"Idempotency-Key": "checkin-1"}
+        ticket_id = _ticket(memory_client, 7)
+        first = api.post("/checkin", json={"ticketId": ticket_id}, headers=headers)
+        replay = api.post("/checkin", json={"ticketId": ticket_id}, headers=headers)
+        assert first.status_code == replay.status_code == 200
+        assert replay.json() == first.json()
+        assert replay.headers["Idempotent-Replayed"] == "true"
+
+        binary = api.post("/checkin", json={"ticketId": ticket_id}, headers=headers | _PDF)
+        assert binary.content.startswith(b"%PDF") and binary.headers["Idempotent-Replayed"] == "true"
+
+        other = api.post("/checkin", json={"ticketId": _ticket(memory_client, 8)}, headers=headers)
+        assert other.status_code == 422
+        stats = main.idempotency.stats()
+        assert (stats["stored"], stats["replayed"], stats["mismatched"]) == (1, 2, 1)
+
+    def test_retry_while_in_flight_runs_once(self, api, monkeypatch):
+        original, calls = main.AsyncEventUsersRepo.create_walkin, []
+
+        async def _slow_create(*args):
+            calls.append(args)
+            await asyncio.sleep(0.3)
+            return await original(*args)
+
+        monkeypatch.setattr(main.AsyncEventUsersRepo, "create_walkin", staticmethod(_slow_create))
+        headers = {"Idempotency-Key": "walkin-retry"}
+        with ThreadPoolExecutor(3) as pool:
+            first = pool.submit(api.post, "/walkin", json={"name": "Ana López"}, headers=headers)
+            time.sleep(0.1)   # el cliente se cansó de esperar y reintenta
+            retry = pool.submit(api.post, "/walkin", json={"name": "Ana López"}, headers=headers)
+            other = pool.submit(api.post, "/walkin", json={"name": "Otra Persona"}, headers=headers)
+            first, retry, other = first.result(), retry.result(), other.result()
+
+        assert len(calls) == 1
+        assert first.status_code == retry.status_code == 200
+        assert first.json()["ticketId"] == retry.json()["ticketId"]
+        assert "Idempotent-Replayed" not in first.headers
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert other.status_code == 422
+
+
+# ── /badges/sheet, /stats y /export ──────────────────────────────
+
+
+class TestBadgeSheet:
+    def test_sheet_headers(self, api, memory_client):
+        ticket_ids = [_ticket(memory_client, n) for n in (1, 2, 3)]
+        r = api.post("/badges/sheet", json={"ticketIds": ticket_ids, "paper": "a4"})
+        assert r.status_code == 200 and r.content.startswith(b"%PDF")
+        assert r.headers["content-type"] == "application/pdf"
+        assert r.headers["Content-Disposition"] == 'attachment; filename="badges-a4.pdf"'
+        assert r.headers["X-Badge-Count"] == "3" and int(r.headers["X-Sheet-Count"]) >= 1
+
+        r = api.post("/badges/sheet", json={"ticketIds": [ticket_ids[0], "TKT-NOPE"]})
+        assert r.status_code == 404
+
+
+class TestStats:
+    def test_counts_checkins(self, api, memory_client, monkeypatch):
+        assert api.get("/stats").status_code == 503
+        monkeypatch.setattr(main, "ATTENDANCE_TRACKING_ENABLED", True)
+        monkeypatch.setattr(attendance_repo, "ATTENDANCE_TRACKING_ENABLED", True)
+
+        for n in (9, 10, 9):
+            assert api.post("/checkin", json={"ticketId": _ticket(memory_client, n)}).status_code == 200
+        body = api.get("/stats").json()
+        assert body["ok"] is True and body["checkedIn"] == 2
+        assert sum(body["byProfession"].values()) == 2
+
+
+class TestExport:
+    def test_csv_and_ndjson(self, api, memory_client):
+        api.post("/checkin", json={"ticketId": _ticket(memory_client, 11)})
+
+        r = api.get("/export")
+        assert r.status_code == 200
+        assert r.headers["Content-Disposition"] == 'attachment; filename="asistentes.csv"'
+        lines = r.text.strip().splitlines()
+        assert lines[0].split(",") == ["userId", "ticketId", "name", "profession", "checkedIn", "checkedInAt"]
+        assert len(lines) == 21
+        assert {line.split(",")[4] for line in lines[1:]} == {"true", "false"}
+
+        r = api.get("/export", params={"format": "ndjson", "checkedIn": "true"})
+        rows = [json.loads(line) for line in r.text.strip().splitlines()]
+        assert [row["ticketId"] for row in rows] == [_ticket(memory_client, 11)]
+        assert rows[0]["checkedIn"] is True
+
+        assert api.get("/export", params={"format": "xml"}).status_code == 400
@@ -0,0 +1,279 @@
+"""
+Cache de PDFs de badge direccionado por contenido.
+
+La llave es el hash de lo que se dibuja (layout, ticketId, name, profession,
+checkedInAt): el mismo badge siempre da los mismos bytes (reportlab en modo
+invariant), así el preview de /badge, el de /checkin de un duplicado y las
+reimpresiones salen del cache. Un check-in cambia checkedInAt y con eso la
+llave; no hay que invalidar nada.
+
+Memoria (LRU acotada por bytes) al frente y, si BADGE_CACHE_DIR está
+configurado, disco detrás (compartido entre workers) con desalojo de los
+archivos más viejos al pasar de BADGE_CACHE_DISK_MB.
+
+Pre-generar los previews antes del evento (desde backend/):
+    python -m utils.badge_cache pregen --workers 8
+    python -m utils.badge_cache pregen --from-export ./export/data
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.badge_layout import layout_version
+
+BADGE_CACHE_ENABLED = os.getenv("BADGE_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+BADGE_CACHE_MEMORY_MB = float(os.getenv("BADGE_CACHE_MEMORY_MB", "32"))
+BADGE_CACHE_DIR = os.getenv("BADGE_CACHE_DIR", "")
+BADGE_CACHE_DISK_MB = float(os.getenv("BADGE_CACHE_DISK_MB", "256"))
+
+# Al desalojar se baja hasta este porcentaje del límite (no en cada escritura)
+_DISK_LOW_WATERMARK = 0.9
+
+
+def badge_digest(ticket_id: str, name: str, profession: str, checked_in_at: str, layout: str | None = None) -> str:
+    """Hash (hex) de los datos que se dibujan en el badge y del layout."""
+    data = "\x1f".join((layout_version(layout), ticket_id, name, profession, checked_in_at))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class BadgeCache:
+    """LRU en memoria + archivos en disco, llave = badge_digest."""
+
+    def __init__(self, memory_mb: float = BADGE_CACHE_MEMORY_MB, directory: str = BADGE_CACHE_DIR,
+                 disk_mb: float = BADGE_CACHE_DISK_MB):
+        self.memory_limit = int(memory_mb * 1024 * 1024)
+        self.directory = directory
+        self.disk_limit = int(disk_mb * 1024 * 1024)
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes: int | None = None   # se mide en la primera escritura
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        self.disk_errors = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pdf")
+
+    # ── Memoria ──────────────────────────────────────────────────
+
+    def _get_memory(self, key: str) -> bytes | None:
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is not None:
+                self._entries.move_to_end(key)
+            return pdf
+
+    def _put_memory(self, key: str, pdf: bytes) -> None:
+        if len(pdf) > self.memory_limit:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old)
+            self._entries[key] = pdf
+            self._memory_bytes += len(pdf)
+            while self._memory_bytes > self.memory_limit:
+                _, evicted = self._entries.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    # ── Disco ────────────────────────────────────────────────────
+
+    def _get_disk(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                pdf = f.read()
+            os.utime(path)   # el desalojo va por mtime: un hit lo renueva
+            return pdf
+        except FileNotFoundError:
+            return None
+        except OSError:
+            self.disk_errors += 1
+            return None
+
+    def _files(self) -> list[tuple[float, int, str]]:
+        files = []
+        for sub in os.scandir(self.directory):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith(".pdf"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:   # otro proceso lo desalojó
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _put_disk(self, key: str, pdf: bytes) -> None:
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(pdf)
+            os.replace(tmp, path)
+        except OSError:
+            self.disk_errors += 1
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._files())
+            else:
+                self._disk_bytes += len(pdf)
+            over = self._disk_bytes > self.disk_limit
+        if over:
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Borra los archivos con mtime más viejo hasta quedar bajo el límite."""
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        target = self.disk_limit * _DISK_LOW_WATERMARK
+        evicted = 0
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self.disk_evictions += evicted
+
+    # ── API ──────────────────────────────────────────────────────
+
+    def get(self, key: str) -> bytes | None:
+        pdf = self._get_memory(key)
+        if pdf is not None:
+            with self._lock:
+                self.hits += 1
+            return pdf
+        if self.directory:
+            pdf = self._get_disk(key)
+            if pdf is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._put_memory(key, pdf)
+                return pdf
+        return None
+
+    def contains(self, key: str) -> bool:
+        return self._get_memory(key) is not None or bool(self.directory and os.path.exists(self._path(key)))
+
+    def put(self, key: str, pdf: bytes) -> None:
+        self._put_memory(key, pdf)
+        if self.directory:
+            self._put_disk(key, pdf)
+
+    def get_or_render(self, key: str, render) -> bytes:
+        pdf = self.get(key)
+        if pdf is None:
+            with self._lock:
+                self.misses += 1
+            pdf = render()
+            self.put(key, pdf)
+        return pdf
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, disk_hits, misses = self.hits, self.disk_hits, self.misses
+            entries, memory_bytes, disk_bytes = len(self._entries), self._memory_bytes, self._disk_bytes
+        lookups = hits + disk_hits + misses
+        return {
+            "memoryEntries": entries,
+            "memoryBytes": memory_bytes,
+            "memoryLimitBytes": self.memory_limit,
+            "directory": self.directory or None,
+            "diskBytes": disk_bytes,
+            "diskLimitBytes": self.disk_limit if self.directory else None,
+            "hits": hits,
+            "diskHits": disk_hits,
+            "misses": misses,
+            "hitRatio": round((hits + disk_hits) / lookups, 4) if lookups else None,
+            "diskEvictions": self.disk_evictions,
+            "diskErrors": self.disk_errors,
+        }
+
+
+badge_cache = BadgeCache() if BADGE_CACHE_ENABLED else None
+
+
+# ── Pre-generación ───────────────────────────────────────────────
+
+def preview_inputs(rec) -> tuple[str, str, str, str]:
+    """Lo que dibuja /badge para un AttendeeRecord (mismos defaults que main)."""
+    return (rec.ticket_id, (rec.name or "UNKNOWN").strip(), (rec.profession or "N/A").strip(),
+            rec.checked_in_at or "N/A")
+
+
+def _pregen_chunk(args: tuple) -> tuple[int, int]:
+    """Worker: renderiza al cache en disco los badges que no estén. (renderizados, ya estaban)."""
+    from utils.badge_template import get_template
+
+    directory, layout, chunk = args
+    cache = BadgeCache(memory_mb=0, directory=directory)
+    template = get_template(layout)
+    rendered = skipped = 0
+    for ticket_id, name, profession, checked_in_at in chunk:
+        key = badge_digest(ticket_id, name, profession, checked_in_at, layout)
+        if cache.contains(key):
+            skipped += 1
+            continue
+        cache.put(key, template.render({"ticketId": ticket_id, "name": name, "profession": profession,
+                                        "checkedInAt": checked_in_at}))
+        rendered += 1
+    return rendered, skipped
+
+
+def pregenerate(records, directory: str, layout: str | None = None, workers: int = os.cpu_count() or 2,
+                chunk_size: int = 200) -> dict:
+    """Renderiza en paralelo (procesos: el render es CPU) el preview de cada asistente."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    inputs = [preview_inputs(rec) for rec in records if rec.ticket_id]
+    chunks = [(directory, layout, inputs[i:i + chunk_size]) for i in range(0, len(inputs), chunk_size)]
+    rendered = skipped = 0
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        for done, skip in pool.map(_pregen_chunk, chunks):
+            rendered += done
+            skipped += skip
+    return {"attendees": len(inputs), "rendered": rendered, "skipped": skipped}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cache de PDFs de badge")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pregen = sub.add_parser("pregen", help="renderiza al disco el preview de todos los asistentes")
+    pregen.add_argument("--dir", default=BADGE_CACHE_DIR, help="directorio del cache (default: BADGE_CACHE_DIR)")
+    pregen.add_argument("--layout", help="layout (default: BADGE_LAYOUT)")
+    pregen.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    pregen.add_argument("--from-export", help="export DYNAMODB_JSON de S3 (archivo o directorio) en vez de Scan")
+    pregen.add_argument("--segments", type=int, default=4, help="segmentos del Scan paralelo")
+    args = parser.parse_args()
+
+    if not args.dir:
+        raise SystemExit("[badge-cache] define BADGE_CACHE_DIR o --dir")
+    from repositories.roster_snapshot import export_records, scan_records
+
+    start = time.perf_counter()
+    records = export_records(args.from_export) if args.from_export else scan_records(args.segments)
+    result = pregenerate(records, args.dir, args.layout, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"[badge-cache] {result['rendered']} renderizados, {result['skipped']} ya estaban "
+          f"({result['attendees']} asistentes) en {elapsed:.1f}s → {args.dir}")
+
+
+if __name__ == "__main__":
+    main()
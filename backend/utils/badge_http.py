@@ -0,0 +1,81 @@
+"""
+Respuesta binaria del badge: application/pdf con los datos del asistente
+en headers, en vez de pdfBase64 dentro del JSON (~33% más bytes).
+
+Se pide con `Accept: application/pdf`. El ETag sale de los datos que
+entran al PDF, así un `If-None-Match` con el mismo badge regresa 412
+(los endpoints son POST: RFC 9110 §13.1.2).
+"""
+
+import re
+from urllib.parse import quote
+
+from utils.badge_cache import badge_digest
+
+# Headers que el navegador puede leer con CORS
+BADGE_HEADERS = [
+    "ETag", "Content-Disposition", "X-Ticket-Id", "X-User-Id", "X-Attendee-Name", "X-Attendee-Profession",
+    "X-Checked-In", "X-Checked-In-At", "X-Already-Checked-In", "X-Signed-Ticket", "Idempotent-Replayed",
+    "X-Badge-Count", "X-Sheet-Count",
+]
+
+_FILENAME_UNSAFE = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def wants_pdf(accept: str | None) -> bool:
+    """True si el Accept incluye application/pdf (con q > 0); */* no cuenta."""
+    for part in (accept or "").split(","):
+        media, _, params = part.partition(";")
+        if media.strip().lower() != "application/pdf":
+            continue
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def badge_etag(ticket_id: str, name: str, profession: str, checked_in_at: str) -> str:
+    """ETag fuerte: la misma huella que la llave del cache de badges."""
+    return '"' + badge_digest(ticket_id, name, profession, checked_in_at)[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110): lista, W/ y '*'."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def badge_headers(result: dict) -> dict[str, str]:
+    """Campos del JSON del badge como headers (texto libre en percent-encoding UTF-8)."""
+    ticket_id = result["ticketId"]
+    headers = {
+        "X-Ticket-Id": quote(ticket_id, safe=""),
+        "X-User-Id": quote(result.get("userId") or "", safe=""),
+        "X-Attendee-Name": quote(result.get("name") or "", safe=""),
+        "X-Attendee-Profession": quote(result.get("profession") or "", safe=""),
+        "X-Checked-In-At": quote(result.get("checkedInAt") or "", safe=":+"),
+        "Content-Disposition": f'inline; filename="badge_{_FILENAME_UNSAFE.sub("_", ticket_id)}.pdf"',
+        # El PDF cambia con el check-in: siempre revalidar
+        "Cache-Control": "private, no-cache",
+    }
+    if result.get("checkedIn") is not None:
+        headers["X-Checked-In"] = "true" if result["checkedIn"] else "false"
+    if "alreadyCheckedIn" in result:
+        headers["X-Already-Checked-In"] = "true" if result["alreadyCheckedIn"] else "false"
+    if result.get("signedTicket"):
+        headers["X-Signed-Ticket"] = result["signedTicket"]
+    return headers
@@ -0,0 +1,112 @@
+"""
+Layouts del badge en JSON: se agregan o cambian sin tocar código.
+
+BADGE_LAYOUT es un nombre (utils/badge_layouts/<nombre>.json o el
+directorio de BADGE_LAYOUTS_DIR) o la ruta a un .json. Este módulo solo
+lee y valida el JSON (sin reportlab); utils/badge_template lo compila.
+
+Unidades: posiciones y tamaños en pulgadas; font size, lineWidth y radius
+en puntos. `align` (left|center|right) indica qué punto es `x`.
+
+    {
+      "size": [4, 2],
+      "static": [{"type": "roundRect", "x": 0.18, "y": 0.18, "w": 3.64, "h": 1.64,
+                  "radius": 6, "stroke": "#CCCCCC", "lineWidth": 0.75}, ...],
+      "fields": [{"text": "{name}", "x": 2, "y": 1, "align": "center", "font": "Helvetica-Bold",
+                  "size": 18, "minSize": 12, "maxWidth": 3.44, "color": "#1A1A1A"}, ...]
+    }
+
+`static` (roundRect, rect, line, text) se dibuja una vez por documento;
+`fields` son los textos con {ticketId}, {name}, {profession} y
+{checkedInAt}. Con minSize/maxWidth el texto baja de tamaño hasta caber.
+"""
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+from string import Formatter
+
+BADGE_LAYOUT = os.getenv("BADGE_LAYOUT", "classic")
+BADGE_LAYOUTS_DIR = os.getenv("BADGE_LAYOUTS_DIR", os.path.join(os.path.dirname(__file__), "badge_layouts"))
+
+# Subir cuando cambie cómo se dibuja un layout (invalida ETags y caches)
+ENGINE_VERSION = "2"
+
+BADGE_FIELDS = ("ticketId", "name", "profession", "checkedInAt")
+_STATIC_TYPES = {
+    "roundRect": ("x", "y", "w", "h"),
+    "rect": ("x", "y", "w", "h"),
+    "line": ("x1", "y1", "x2", "y2"),
+    "text": ("x", "y", "text", "font", "size"),
+}
+_ALIGNS = ("left", "center", "right")
+
+
+def _layout_path(name: str) -> str:
+    if name.endswith(".json"):
+        return name
+    if not name.replace("-", "").replace("_", "").isalnum():
+        raise ValueError(f"nombre de layout inválido: {name!r}")
+    return os.path.join(BADGE_LAYOUTS_DIR, f"{name}.json")
+
+
+def _check_text(where: str, element: dict) -> None:
+    if element.get("align", "left") not in _ALIGNS:
+        raise ValueError(f"{where}: align debe ser {', '.join(_ALIGNS)}")
+    if "minSize" in element and "maxWidth" not in element:
+        raise ValueError(f"{where}: minSize requiere maxWidth")
+
+
+def validate_layout(layout: dict, name: str = "layout") -> dict:
+    """Lanza ValueError con el elemento que está mal; regresa el layout."""
+    size = layout.get("size")
+    if not (isinstance(size, list) and len(size) == 2 and all(isinstance(v, (int, float)) and v > 0 for v in size)):
+        raise ValueError(f"{name}: size debe ser [ancho, alto] en pulgadas")
+
+    for i, element in enumerate(layout.get("static", [])):
+        where = f"{name}: static[{i}]"
+        required = _STATIC_TYPES.get(element.get("type"))
+        if required is None:
+            raise ValueError(f"{where}: type debe ser {', '.join(_STATIC_TYPES)}")
+        missing = [k for k in required if k not in element]
+        if missing:
+            raise ValueError(f"{where}: faltan {', '.join(missing)}")
+        if element["type"] == "text":
+            _check_text(where, element)
+
+    fields = layout.get("fields")
+    if not fields:
+        raise ValueError(f"{name}: fields vacío")
+    for i, field in enumerate(fields):
+        where = f"{name}: fields[{i}]"
+        missing = [k for k in ("text", "x", "y", "font", "size") if k not in field]
+        if missing:
+            raise ValueError(f"{where}: faltan {', '.join(missing)}")
+        _check_text(where, field)
+        for _, key, _, _ in Formatter().parse(field["text"]):
+            if key is not None and key not in BADGE_FIELDS:
+                raise ValueError(f"{where}: campo desconocido {{{key}}} (usa {', '.join(BADGE_FIELDS)})")
+    return layout
+
+
+@lru_cache(maxsize=32)
+def load_layout(name: str | None = None) -> dict:
+    name = name or BADGE_LAYOUT
+    with open(_layout_path(name), encoding="utf-8") as f:
+        return validate_layout(json.load(f), name)
+
+
+def layout_names() -> list[str]:
+    """Layouts disponibles en BADGE_LAYOUTS_DIR."""
+    try:
+        return sorted(n[:-5] for n in os.listdir(BADGE_LAYOUTS_DIR) if n.endswith(".json"))
+    except FileNotFoundError:
+        return []
+
+
+@lru_cache(maxsize=32)
+def layout_version(name: str | None = None) -> str:
+    """Huella del layout + versión del motor: cambia si cambia el dibujo."""
+    canonical = json.dumps(load_layout(name), sort_keys=True, separators=(",", ":"))
+    return f"{ENGINE_VERSION}-{hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:12]}"
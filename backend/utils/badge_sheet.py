@@ -0,0 +1,316 @@
+"""
+Hojas de badges para imprimir antes del evento: N badges por hoja Letter o
+A4, con marcas de corte, todos en un solo PDF.
+
+- El PDF se escribe a mano sobre utils.badge_template. Las fuentes, la capa
+  estática del badge (form XObject) y las marcas de corte se escriben una
+  vez y todas las páginas las referencian; cada página solo agrega su
+  content stream con los textos de sus badges.
+- Se emite por bloques conforme se renderiza: en memoria quedan los
+  offsets de los objetos, no las páginas, así 5,000 badges no pesan más
+  que 50.
+- Si el badge cabe más veces girado 90° (4 × 2 en A4), se gira.
+
+Lo usan POST /badges/sheet y este CLI.
+
+Uso (desde backend/):
+    python -m utils.badge_sheet -o badges.pdf --paper letter
+    python -m utils.badge_sheet -o pendientes.pdf --paper a4 --not-checked-in
+    python -m utils.badge_sheet -o grupo.pdf --ticket-ids TKT-1 TKT-2 --per-sheet 6
+    python -m utils.badge_sheet -o badges.pdf --from-export ./export/data
+"""
+
+import argparse
+import math
+import sys
+import time
+import unicodedata
+import zlib
+
+from reportlab.lib.pagesizes import A4, letter
+from reportlab.lib.rl_accel import fp_str
+from reportlab.lib.units import inch
+
+from utils.badge_cache import preview_inputs
+from utils.badge_template import BadgeTemplate, get_template
+
+PAPER_SIZES = {"letter": letter, "a4": A4}
+
+# Marcas de corte: separadas del badge y de este largo (puntos)
+_MARK_OFFSET = 0.0625 * inch
+_MARK_LENGTH = 0.125 * inch
+# Bytes acumulados antes de entregar un bloque al cliente
+_FLUSH_BYTES = 64 * 1024
+
+
+class SheetLayout:
+    """Dónde va cada badge en la hoja (puntos, esquina inferior izquierda)."""
+
+    def __init__(self, template: BadgeTemplate, paper: str = "letter", per_sheet: int | None = None,
+                 margin: float = 0.25 * inch, gap: float = 0.0):
+        if paper not in PAPER_SIZES:
+            raise ValueError(f"paper debe ser {' o '.join(PAPER_SIZES)}")
+        self.paper = paper
+        self.width, self.height = PAPER_SIZES[paper]
+
+        def grid(cell_w: float, cell_h: float) -> tuple[int, int]:
+            cols = math.floor((self.width - 2 * margin + gap) / (cell_w + gap))
+            rows = math.floor((self.height - 2 * margin + gap) / (cell_h + gap))
+            return max(cols, 0), max(rows, 0)
+
+        upright = grid(template.width, template.height)
+        turned = grid(template.height, template.width)
+        self.rotated = turned[0] * turned[1] > upright[0] * upright[1]
+        cols, rows = turned if self.rotated else upright
+        capacity = cols * rows
+        if not capacity:
+            raise ValueError("el badge no cabe en la hoja con ese margen")
+        if per_sheet is not None and not 1 <= per_sheet <= capacity:
+            raise ValueError(f"perSheet debe estar entre 1 y {capacity} para {paper}")
+
+        self.cell = (template.height, template.width) if self.rotated else (template.width, template.height)
+        cell_w, cell_h = self.cell
+        # Rejilla centrada, llenando por filas de arriba hacia abajo
+        x0 = (self.width - (cols * cell_w + (cols - 1) * gap)) / 2
+        top = (self.height + (rows * cell_h + (rows - 1) * gap)) / 2
+        slots = [(x0 + c * (cell_w + gap), top - (r + 1) * cell_h - r * gap)
+                 for r in range(rows) for c in range(cols)]
+        self.slots = slots[:per_sheet or capacity]
+
+    def matrix(self, slot: tuple[float, float]) -> str:
+        """Operador cm que lleva el badge (0, 0) a su lugar en la hoja."""
+        x, y = slot
+        if self.rotated:   # 90° antihorario: la base del badge queda a la derecha
+            return f"0 1 -1 0 {fp_str(x + self.cell[0])} {fp_str(y)} cm"
+        return f"1 0 0 1 {fp_str(x)} {fp_str(y)} cm"
+
+    def crop_mark_ops(self) -> str:
+        """Líneas en el margen alineadas con cada borde de corte."""
+        cell_w, cell_h = self.cell
+        xs = sorted({x for x, _ in self.slots} | {x + cell_w for x, _ in self.slots})
+        ys = sorted({y for _, y in self.slots} | {y + cell_h for _, y in self.slots})
+        left, right, bottom, top = xs[0], xs[-1], ys[0], ys[-1]
+        ops = ["0.25 w 0 0 0 RG"]
+
+        def mark(x1: float, y1: float, x2: float, y2: float) -> None:
+            x1, x2 = (min(max(v, 0), self.width) for v in (x1, x2))
+            y1, y2 = (min(max(v, 0), self.height) for v in (y1, y2))
+            if (x1, y1) != (x2, y2):
+                ops.append(f"{fp_str(x1)} {fp_str(y1)} m {fp_str(x2)} {fp_str(y2)} l S")
+
+        for x in xs:
+            mark(x, top + _MARK_OFFSET, x, top + _MARK_OFFSET + _MARK_LENGTH)
+            mark(x, bottom - _MARK_OFFSET, x, bottom - _MARK_OFFSET - _MARK_LENGTH)
+        for y in ys:
+            mark(left - _MARK_OFFSET, y, left - _MARK_OFFSET - _MARK_LENGTH, y)
+            mark(right + _MARK_OFFSET, y, right + _MARK_OFFSET + _MARK_LENGTH, y)
+        return "\n".join(ops)
+
+
+def _winansi(text: str) -> str:
+    """Sin fuentes de sustitución en la hoja: quita acentos que WinAnsi no tiene, o '?'."""
+    out = []
+    for ch in text:
+        try:
+            ch.encode("cp1252")
+            out.append(ch)
+            continue
+        except UnicodeEncodeError:
+            pass
+        base = "".join(c for c in unicodedata.normalize("NFKD", ch) if not unicodedata.combining(c))
+        try:
+            base.encode("cp1252")
+            out.append(base or "?")
+        except UnicodeEncodeError:
+            out.append("?")
+    return "".join(out)
+
+
+def sheet_values(rec) -> dict:
+    """Lo que se imprime de un AttendeeRecord (lo mismo que el preview de /badge)."""
+    ticket_id, name, profession, checked_in_at = preview_inputs(rec)
+    return {"ticketId": ticket_id, "name": name, "profession": profession, "checkedInAt": checked_in_at}
+
+
+def select_records(records, checked_in: bool | None = None) -> list:
+    """Filtra por check-in y ordena por nombre (así se reparten en la entrada)."""
+    selected = [r for r in records if r.ticket_id and (checked_in is None or r.checked_in is checked_in)]
+    selected.sort(key=lambda r: ((r.name or "").casefold(), r.ticket_id))
+    return selected
+
+
+class _Writer:
+    """Objetos PDF numerados con sus offsets; los bytes salen en bloques."""
+
+    def __init__(self):
+        self.offsets: dict[int, int] = {}
+        self.size = 0
+        self._buf = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self._buf += data
+        self.size += len(data)
+
+    def obj(self, num: int, body: str) -> None:
+        self.offsets[num] = self.size
+        self.write(f"{num} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+
+    def stream(self, num: int, entries: str, ops: str) -> None:
+        data = zlib.compress(ops.encode("latin-1"))
+        self.offsets[num] = self.size
+        self.write(f"{num} 0 obj\n<< {entries} /Filter /FlateDecode /Length {len(data)} >>\nstream\n"
+                   .encode("latin-1") + data + b"\nendstream\nendobj\n")
+
+    def take(self, force: bool = False) -> bytes | None:
+        if not self._buf or (not force and len(self._buf) < _FLUSH_BYTES):
+            return None
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
+
+
+def iter_sheet_pdf(values, sheet: SheetLayout, template: BadgeTemplate | None = None, crop_marks: bool = True):
+    """
+    Itera bloques de bytes de un PDF con un badge por cada dict de `values`
+    (ticketId, name, profession, checkedInAt), en ese orden.
+    """
+    template = template or get_template()
+    w = _Writer()
+    w.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    # 1 catálogo, 2 árbol de páginas (se escribe al final), 3 diccionario de
+    # fuentes, luego una por fuente, el form del badge, las marcas y los recursos
+    fonts = sorted(template.font_refs.items(), key=lambda kv: kv[1])
+    font_nums = {ref: 4 + i for i, (_, ref) in enumerate(fonts)}
+    badge_num = 4 + len(fonts)
+    marks_num = badge_num + 1 if crop_marks else badge_num
+    resources_num = marks_num + 1
+    next_num = resources_num + 1
+
+    w.obj(1, "<< /Type /Catalog /Pages 2 0 R >>")
+    w.obj(3, "<< " + " ".join(f"{ref} {num} 0 R" for ref, num in font_nums.items()) + " >>")
+    for font, ref in fonts:
+        w.obj(font_nums[ref], f"<< /Type /Font /Subtype /Type1 /BaseFont /{font} /Name {ref} "
+                              "/Encoding /WinAnsiEncoding >>")
+    form = "/Type /XObject /Subtype /Form /FormType 1 /Resources << /Font 3 0 R /ProcSet [ /PDF /Text ] >>"
+    w.stream(badge_num, f"{form} /BBox [ 0 0 {fp_str(template.width)} {fp_str(template.height)} ]",
+             template.static_ops(template.font_refs.get))
+    xobjects = f"/Badge {badge_num} 0 R"
+    if crop_marks:
+        w.stream(marks_num, f"{form} /BBox [ 0 0 {fp_str(sheet.width)} {fp_str(sheet.height)} ]",
+                 sheet.crop_mark_ops())
+        xobjects += f" /CropMarks {marks_num} 0 R"
+    w.obj(resources_num, f"<< /Font 3 0 R /XObject << {xobjects} >> /ProcSet [ /PDF /Text ] >>")
+
+    page_nums: list[int] = []
+    page_head = "/CropMarks Do\n" if crop_marks else ""
+    media_box = f"[ 0 0 {fp_str(sheet.width)} {fp_str(sheet.height)} ]"
+
+    def page(ops: list[str]) -> None:
+        nonlocal next_num
+        content_num, page_num = next_num, next_num + 1
+        next_num += 2
+        w.stream(content_num, "", page_head + "\n".join(ops))
+        w.obj(page_num, f"<< /Type /Page /Parent 2 0 R /MediaBox {media_box} "
+                        f"/Resources {resources_num} 0 R /Contents {content_num} 0 R >>")
+        page_nums.append(page_num)
+
+    ops: list[str] = []
+    for v in values:
+        fields = template.field_ops(v)
+        if fields is None:
+            fields = template.field_ops({k: _winansi(text) for k, text in v.items()})
+        ops.append(f"q\n{sheet.matrix(sheet.slots[len(ops)])}\n/Badge Do\n{fields}\nQ")
+        if len(ops) == len(sheet.slots):
+            page(ops)
+            ops = []
+            chunk = w.take()
+            if chunk:
+                yield chunk
+    if ops:
+        page(ops)
+
+    w.obj(2, f"<< /Type /Pages /Count {len(page_nums)} /Kids [ "
+             + " ".join(f"{num} 0 R" for num in page_nums) + " ] >>")
+    xref_at = w.size
+    size = next_num
+    xref = "".join(f"{w.offsets[num]:010d} 00000 n \n" for num in range(1, size))
+    w.write(f"xref\n0 {size}\n0000000000 65535 f \n{xref}trailer\n<< /Root 1 0 R /Size {size} >>\n"
+            f"startxref\n{xref_at}\n%%EOF\n".encode("ascii"))
+    yield w.take(force=True)
+
+
+def sheet_count(badges: int, sheet: SheetLayout) -> int:
+    return math.ceil(badges / len(sheet.slots))
+
+
+def _cli_records(args) -> list:
+    from repositories.attendee import AttendeeRecord
+    from repositories.event_users_repo import EventUsersRepo
+    from repositories.roster_snapshot import export_records, scan_records
+
+    ticket_ids = list(args.ticket_ids or [])
+    if args.ticket_ids_file:
+        with open(args.ticket_ids_file, encoding="utf-8") as f:
+            ticket_ids += [line.strip() for line in f if line.strip()]
+    ticket_ids = list(dict.fromkeys(ticket_ids))
+
+    if not ticket_ids:
+        records = export_records(args.from_export) if args.from_export else scan_records(args.segments)
+        return select_records(records, args.checked_in)
+    if args.from_export:
+        wanted = set(ticket_ids)
+        found = {r.ticket_id: r for r in export_records(args.from_export) if r.ticket_id in wanted}
+    else:
+        found = {t: AttendeeRecord.from_item(item) for t, item in EventUsersRepo.get_by_ticket_ids(ticket_ids).items()}
+    missing = [t for t in ticket_ids if t not in found]
+    if missing:
+        print(f"[badge-sheet] {len(missing)} ticketIds no encontrados: {', '.join(missing[:20])}", file=sys.stderr)
+    return [found[t] for t in ticket_ids if t in found]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Hojas de badges (N por hoja) en un solo PDF")
+    parser.add_argument("-o", "--output", help="archivo de salida (default: stdout)")
+    parser.add_argument("--paper", choices=tuple(PAPER_SIZES), default="letter")
+    parser.add_argument("--per-sheet", type=int, help="badges por hoja (default: los que quepan)")
+    parser.add_argument("--margin", type=float, default=0.25, help="margen de la hoja en pulgadas")
+    parser.add_argument("--gap", type=float, default=0.0, help="separación entre badges en pulgadas")
+    parser.add_argument("--no-crop-marks", action="store_true")
+    parser.add_argument("--layout", help="layout (default: BADGE_LAYOUT)")
+    parser.add_argument("--ticket-ids", nargs="+", help="solo estos tickets, en este orden")
+    parser.add_argument("--ticket-ids-file", help="archivo con un ticketId por línea")
+    check = parser.add_mutually_exclusive_group()
+    check.add_argument("--checked-in", dest="checked_in", action="store_const", const=True)
+    check.add_argument("--not-checked-in", dest="checked_in", action="store_const", const=False)
+    parser.add_argument("--from-export", help="export DYNAMODB_JSON de S3 (archivo o directorio) en vez de Scan")
+    parser.add_argument("--segments", type=int, default=4, help="segmentos del Scan paralelo")
+    args = parser.parse_args()
+
+    template = get_template(args.layout)
+    try:
+        sheet = SheetLayout(template, args.paper, args.per_sheet, args.margin * inch, args.gap * inch)
+    except ValueError as e:
+        raise SystemExit(f"[badge-sheet] {e}")
+    start = time.perf_counter()
+    records = _cli_records(args)
+    if not records:
+        raise SystemExit("[badge-sheet] no hay asistentes que imprimir")
+
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    written = 0
+    try:
+        for chunk in iter_sheet_pdf(map(sheet_values, records), sheet, template, not args.no_crop_marks):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.output:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"[badge-sheet] {len(records)} badges en {sheet_count(len(records), sheet)} hojas "
+          f"({len(sheet.slots)} por hoja, {args.paper}{', girados' if sheet.rotated else ''}), "
+          f"{written} bytes en {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Motor de templates del badge: cada layout (utils/badge_layout) se compila
+una sola vez y por badge solo se emite el texto variable.
+
+- La capa estática (bordes, franjas, títulos) se dibuja al compilar y se
+  guarda como operadores PDF ya formateados; en cada documento se instala
+  como un form XObject y cada badge la usa con un solo `Do` (en una hoja
+  con varios badges el form se escribe una vez).
+- El documento de un badge también se compila: fuentes, form, página,
+  catálogo y trailer son los mismos bytes siempre. `render` solo genera el
+  content stream con los textos, lo comprime y rehace la tabla xref.
+- El ajuste de texto usa el ancho a 1 pt cacheado por (texto, fuente): el
+  ancho escala lineal con el tamaño, así no hay un stringWidth por tamaño.
+- Las streams van solo con Flate: el ASCII85 de reportlab en Python puro
+  era casi la mitad del tiempo de un badge y no sirve en respuestas binarias.
+  reportlab solo lo lee de rl_config al guardar, así que se apaga alrededor
+  de cada save() de este módulo y no para todo el proceso.
+"""
+
+import io
+import math
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+
+from reportlab import rl_config
+from reportlab.lib.colors import HexColor
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfgen import canvas
+
+from utils.badge_layout import load_layout, layout_version
+
+_FORM_PREFIX = "badge-static-"
+# Referencias a fuente en los operadores compilados ("BT /F2 9 Tf ...")
+_FONT_REF = re.compile(r"(?<=BT )(/F\d+)(?= )")
+_CONTENT_MARKER = "%badge-content"
+_XREF_ENTRY = re.compile(rb"(\d{10}) 00000 n")
+_STREAM = re.compile(rb"stream\r?\n(.*?)endstream", re.S)
+
+
+_A85_LOCK = threading.Lock()
+
+
+@contextmanager
+def _flate_only():
+    """rl_config.useA85 apagado mientras se guarda un documento del badge."""
+    with _A85_LOCK:
+        previous = rl_config.useA85
+        rl_config.useA85 = 0
+        try:
+            yield
+        finally:
+            rl_config.useA85 = previous
+
+
+@lru_cache(maxsize=8192)
+def _unit_width(text: str, font: str) -> float:
+    """Ancho del texto a 1 pt (los nombres/profesiones se repiten mucho)."""
+    return pdfmetrics.stringWidth(text, font, 1)
+
+
+class _Text:
+    """Un texto del layout, con posiciones ya en puntos."""
+    __slots__ = ("text", "x", "y", "align", "font", "size", "min_size", "max_width", "color")
+
+    def __init__(self, spec: dict):
+        self.text = spec["text"]
+        self.x = spec["x"] * inch
+        self.y = spec["y"] * inch
+        self.align = spec.get("align", "left")
+        self.font = spec["font"]
+        self.size = spec["size"]
+        self.min_size = spec.get("minSize", spec["size"])
+        self.max_width = spec["maxWidth"] * inch if "maxWidth" in spec else None
+        self.color = HexColor(spec.get("color", "#000000"))
+        if self.font not in pdfmetrics.standardFonts:
+            # Las TrueType se subsetean por documento: no caben en un form compilado
+            raise ValueError(f"fuente no soportada: {self.font} (usa una de las 14 estándar de PDF)")
+
+    def fit(self, text: str) -> tuple[float, float]:
+        """(tamaño, ancho): baja de punto en punto hasta min_size si no cabe."""
+        unit = _unit_width(text, self.font)
+        size = self.size
+        if self.max_width is not None and unit * size > self.max_width:
+            size = max(self.min_size, min(size, math.floor(self.max_width / unit)))
+        return size, unit * size
+
+    def draw(self, c: canvas.Canvas, text: str) -> None:
+        size, width = self.fit(text)
+        x = self.x - width / 2.0 if self.align == "center" else self.x - width if self.align == "right" else self.x
+        c.setFillColor(self.color)
+        c.setFont(self.font, size)
+        c.drawString(x, self.y, text)
+
+
+class BadgeTemplate:
+    """Layout compilado. `begin` una vez por documento, `draw` por badge."""
+
+    def __init__(self, name: str | None = None):
+        layout = load_layout(name)
+        self.name = name
+        self.version = layout_version(name)
+        self.width = layout["size"][0] * inch
+        self.height = layout["size"][1] * inch
+        self.fields = [_Text(spec) for spec in layout["fields"]]
+        self._static = layout.get("static", [])
+        self._form = _FORM_PREFIX + self.version
+        self._static_parts, self._static_fonts = self._compile_static()
+        self._fonts = sorted({f.font for f in self.fields} | set(self._static_fonts.values()))
+        self._local = threading.local()
+        self._compile_document()
+
+    def _draw_static(self, c: canvas.Canvas) -> None:
+        for e in self._static:
+            kind = e["type"]
+            if kind == "text":
+                _Text(e).draw(c, e["text"])
+                continue
+            c.setLineWidth(e.get("lineWidth", 1))
+            if e.get("stroke"):
+                c.setStrokeColor(HexColor(e["stroke"]))
+            if e.get("fill"):
+                c.setFillColor(HexColor(e["fill"]))
+            stroke, fill = (1 if e.get("stroke") else 0), (1 if e.get("fill") else 0)
+            if kind == "line":
+                c.line(e["x1"] * inch, e["y1"] * inch, e["x2"] * inch, e["y2"] * inch)
+            elif kind == "rect":
+                c.rect(e["x"] * inch, e["y"] * inch, e["w"] * inch, e["h"] * inch, stroke=stroke, fill=fill)
+            else:
+                c.roundRect(e["x"] * inch, e["y"] * inch, e["w"] * inch, e["h"] * inch,
+                            radius=e.get("radius", 0), stroke=stroke, fill=fill)
+
+    def _compile_static(self) -> tuple[list[str], dict[str, str]]:
+        """
+        Operadores de la capa estática, partidos en cada referencia a fuente:
+        los nombres internos (/F1, /F2...) dependen del orden en que cada
+        documento registra sus fuentes y se resuelven en `begin`.
+        """
+        scratch = canvas.Canvas(io.BytesIO(), pagesize=(self.width, self.height))
+        start = len(scratch._code)
+        self._draw_static(scratch)
+        fonts = {e["font"] for e in self._static if e["type"] == "text"}
+        refs = {scratch._doc.getInternalFontName(font): font for font in fonts}
+        return _FONT_REF.split(" ".join(scratch._code[start:])), refs
+
+    def static_ops(self, font_name) -> str:
+        """Operadores de la capa estática; `font_name(fuente)` da su nombre interno (/F1...)."""
+        names = {ref: font_name(font) for ref, font in self._static_fonts.items()}
+        return "".join(names[part] if i % 2 else part for i, part in enumerate(self._static_parts))
+
+    def begin(self, c: canvas.Canvas) -> None:
+        """Instala el form de la capa estática en este documento."""
+        ops = self.static_ops(c._doc.getInternalFontName)
+        c.beginForm(self._form, 0, 0, self.width, self.height)
+        c.addLiteral(ops)
+        c.endForm()
+
+    def draw(self, c: canvas.Canvas, values: dict, x: float = 0, y: float = 0) -> None:
+        """Un badge con esquina inferior izquierda en (x, y) puntos."""
+        c.saveState()
+        if x or y:
+            c.translate(x, y)
+        c.doForm(self._form)
+        for field in self.fields:
+            field.draw(c, field.text.format_map(values))
+        c.restoreState()
+
+    def _canvas(self, buf) -> canvas.Canvas:
+        # invariant: sin fecha ni ID aleatorio, mismo badge → mismos bytes
+        c = canvas.Canvas(buf, pagesize=(self.width, self.height), invariant=1, pageCompression=1)
+        for font in self._fonts:   # mismos /F1, /F2... en todos los documentos y en el scratch
+            c._doc.getInternalFontName(font)
+        return c
+
+    def _compile_document(self) -> None:
+        """
+        Documento de un badge con el content stream marcado; se guarda partido
+        en: bytes antes del content stream, objetos después y trailer.
+        """
+        buf = io.BytesIO()
+        c = self._canvas(buf)
+        self.begin(c)
+        c.doForm(self._form)
+        c.addLiteral(_CONTENT_MARKER)
+        c.showPage()
+        with _flate_only():
+            c.save()
+        pdf = buf.getvalue()
+
+        xref_at = pdf.rindex(b"\nxref\n") + 1
+        offsets = [int(m.group(1)) for m in _XREF_ENTRY.finditer(pdf, xref_at)] + [xref_at]
+        for num in range(1, len(offsets)):
+            start, end = offsets[num - 1], offsets[num]
+            stream = _STREAM.search(pdf, start, end)
+            if stream and _CONTENT_MARKER.encode() in zlib.decompress(stream.group(1)):
+                break
+        else:
+            raise RuntimeError("no se encontró el content stream del badge")
+
+        self._content_num = num
+        self._head = pdf[:start]
+        self._tail = pdf[end:xref_at]
+        self._tail_offsets = [off - end for off in offsets[num:-1]]
+        self._head_offsets = offsets[:num - 1]
+        trailer_at = pdf.index(b"trailer", xref_at)
+        self._trailer = pdf[trailer_at:pdf.index(b"startxref", trailer_at)]
+        self._form_ref = c._doc.getXObjectName(self._form)
+        # Fuente → nombre interno (/F1...), igual en el scratch de field_ops
+        self.font_refs = dict(c._doc.fontMapping)
+
+    def field_ops(self, values: dict) -> str | None:
+        """Operadores de los textos; None si el texto necesitó otra fuente."""
+        scratch = getattr(self._local, "canvas", None)
+        if scratch is None:
+            scratch = self._local.canvas = self._canvas(io.BytesIO())
+        code = scratch._code
+        start = len(code)
+        try:
+            for field in self.fields:
+                field.draw(scratch, field.text.format_map(values))
+            ops = code[start:]
+        finally:
+            del code[start:]
+        if len(scratch._doc.fontMapping) != len(self.font_refs):
+            # Caracteres fuera de WinAnsi: reportlab agregó una fuente de
+            # sustitución que el documento compilado no tiene
+            self._local.canvas = None
+            return None
+        return "\n".join(ops)
+
+    def render(self, values: dict) -> bytes:
+        """PDF de una página con un badge."""
+        ops = self.field_ops(values)
+        if ops is None:
+            return self.render_canvas(values)
+        data = zlib.compress(f"q\n/{self._form_ref} Do\n{ops}\nQ\n".encode("latin-1"))
+        obj = (f"{self._content_num} 0 obj\n<<\n/Filter [ /FlateDecode ] /Length {len(data)}\n>>\nstream\n"
+               .encode("ascii") + data + b"\nendstream\nendobj\n")
+        body_end = len(self._head) + len(obj)
+        offsets = self._head_offsets + [len(self._head)] + [body_end + off for off in self._tail_offsets]
+        xref = "".join(f"{off:010d} 00000 n \n" for off in offsets)
+        return b"".join((
+            self._head, obj, self._tail,
+            f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n{xref}".encode("ascii"),
+            self._trailer,
+            f"startxref\n{body_end + len(self._tail)}\n%%EOF\n".encode("ascii"),
+        ))
+
+    def render_canvas(self, values: dict) -> bytes:
+        """El mismo badge armado completo con reportlab (sin el documento compilado)."""
+        buf = io.BytesIO()
+        c = self._canvas(buf)
+        self.begin(c)
+        self.draw(c, values)
+        c.showPage()
+        with _flate_only():
+            c.save()
+        return buf.getvalue()
+
+
+@lru_cache(maxsize=8)
+def get_template(name: str | None = None) -> BadgeTemplate:
+    """Template compilado (uno por layout y proceso)."""
+    return BadgeTemplate(name)
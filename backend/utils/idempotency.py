@@ -0,0 +1,98 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from db.dynamo import get_executor
+from repositories.idempotency_repo import IdempotencyRepo
+
+IDEMPOTENCY_TTL_S = float(os.getenv("IDEMPOTENCY_TTL_S", "86400"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+
+
+class StoredResponse:
+    __slots__ = ("fingerprint", "body", "expires_at")
+
+    def __init__(self, fingerprint: str, body: bytes, expires_at: float):
+        self.fingerprint = fingerprint
+        self.body = body
+        self.expires_at = expires_at
+
+
+class IdempotencyStore:
+    """
+    Respuestas ya completadas por Idempotency-Key.
+
+    Memoria LRU acotada con TTL al frente y, si IDEMPOTENCY_TABLE está
+    configurada, DynamoDB detrás (compartido entre instancias/Lambdas).
+    Se guardan los bytes exactos de la respuesta para re-enviarlos igual.
+    """
+
+    def __init__(self, ttl_s: float = IDEMPOTENCY_TTL_S, max_entries: int = IDEMPOTENCY_MAX_ENTRIES,
+                 persistent: bool | None = None):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.persistent = IdempotencyRepo.enabled() if persistent is None else persistent
+        self._entries: OrderedDict[str, StoredResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.replayed = 0
+        self.stored = 0
+        self.mismatched = 0
+
+    def _get_local(self, key: str) -> StoredResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put_local(self, key: str, entry: StoredResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> StoredResponse | None:
+        entry = self._get_local(key)
+        if entry is None and self.persistent:
+            loop = asyncio.get_running_loop()
+            found = await loop.run_in_executor(get_executor(), IdempotencyRepo.get, key)
+            if found:
+                entry = StoredResponse(*found)
+                self._put_local(key, entry)
+        return entry
+
+    async def put(self, key: str, fingerprint: str, body: bytes) -> None:
+        self._put_local(key, StoredResponse(fingerprint, body, time.time() + self.ttl_s))
+        with self._lock:
+            self.stored += 1
+        if self.persistent:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(get_executor(), IdempotencyRepo.put, key, fingerprint, body, self.ttl_s)
+
+    def record_replay(self) -> None:
+        with self._lock:
+            self.replayed += 1
+
+    def record_mismatch(self) -> None:
+        with self._lock:
+            self.mismatched += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttlS": self.ttl_s,
+                "persistent": self.persistent,
+                "stored": self.stored,
+                "replayed": self.replayed,
+                "mismatched": self.mismatched,
+            }
@@ -0,0 +1,273 @@
+"""
+Pool de procesos para los renders que son puro CPU: el PDF del badge
+(reportlab) y el raster de las etiquetas (printer.renderer, PIL).
+
+Renderizando en el thread pool de FastAPI retienen el GIL y le quitan CPU
+a los hilos que esperan a DynamoDB. Aquí corren en procesos aparte:
+
+- Entran datos simples (strings, el dict del LabelSpec) y salen bytes.
+- Cada worker arranca con el template del badge compilado y las fuentes
+  de las etiquetas cargadas, no con el primer escaneo.
+- Límite propio de renders en vuelo (RENDER_POOL_MAX_IN_FLIGHT); los demás
+  esperan y pasados RENDER_POOL_MAX_WAIT_S se rechazan con 503.
+- `run` bloquea al hilo que llama sin retener el GIL: los handlers que ya
+  corren en el thread pool solo esperan el resultado.
+
+Sin pool arrancado (deshabilitado, CLIs, tests) se renderiza en el mismo
+proceso. En Lambda no se arranca: no hay /dev/shm para los semáforos de
+multiprocessing y solo hay un vCPU con poca memoria.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+RENDER_POOL_ENABLED = os.getenv("RENDER_POOL_ENABLED", "false").lower() in ("1", "true", "yes")
+RENDER_POOL_WORKERS = int(os.getenv("RENDER_POOL_WORKERS", str(os.cpu_count() or 2)))
+# En vuelo = en un worker o en la cola del executor; con 2 por worker nunca se quedan sin trabajo
+RENDER_POOL_MAX_IN_FLIGHT = int(os.getenv("RENDER_POOL_MAX_IN_FLIGHT", str(2 * RENDER_POOL_WORKERS)))
+RENDER_POOL_MAX_WAIT_S = float(os.getenv("RENDER_POOL_MAX_WAIT_S", "5.0"))
+
+_SAMPLES = 1024
+
+
+# ── Workers ──────────────────────────────────────────────────────
+
+def _warm_worker(ready) -> None:
+    """Initializer de cada worker: template del badge y fuentes de etiquetas."""
+    from utils.badge_template import get_template
+    get_template()
+    try:
+        from printer.models import LabelSpec
+        from printer.renderer import render_label
+        render_label(LabelSpec())
+    except ImportError:   # sin PIL no hay etiquetas
+        pass
+    ready.release()
+
+
+def _timed(fn, args: tuple):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _badge_pdf(ticket_id: str, name: str, profession: str, checked_in_at: str, layout: str | None) -> bytes:
+    from utils.badge_template import get_template
+    return get_template(layout).render({"ticketId": ticket_id, "name": name, "profession": profession,
+                                        "checkedInAt": checked_in_at})
+
+
+def _label_raster(label: dict, dpi: int | None) -> tuple[tuple[int, int], bytes, list[str]]:
+    """(tamaño, pixeles 1-bit, warnings): la imagen PIL no viaja entre procesos."""
+    from printer.models import LabelSpec
+    from printer.renderer import render_label
+    result = render_label(LabelSpec.model_validate(label), dpi=dpi)
+    return result.image.size, result.image.tobytes(), result.warnings
+
+
+# ── Pool ─────────────────────────────────────────────────────────
+
+class RenderPool:
+    """ProcessPoolExecutor con límite de renders en vuelo y tiempos por tipo."""
+
+    def __init__(self, workers: int = RENDER_POOL_WORKERS, max_in_flight: int = RENDER_POOL_MAX_IN_FLIGHT,
+                 max_wait_s: float = RENDER_POOL_MAX_WAIT_S):
+        self.workers = max(1, workers)
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_wait_s = max_wait_s
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._lock = threading.Lock()
+        self._executor = None   # ProcessPoolExecutor (multiprocessing se importa al arrancar)
+
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.rejected = 0
+        self.restarts = 0
+        self.warm_workers = 0
+        self.startup_ms: float | None = None
+        self._renders: dict[str, deque[float]] = {}
+        self._waits: dict[str, deque[float]] = {}
+        self._counts: dict[str, int] = {}
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def _new_executor(self):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # spawn: un fork con los hilos de boto/uvicorn vivos puede heredar locks tomados
+        ctx = multiprocessing.get_context("spawn")
+        ready = ctx.Semaphore(0)
+        executor = ProcessPoolExecutor(self.workers, mp_context=ctx, initializer=_warm_worker, initargs=(ready,))
+        return executor, ready
+
+    def _warm(self, executor, ready, timeout_s: float) -> None:
+        """Levanta los workers de `executor` y espera a que terminen de precalentar."""
+        start = time.perf_counter()
+        # Sin un worker libre, cada submit levanta un proceso: uno por worker
+        for _ in range(self.workers):
+            executor.submit(os.getpid)
+        deadline = start + timeout_s
+        warm = 0
+        while warm < self.workers and ready.acquire(timeout=max(0.0, deadline - time.perf_counter())):
+            warm += 1
+            with self._lock:
+                if self._executor is executor:
+                    self.warm_workers = warm
+        with self._lock:
+            if self._executor is executor:
+                self.startup_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    def start(self, timeout_s: float = 60.0) -> None:
+        """Arranca los workers y espera a que terminen de precalentar."""
+        executor, ready = self._new_executor()
+        with self._lock:
+            self._executor, self.warm_workers = executor, 0
+        self._warm(executor, ready, timeout_s)
+        print(f"[render-pool] {self.warm_workers} workers listos en {self.startup_ms:.0f} ms")
+
+    def stop(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _restart(self, broken, timeout_s: float = 60.0) -> None:
+        """Un worker murió (OOM, señal): el executor queda inservible, se cambia por otro."""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            executor, ready = self._new_executor()
+            self._executor, self.warm_workers = executor, 0
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        print("[render-pool] worker caído, pool reiniciado")
+        # Mismo precalentado que start(), sin detener al render que detectó la caída
+        threading.Thread(target=self._rewarm, args=(executor, ready, timeout_s),
+                         name="render-pool-warm", daemon=True).start()
+
+    def _rewarm(self, executor, ready, timeout_s: float) -> None:
+        try:
+            self._warm(executor, ready, timeout_s)
+        except Exception as e:   # otro worker caído: el siguiente run() lo reinicia
+            print(f"[render-pool] precalentado tras reinicio falló: {e}")
+            return
+        print(f"[render-pool] {self.warm_workers} workers listos tras reinicio")
+
+    def run(self, kind: str, fn, *args):
+        """fn(*args) en un worker; espera turno si hay max_in_flight renders en vuelo."""
+        executor = self._executor
+        if executor is None:
+            return fn(*args)
+        from concurrent.futures.process import BrokenProcessPool
+
+        start = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        acquired = self._slots.acquire(timeout=self.max_wait_s)
+        with self._lock:
+            self.queued -= 1
+            if acquired:
+                self.in_flight += 1
+            else:
+                self.rejected += 1
+        if not acquired:
+            from db.admission import AdmissionRejected
+            raise AdmissionRejected("render pool saturado, reintenta en un momento", retry_after_s=1.0)
+
+        try:
+            try:
+                result, render_ms = executor.submit(_timed, fn, args).result()
+            except BrokenProcessPool:
+                self._restart(executor)
+                result, render_ms = _timed(fn, args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+        wait_ms = (time.perf_counter() - start) * 1000 - render_ms
+        with self._lock:
+            if kind not in self._counts:
+                self._renders[kind] = deque(maxlen=_SAMPLES)
+                self._waits[kind] = deque(maxlen=_SAMPLES)
+                self._counts[kind] = 0
+            self._renders[kind].append(render_ms)
+            self._waits[kind].append(wait_ms)
+            self._counts[kind] += 1
+        return result
+
+    def stats(self) -> dict:
+        def _pct(samples: list[float], p: float) -> float | None:
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 2) if samples else None
+
+        with self._lock:
+            kinds = {kind: (sorted(self._renders[kind]), sorted(self._waits[kind]), count)
+                     for kind, count in self._counts.items()}
+        return {
+            "started": self.started,
+            "workers": self.workers,
+            "warmWorkers": self.warm_workers,
+            "startupMs": self.startup_ms,
+            "maxInFlight": self.max_in_flight,
+            "inFlight": self.in_flight,
+            "queueDepth": self.queued,
+            "maxQueueDepth": self.max_queued,
+            "rejected": self.rejected,
+            "restarts": self.restarts,
+            # renderMs: dentro del worker; waitMs: turno + cola del executor + IPC
+            "renders": {kind: {
+                "count": count,
+                "renderMsP50": _pct(renders, 0.50),
+                "renderMsP99": _pct(renders, 0.99),
+                "waitMsP50": _pct(waits, 0.50),
+                "waitMsP99": _pct(waits, 0.99),
+            } for kind, (renders, waits, count) in kinds.items()},
+        }
+
+
+render_pool = RenderPool() if RENDER_POOL_ENABLED else None
+
+
+def load_render_pool() -> RenderPool | None:
+    """Arranca el pool al inicio de la app; None si está deshabilitado o en Lambda."""
+    if render_pool is None:
+        return None
+    if os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+        print("[render-pool] deshabilitado en Lambda")
+        return None
+    try:
+        render_pool.start()
+    except Exception as e:   # sin semáforos POSIX, límite de procesos...
+        render_pool.stop()
+        print(f"[render-pool] no arrancó, se renderiza en proceso: {e}")
+        return None
+    return render_pool
+
+
+# ── Renders ──────────────────────────────────────────────────────
+
+def render_badge_pdf(ticket_id: str, name: str, profession: str, checked_in_at: str,
+                     layout: str | None = None) -> bytes:
+    """PDF de un badge (sin cache), en el pool si está arrancado."""
+    args = (ticket_id, name, profession, checked_in_at, layout)
+    if render_pool is None:
+        return _badge_pdf(*args)
+    return render_pool.run("badge", _badge_pdf, *args)
+
+
+def render_label(label, dpi: int | None = None):
+    """printer.renderer.render_label, en el pool si está arrancado."""
+    from printer.renderer import RenderResult, render_label as _render_label
+
+    if render_pool is None or not render_pool.started:
+        return _render_label(label, dpi=dpi)
+    from PIL import Image
+
+    size, pixels, warnings = render_pool.run("label", _label_raster, label.model_dump(), dpi)
+    return RenderResult(image=Image.frombytes("1", size, pixels), warnings=warnings)
@@ -0,0 +1,140 @@
+"""
+Tickets firmados: el QR lleva ticketId, userId, name y profession más un
+HMAC, así /badge renderiza sin ir a DynamoDB y /checkin solo escribe.
+
+Formato: ST1.<payload>.<mac>, en base32 sin padding (solo A-Z, 2-7 y '.',
+así el QR usa el modo alfanumérico, más denso que el de bytes). El payload
+son los campos separados por \\x1f; el mac es HMAC-SHA256 truncado a 16 bytes.
+
+Emitir los QR desde el export del roster (desde backend/):
+    python -m repositories.export_roster --format csv -o asistentes.csv
+    python -m utils.signed_ticket asistentes.csv -o qr.csv
+"""
+
+import argparse
+import base64
+import csv
+import hashlib
+import hmac
+import os
+import sys
+
+# Llaves separadas por coma: la primera firma, todas verifican (rotación)
+TICKET_SIGNING_KEYS = [k.strip().encode("utf-8") for k in os.getenv("TICKET_SIGNING_KEYS", "").split(",") if k.strip()]
+
+SIGNED_PREFIX = "ST1."
+_MAC_BYTES = 16
+_SEP = "\x1f"
+_MAX_FIELD_LEN = 256
+
+
+class InvalidTicketSignature(ValueError):
+    pass
+
+
+class SignedTicket:
+    __slots__ = ("ticket_id", "user_id", "name", "profession")
+
+    def __init__(self, ticket_id: str, user_id: str, name: str, profession: str | None):
+        self.ticket_id = ticket_id
+        self.user_id = user_id
+        self.name = name
+        self.profession = profession
+
+    def as_item(self) -> dict:
+        """Forma de item de EventUsers, sin estado de check-in (no viene en el QR)."""
+        item = {"userId": self.user_id, "ticketId": self.ticket_id, "name": self.name}
+        if self.profession:
+            item["profession"] = self.profession
+        return item
+
+
+def _b32encode(data: bytes) -> str:
+    return base64.b32encode(data).decode("ascii").rstrip("=")
+
+
+def _b32decode(text: str) -> bytes:
+    return base64.b32decode(text + "=" * (-len(text) % 8))
+
+
+def _mac(key: bytes, payload: bytes) -> bytes:
+    return hmac.new(key, SIGNED_PREFIX.encode("ascii") + payload, hashlib.sha256).digest()[:_MAC_BYTES]
+
+
+def signing_enabled() -> bool:
+    return bool(TICKET_SIGNING_KEYS)
+
+
+def is_signed_ticket(text: str) -> bool:
+    return (text or "").upper().startswith(SIGNED_PREFIX)
+
+
+def sign_ticket(ticket_id: str, user_id: str, name: str, profession: str | None = None,
+                key: bytes | None = None) -> str:
+    key = key or (TICKET_SIGNING_KEYS[0] if TICKET_SIGNING_KEYS else None)
+    if not key:
+        raise ValueError("TICKET_SIGNING_KEYS no configurado")
+    fields = [ticket_id, user_id, name or "", profession or ""]
+    for value in fields:
+        if _SEP in value or len(value) > _MAX_FIELD_LEN:
+            raise ValueError("campo inválido para ticket firmado")
+    if not ticket_id or not user_id:
+        raise ValueError("ticketId y userId requeridos")
+    payload = _SEP.join(fields).encode("utf-8")
+    return f"{SIGNED_PREFIX}{_b32encode(payload)}.{_b32encode(_mac(key, payload))}"
+
+
+def verify_ticket(token: str, keys: list[bytes] | None = None) -> SignedTicket:
+    """Verifica la firma localmente. Lanza InvalidTicketSignature si no es válida."""
+    keys = TICKET_SIGNING_KEYS if keys is None else keys
+    token = (token or "").strip().upper()   # algunos escáneres cambian mayúsculas
+    if not token.startswith(SIGNED_PREFIX):
+        raise InvalidTicketSignature("no es un ticket firmado")
+    try:
+        body, mac_text = token[len(SIGNED_PREFIX):].split(".")
+        payload = _b32decode(body)
+        mac = _b32decode(mac_text)
+    except ValueError:
+        raise InvalidTicketSignature("ticket firmado mal formado")
+    if not any(hmac.compare_digest(mac, _mac(key, payload)) for key in keys):
+        raise InvalidTicketSignature("firma de ticket inválida")
+
+    try:
+        ticket_id, user_id, name, profession = payload.decode("utf-8").split(_SEP)
+    except ValueError:
+        raise InvalidTicketSignature("ticket firmado mal formado")
+    return SignedTicket(ticket_id, user_id, name or "UNKNOWN", profession or None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Agrega la columna qr (ticket firmado) a un CSV del roster")
+    parser.add_argument("path", help="CSV con userId, ticketId, name, profession (p. ej. de export_roster)")
+    parser.add_argument("-o", "--output", help="CSV de salida (default: stdout)")
+    args = parser.parse_args()
+    if not signing_enabled():
+        raise SystemExit("[signed-ticket] define TICKET_SIGNING_KEYS")
+
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    signed = skipped = 0
+    try:
+        with open(args.path, newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(out, fieldnames=("ticketId", "userId", "name", "profession", "qr"),
+                                    lineterminator="\n")
+            writer.writeheader()
+            for row in csv.DictReader(f):
+                try:
+                    qr = sign_ticket(row.get("ticketId") or "", row.get("userId") or "",
+                                     row.get("name") or "", row.get("profession") or None)
+                except ValueError:
+                    skipped += 1
+                    continue
+                writer.writerow({k: row.get(k) for k in ("ticketId", "userId", "name", "profession")} | {"qr": qr})
+                signed += 1
+    finally:
+        if args.output:
+            out.close()
+    print(f"[signed-ticket] {signed} firmados, {skipped} omitidos", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+_MAX_RECENT = 10000
+
+
+class SingleFlight:
+    """
+    Coalesce de peticiones idénticas concurrentes (mismo key).
+
+    La primera petición ejecuta `fn`; las que llegan mientras sigue en
+    vuelo esperan ese mismo resultado (o excepción). Al terminar, el
+    resultado se sirve desde memoria durante `window_s` segundos, lo que
+    absorbe los re-disparos del escáner y los dobles taps.
+    Pensado para un solo event loop (un worker de uvicorn / una Lambda).
+    """
+
+    def __init__(self, window_s: float = 1.0):
+        self.window_s = window_s
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._recent: dict[Hashable, tuple[float, Any]] = {}
+
+        self.executed = 0
+        self.coalesced = 0
+        self.cached = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.monotonic()
+        recent = self._recent.get(key)
+        if recent is not None:
+            if recent[0] > now:
+                self.cached += 1
+                return recent[1]
+            del self._recent[key]
+
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            # shield: si este waiter se cancela no cancela al líder
+            return await asyncio.shield(fut)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        self.executed += 1
+        try:
+            value = await fn()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # marcado como leído aunque nadie más espere
+            raise
+        else:
+            fut.set_result(value)
+            if self.window_s > 0:
+                self._remember(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _remember(self, key: Hashable, value: Any) -> None:
+        now = time.monotonic()
+        if len(self._recent) >= _MAX_RECENT:
+            self._recent = {k: v for k, v in self._recent.items() if v[0] > now}
+            if len(self._recent) >= _MAX_RECENT:
+                self._recent.pop(next(iter(self._recent)))
+        self._recent[key] = (now + self.window_s, value)
+
+    def forget(self, key: Hashable) -> None:
+        """Invalida el resultado reciente de un key (p. ej. tras un check-in)."""
+        self._recent.pop(key, None)
+
+    def stats(self) -> dict:
+        saved = self.coalesced + self.cached
+        total = self.executed + saved
+        return {
+            "windowS": self.window_s,
+            "inFlight": len(self._inflight),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "cached": self.cached,
+            "savedRatio": round(saved / total, 4) if total else None,
+        }
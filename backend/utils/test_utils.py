@@ -0,0 +1,417 @@
+"""
+Test suite for the backend utilities (request coalescing, idempotency, badges).
+
+Run:  python -m pytest utils/test_utils.py -v
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import os
+import re
+import signal
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from reportlab import rl_config
+from reportlab.pdfgen import canvas
+
+from db.admission import AdmissionRejected
+from printer.models import LabelSpec
+from repositories.attendee import AttendeeRecord
+from utils import pdf_badge
+from utils.badge_cache import BadgeCache, badge_digest, pregenerate, preview_inputs
+from utils.badge_layout import validate_layout
+from utils.badge_sheet import SheetLayout, iter_sheet_pdf, select_records, sheet_values
+from utils.badge_template import BadgeTemplate, get_template
+from utils.badge_http import badge_etag, badge_headers, etag_matches, wants_pdf
+from utils.idempotency import IdempotencyStore
+from utils.render_pool import RenderPool, _badge_pdf, _label_raster
+from utils.signed_ticket import InvalidTicketSignature, is_signed_ticket, sign_ticket, verify_ticket
+from utils.singleflight import SingleFlight
+
+
+# ── SingleFlight ─────────────────────────────────────────────────
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_execution(self):
+        sf = SingleFlight(window_s=0)
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"ok": True}
+
+        async def run():
+            return await asyncio.gather(*(sf.do("T1", fn) for _ in range(5)))
+
+        results = asyncio.run(run())
+        assert len(calls) == 1
+        assert all(r is results[0] for r in results)
+        assert sf.stats()["coalesced"] == 4
+
+    def test_window_serves_recent_result(self):
+        sf = SingleFlight(window_s=60)
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            return len(calls)
+
+        async def run():
+            first = await sf.do("T1", fn)
+            second = await sf.do("T1", fn)
+            sf.forget("T1")
+            third = await sf.do("T1", fn)
+            return first, second, third
+
+        assert asyncio.run(run()) == (1, 1, 2)
+        assert sf.stats()["cached"] == 1
+
+    def test_errors_are_shared_and_not_cached(self):
+        sf = SingleFlight(window_s=60)
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def run():
+            results = await asyncio.gather(*(sf.do("T1", fn) for _ in range(3)), return_exceptions=True)
+            assert all(isinstance(r, ValueError) for r in results)
+            with pytest.raises(ValueError):
+                await sf.do("T1", fn)
+
+        asyncio.run(run())
+        assert len(calls) == 2
+
+
+# ── IdempotencyStore ─────────────────────────────────────────────
+
+
+class TestIdempotencyStore:
+    def test_replays_exact_bytes(self):
+        store = IdempotencyStore(ttl_s=60, persistent=False)
+
+        async def run():
+            await store.put("k1", "TKT-1", b'{"ok":true}')
+            return await store.get("k1")
+
+        entry = asyncio.run(run())
+        assert entry.body == b'{"ok":true}'
+        assert entry.fingerprint == "TKT-1"
+
+    def test_expired_entries_are_dropped(self):
+        store = IdempotencyStore(ttl_s=-1, persistent=False)
+
+        async def run():
+            await store.put("k1", "TKT-1", b"{}")
+            return await store.get("k1")
+
+        assert asyncio.run(run()) is None
+
+    def test_bounded_lru(self):
+        store = IdempotencyStore(ttl_s=60, max_entries=2, persistent=False)
+
+        async def run():
+            for key in ("a", "b", "c"):
+                await store.put(key, key, b"{}")
+            return [await store.get(key) is not None for key in ("a", "b", "c")]
+
+        assert asyncio.run(run()) == [False, True, True]
+
+
+# ── Signed tickets ───────────────────────────────────────────────
+
+
+class TestSignedTicket:
+    KEY = b"test-signing-key"
+
+    def test_roundtrip(self):
+        token = sign_ticket("TKT-0001", "usr-0001", "José Núñez", "Estudiante", key=self.KEY)
+        assert is_signed_ticket(token)
+        ticket = verify_ticket(token, keys=[self.KEY])
+        assert (ticket.ticket_id, ticket.user_id, ticket.name, ticket.profession) == \
+            ("TKT-0001", "usr-0001", "José Núñez", "Estudiante")
+        assert ticket.as_item() == {"userId": "usr-0001", "ticketId": "TKT-0001", "name": "José Núñez",
+                                    "profession": "Estudiante"}
+
+    def test_qr_alphanumeric_charset(self):
+        token = sign_ticket("TKT-0001", "usr-0001", "Ana", None, key=self.KEY)
+        assert set(token) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZ234567.1")
+        assert verify_ticket(token.lower(), keys=[self.KEY]).profession is None
+
+    def test_tampered_or_foreign_key_is_rejected(self):
+        token = sign_ticket("TKT-0001", "usr-0001", "Ana", None, key=self.KEY)
+        with pytest.raises(InvalidTicketSignature):
+            verify_ticket(token, keys=[b"other-key"])
+        forged = sign_ticket("TKT-9999", "usr-0001", "Ana", None, key=b"other-key")
+        payload = forged.split(".")[1]
+        with pytest.raises(InvalidTicketSignature):
+            verify_ticket(f"ST1.{payload}.{token.split('.')[2]}", keys=[self.KEY])
+
+    def test_rotated_keys_still_verify(self):
+        token = sign_ticket("TKT-0001", "usr-0001", "Ana", None, key=b"old-key")
+        assert verify_ticket(token, keys=[b"new-key", b"old-key"]).ticket_id == "TKT-0001"
+
+    def test_plain_ids_are_not_signed(self):
+        assert not is_signed_ticket("TKT-2026-MKVIV4CK-D9C4FB27")
+
+
+# ── Binary badge responses ───────────────────────────────────────
+
+
+class TestBadgeHttp:
+    def test_accept_negotiation(self):
+        assert wants_pdf("application/pdf")
+        assert wants_pdf("application/json;q=0.5, application/pdf")
+        assert not wants_pdf("application/pdf;q=0")
+        assert not wants_pdf("*/*")
+        assert not wants_pdf(None)
+
+    def test_etag_follows_badge_inputs(self):
+        etag = badge_etag("TKT-0001", "Ana", "Estudiante", "N/A")
+        assert etag == badge_etag("TKT-0001", "Ana", "Estudiante", "N/A")
+        assert etag != badge_etag("TKT-0001", "Ana", "Estudiante", "2026-03-01T10:00:00+00:00")
+        assert etag_matches(f'"other", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+
+    def test_headers_are_latin1_safe(self):
+        headers = badge_headers({"ticketId": "TKT/1", "userId": "usr-1", "name": "José Núñez",
+                                 "profession": "N/A", "checkedIn": None, "checkedInAt": "N/A"})
+        assert headers["X-Attendee-Name"] == "Jos%C3%A9%20N%C3%BA%C3%B1ez"
+        assert "X-Checked-In" not in headers
+        assert 'filename="badge_TKT_1.pdf"' in headers["Content-Disposition"]
+        for value in headers.values():
+            value.encode("latin-1")
+
+
+# ── Badge templates ──────────────────────────────────────────────
+
+
+def _streams(pdf: bytes) -> list[bytes]:
+    return [zlib.decompress(m.group(1)) for m in re.finditer(rb"stream\r?\n(.*?)endstream", pdf, re.S)]
+
+
+class TestBadgeTemplate:
+    VALUES = {"ticketId": "TKT-0001", "name": "José Núñez", "profession": "Estudiante", "checkedInAt": "N/A"}
+
+    def test_reportlab_internals_still_match(self):
+        # badge_template lee Canvas._code y PDFDocument.fontMapping (privados de reportlab)
+        c = canvas.Canvas(io.BytesIO())
+        assert isinstance(getattr(c, "_code", None), list), "reportlab cambió Canvas._code"
+        start = len(c._code)
+        c.setFont("Helvetica-Bold", 9)
+        c.drawString(0, 0, "x")
+        assert any(op.startswith("BT /F") for op in c._code[start:]), "reportlab cambió el formato de _code"
+        name = c._doc.getInternalFontName("Courier")
+        assert getattr(c._doc, "fontMapping", {}).get("Courier") == name, "reportlab cambió _doc.fontMapping"
+
+    def test_flate_only_without_touching_rl_config(self):
+        template = BadgeTemplate("classic")
+        assert rl_config.useA85 == 1
+        for pdf in (template.render(self.VALUES), template.render_canvas(self.VALUES)):
+            assert b"ASCII85Decode" not in pdf
+        assert rl_config.useA85 == 1
+
+    def test_compiled_render_matches_reportlab(self):
+        template = get_template("classic")
+        pdf = template.render(self.VALUES)
+        reference = template.render_canvas(self.VALUES)
+        # Mismos form y fuentes; el content stream solo difiere en el preámbulo de reportlab
+        assert _streams(pdf)[:-1] == _streams(reference)[:-1]
+        assert _streams(pdf)[-1].strip() in _streams(reference)[-1]
+        # Cada offset de la xref apunta a su objeto
+        xref = pdf.rindex(b"\nxref\n") + 1
+        offsets = [int(m.group(1)) for m in re.finditer(rb"(\d{10}) 00000 n", pdf[xref:])]
+        assert all(pdf.startswith(f"{i} 0 obj".encode(), off) for i, off in enumerate(offsets, 1))
+        assert pdf.endswith(f"startxref\n{xref}\n%%EOF\n".encode())
+
+    def test_long_text_shrinks_to_min_size(self):
+        name_field = get_template("classic").fields[0]
+        assert name_field.fit("Ana")[0] == 18
+        size, width = name_field.fit("María Fernanda de los Ángeles Núñez Rodríguez")
+        assert 12 <= size < 18 and (width <= name_field.max_width or size == 12)
+
+    def test_custom_layout_file(self, tmp_path):
+        layout = {"size": [3, 1], "fields": [{"text": "{name} · {ticketId}", "x": 0.1, "y": 0.4,
+                                              "font": "Courier", "size": 10}]}
+        path = tmp_path / "mini.json"
+        path.write_text(json.dumps(layout), encoding="utf-8")
+        pdf = BadgeTemplate(str(path)).render(self.VALUES)
+        assert b"/MediaBox [ 0 0 216 72 ]" in pdf
+        with pytest.raises(ValueError, match="campo desconocido"):
+            validate_layout({"size": [3, 1], "fields": [{"text": "{email}", "x": 0, "y": 0,
+                                                         "font": "Courier", "size": 10}]})
+
+
+# ── Badge PDF cache ──────────────────────────────────────────────
+
+
+class TestBadgeCache:
+    def test_render_is_deterministic_and_key_follows_inputs(self):
+        values = {"ticketId": "TKT-0001", "name": "Ana", "profession": "Estudiante", "checkedInAt": "N/A"}
+        template = get_template("classic")
+        assert template.render(values) == template.render(dict(values))
+        assert template.render_canvas(values) == template.render_canvas(dict(values))
+        assert badge_digest("TKT-0001", "Ana", "Estudiante", "N/A") != \
+            badge_digest("TKT-0001", "Ana", "Estudiante", "2026-03-15T09:30:00+00:00")
+
+    def test_memory_lru_falls_back_to_disk(self, tmp_path):
+        cache = BadgeCache(memory_mb=2500 / 1024 / 1024, directory=str(tmp_path))
+        cache.put("a" * 64, b"x" * 1000)
+        cache.put("b" * 64, b"y" * 1000)
+        cache.put("c" * 64, b"z" * 1000)          # saca a "a" de memoria
+        assert cache.stats()["memoryEntries"] == 2
+        assert cache.get("a" * 64) == b"x" * 1000  # pero sigue en disco
+        assert (cache.hits, cache.disk_hits) == (0, 1)
+        calls = []
+        assert cache.get_or_render("d" * 64, lambda: calls.append(1) or b"pdf") == b"pdf"
+        assert cache.get_or_render("d" * 64, lambda: calls.append(1) or b"pdf") == b"pdf"
+        assert calls == [1]
+
+    def test_counters_are_exact_under_threads(self):
+        cache = BadgeCache(memory_mb=1)
+        cache.put("a" * 64, b"pdf")
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda _: [cache.get("a" * 64) for _ in range(500)], range(8)))
+        assert cache.stats()["hits"] == 4000
+
+    def test_uncached_render_skips_the_cache(self, monkeypatch):
+        cache = BadgeCache(memory_mb=1)
+        monkeypatch.setattr(pdf_badge, "badge_cache", cache)
+        args = ("TKT-0001", "Ana", "Estudiante", "2026-03-15T09:30:00+00:00")
+        assert pdf_badge.build_badge_pdf_bytes(*args, cache=False) == pdf_badge.build_badge_pdf_bytes(*args)
+        stats = cache.stats()
+        assert (stats["memoryEntries"], stats["misses"], stats["hits"]) == (1, 1, 0)
+
+    def test_disk_evicts_oldest_by_size(self, tmp_path):
+        cache = BadgeCache(memory_mb=0, directory=str(tmp_path), disk_mb=5000 / 1024 / 1024)
+        for i in range(8):
+            key = f"{i:02d}" + "0" * 62
+            cache.put(key, b"p" * 1000)
+            os.utime(cache._path(key), (1_000_000 + i, 1_000_000 + i))
+        remaining = sorted(os.path.basename(p)[:2] for _, _, p in cache._files())
+        assert sum(size for _, size, _ in cache._files()) <= 5000
+        assert remaining[-1] == "07" and "00" not in remaining
+        assert cache.disk_evictions > 0
+
+    def test_pregenerate_renders_once(self, tmp_path):
+        records = [AttendeeRecord(f"usr-{i}", f"TKT-{i:04d}", f"Asistente {i}", "Estudiante") for i in range(30)]
+        first = pregenerate(records, str(tmp_path), workers=2, chunk_size=10)
+        assert first == {"attendees": 30, "rendered": 30, "skipped": 0}
+        assert pregenerate(records, str(tmp_path), workers=2, chunk_size=10)["skipped"] == 30
+        cache = BadgeCache(memory_mb=0, directory=str(tmp_path))
+        pdf = cache.get(badge_digest(*preview_inputs(records[0])))
+        assert pdf == get_template().render({"ticketId": "TKT-0000", "name": "Asistente 0",
+                                             "profession": "Estudiante", "checkedInAt": "N/A"})
+
+
+# ── Hojas de badges ──────────────────────────────────────────────
+
+
+class TestBadgeSheet:
+    @staticmethod
+    def _objects(pdf: bytes) -> dict[int, bytes]:
+        """Objetos por número, siguiendo la tabla xref (falla si un offset no cuadra)."""
+        xref_at = int(pdf[pdf.rindex(b"startxref") + 9:].split()[0])
+        assert pdf[xref_at:].startswith(b"xref\n")
+        offsets = [int(m.group(1)) for m in re.finditer(rb"(\d{10}) 00000 n", pdf[xref_at:])]
+        objects = {}
+        for num, off in enumerate(offsets, start=1):
+            assert pdf[off:].startswith(f"{num} 0 obj".encode())
+            objects[num] = pdf[off:pdf.index(b"endobj", off)]
+        return objects
+
+    def test_layout_fits_or_rotates(self):
+        template = get_template("classic")
+        letter = SheetLayout(template, "letter")
+        assert (len(letter.slots), letter.rotated) == (10, False)
+        a4 = SheetLayout(template, "a4")
+        assert (len(a4.slots), a4.rotated) == (6, True)
+        assert len(SheetLayout(template, "letter", per_sheet=4).slots) == 4
+        with pytest.raises(ValueError):
+            SheetLayout(template, "letter", per_sheet=11)
+        for x, y in letter.slots:
+            assert 0 <= x and x + template.width <= letter.width and 0 <= y and y + template.height <= letter.height
+
+    def test_pdf_shares_form_across_pages(self):
+        records = [AttendeeRecord(f"usr-{i}", f"TKT-{i:04d}", f"Asistente {i}", "Estudiante") for i in range(23)]
+        records.append(AttendeeRecord("usr-x", "TKT-XXXX", "Ōtsuka 李", None))
+        template = get_template("classic")
+        chunks = list(iter_sheet_pdf(map(sheet_values, records), SheetLayout(template, "letter"), template))
+        objects = self._objects(b"".join(chunks))
+
+        pages = [o for o in objects.values() if b"/Type /Page " in o]
+        assert len(pages) == 3
+        forms = [o for o in objects.values() if b"/Subtype /Form" in o]
+        assert len(forms) == 2   # badge + marcas de corte, una vez en todo el documento
+        contents = [_streams(o)[0] for o in objects.values()
+                    if b"stream" in o and b"/Subtype" not in o]
+        assert sum(c.count(b"/Badge Do") for c in contents) == 24
+        assert all(c.startswith(b"/CropMarks Do") for c in contents)
+        assert b"(Otsuka ?)" in contents[-1]   # sin fuentes de sustitución
+
+    def test_select_records_filters_and_sorts(self):
+        records = [AttendeeRecord("u1", "T1", "beto", "x", checked_in=True),
+                   AttendeeRecord("u2", "T2", "Ana", "x"),
+                   AttendeeRecord("u3", "T3", "Carla", "x", checked_in=True)]
+        assert [r.ticket_id for r in select_records(records)] == ["T2", "T1", "T3"]
+        assert [r.ticket_id for r in select_records(records, checked_in=False)] == ["T2"]
+
+
+# ── Render pool ──────────────────────────────────────────────────
+
+
+class TestRenderPool:
+    BADGE = ("TKT-0001", "José Núñez", "Estudiante", "N/A", None)
+
+    def test_runs_in_process_until_started(self):
+        pool = RenderPool(workers=1)
+        assert pool.run("badge", _badge_pdf, *self.BADGE) == _badge_pdf(*self.BADGE)
+        assert pool.stats()["started"] is False and pool.stats()["renders"] == {}
+
+    def test_worker_renders_match_and_limiter_rejects(self):
+        pool = RenderPool(workers=1, max_in_flight=1, max_wait_s=0.05)
+        pool.start()
+        try:
+            assert pool.warm_workers == 1
+            assert pool.run("badge", _badge_pdf, *self.BADGE) == _badge_pdf(*self.BADGE)
+            label = LabelSpec.model_validate({"content": {"title": "Ana", "qr": "TKT-0001"}}).model_dump()
+            assert pool.run("label", _label_raster, label, 203) == _label_raster(label, 203)
+
+            pool._slots.acquire()   # el único render en vuelo
+            try:
+                with pytest.raises(AdmissionRejected):
+                    pool.run("badge", _badge_pdf, *self.BADGE)
+            finally:
+                pool._slots.release()
+            stats = pool.stats()
+            assert stats["rejected"] == 1 and stats["renders"]["badge"]["count"] == 1
+            assert stats["renders"]["label"]["renderMsP50"] > 0
+        finally:
+            pool.stop()
+
+    def test_restart_after_worker_death_rewarms(self):
+        pool = RenderPool(workers=1)
+        pool.start()
+        try:
+            (pid,) = pool._executor._processes
+            os.kill(pid, signal.SIGKILL)
+            assert pool.run("badge", _badge_pdf, *self.BADGE) == _badge_pdf(*self.BADGE)
+            assert pool.restarts == 1
+            deadline = time.monotonic() + 60
+            while pool.warm_workers < 1 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert pool.stats()["warmWorkers"] == 1
+            assert pool.run("badge", _badge_pdf, *self.BADGE) == _badge_pdf(*self.BADGE)
+        finally:
+            pool.stop()
@@ -1,6 +1,6 @@
 import { useState, useRef, useEffect } from "react";
 import QRScanner from "../components/qr/QRScanner";
-import { downloadPdfFromBase64 } from "../utils/pdfUtils";
+import { downloadPdfBlob } from "../utils/pdfUtils";
 
 export default function BadgePreviewPage() {
     const [scannedTicketId, setScannedTicketId] = useState(null);
@@ -63,18 +63,16 @@ export default function BadgePreviewPage() {
                 method: "POST",
                 headers: {
                     "Content-Type": "application/json",
+                    // PDF binario: sin Base64 en el JSON
+                    Accept: "application/pdf",
                 },
                 body: JSON.stringify({ ticketId: scannedTicketId }),
             });
 
             if (response.ok) {
-                const data = await response.json();
-                if (data.pdfBase64) {
-                    downloadPdfFromBase64(
-                        data.pdfBase64,
-                        `badge_${scannedTicketId}.pdf`,
-                        true
-                    );
+                const blob = await response.blob();
+                if (blob.size > 0) {
+                    downloadPdfBlob(blob, `badge_${scannedTicketId}.pdf`, true);
                 } else {
                     setError("Respuesta inválida del servidor (sin PDF)");
                 }
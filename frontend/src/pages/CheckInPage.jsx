@@ -3,7 +3,7 @@ import QRScanner from "../components/qr/QRScanner";
 import ConfirmModal from "../components/ConfirmModal";
 import CameraSelector from "../components/CameraSelector";
 import useCameraDevices from "../hooks/useCameraDevices";
-import { downloadPdfFromBase64 } from "../utils/pdfUtils";
+import { badgeHeader, downloadPdfBlob } from "../utils/pdfUtils";
 
 const API_URL = "/api";
 
@@ -57,7 +57,7 @@ export default function CheckInPage() {
 
     // null | "loading" | "confirm" | "error"
     const [modalMode, setModalMode] = useState(null);
-    const [modalData, setModalData] = useState(null); // { name, pdfBase64, ticketId }
+    const [modalData, setModalData] = useState(null); // { name, pdfBlob, ticketId }
     const [errorMsg, setErrorMsg] = useState("");
 
     // ── Refs anti-race-condition ──────────────────────────────────────────────
@@ -115,7 +115,8 @@ export default function CheckInPage() {
         try {
             const response = await fetch(`${API_URL}/badge`, {
                 method: "POST",
-                headers: { "Content-Type": "application/json" },
+                // PDF binario: los datos del asistente vienen en headers
+                headers: { "Content-Type": "application/json", Accept: "application/pdf" },
                 body: JSON.stringify({ ticketId }),
                 signal: controller.signal,
             });
@@ -123,8 +124,9 @@ export default function CheckInPage() {
             if (!mountedRef.current) return;
 
             if (response.ok) {
-                const data = await response.json();
-                setModalData({ name: data.name, pdfBase64: data.pdfBase64, ticketId });
+                const pdfBlob = await response.blob();
+                if (!mountedRef.current) return;
+                setModalData({ name: badgeHeader(response, "X-Attendee-Name"), pdfBlob, ticketId });
                 setModalMode("confirm");
                 // Mantener lockRef=true mientras el modal está abierto; se libera en reset()
             } else {
@@ -178,9 +180,9 @@ export default function CheckInPage() {
 
     // ── Handlers modal ────────────────────────────────────────────────────────
     const handleAccept = useCallback(() => {
-        if (modalData?.pdfBase64 && modalData?.ticketId) {
-            downloadPdfFromBase64(
-                modalData.pdfBase64,
+        if (modalData?.pdfBlob && modalData?.ticketId) {
+            downloadPdfBlob(
+                modalData.pdfBlob,
                 `badge_${modalData.ticketId}.pdf`,
                 false
             );
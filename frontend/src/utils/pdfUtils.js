@@ -22,8 +22,22 @@ export const downloadPdfFromBase64 = (pdfBase64, filename = "badge.pdf", openInN
             byteArray[i] = byteCharacters.charCodeAt(i);
         }
 
-        // Blob PDF
-        const blob = new Blob([byteArray], { type: "application/pdf" });
+        downloadPdfBlob(new Blob([byteArray], { type: "application/pdf" }), filename, openInNewTab);
+    } catch (error) {
+        console.error("Error downloading/opening PDF:", error);
+    }
+};
+
+/**
+ * Abre o descarga un PDF que ya es Blob (respuesta binaria de /badge o /checkin
+ * con `Accept: application/pdf`), sin pasar por Base64.
+ *
+ * @param {Blob} blob - PDF.
+ * @param {string} filename - Nombre del archivo a descargar.
+ * @param {boolean} openInNewTab - Si true, intenta abrir primero; si falla, descarga.
+ */
+export const downloadPdfBlob = (blob, filename = "badge.pdf", openInNewTab = true) => {
+    try {
         const blobUrl = URL.createObjectURL(blob);
 
         // Helper: descarga
@@ -58,3 +72,15 @@ export const downloadPdfFromBase64 = (pdfBase64, filename = "badge.pdf", openInN
         console.error("Error downloading/opening PDF:", error);
     }
 };
+
+/**
+ * Lee un header de texto de la respuesta binaria del badge (el backend los
+ * manda en percent-encoding UTF-8 para nombres con acentos).
+ *
+ * @param {Response} response - Respuesta de fetch.
+ * @param {string} name - Nombre del header, p. ej. "X-Attendee-Name".
+ */
+export const badgeHeader = (response, name) => {
+    const value = response.headers.get(name);
+    return value ? decodeURIComponent(value) : null;
+};